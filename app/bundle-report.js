@@ -0,0 +1,139 @@
+/*
+ * Copyright (c) Jupyter Development Team.
+ * Distributed under the terms of the Modified BSD License.
+ */
+
+const fs = require('fs-extra');
+const path = require('path');
+const zlib = require('zlib');
+
+const PLUGIN_NAME = 'BundleReportPlugin';
+
+/**
+ * The size of a number of bytes, in KiB.
+ */
+function kib(bytes) {
+  return Math.round(bytes / 1024);
+}
+
+// Report the size of the code each page downloads before its first paint:
+// the chunks of the entry point, plus the chunk group of the page plugins.
+// With a budgets file, the build fails when a page downloads more than the
+// size measured in the file, plus its margin. With UPDATE_BUNDLE_BUDGETS=1,
+// the measured sizes are written to the budgets file instead.
+class BundleReportPlugin {
+  constructor(options) {
+    this.pages = options.pages;
+    this.chunkName = options.chunkName;
+    this.output = options.output;
+    // The measured sizes in KiB of the code downloaded by each page, and the
+    // margin in percent allowed over them
+    this.budgetsFile = options.budgetsFile || null;
+  }
+
+  apply(compiler) {
+    compiler.hooks.thisCompilation.tap(PLUGIN_NAME, (compilation) => {
+      compilation.hooks.processAssets.tap(
+        {
+          name: PLUGIN_NAME,
+          stage: compiler.webpack.Compilation.PROCESS_ASSETS_STAGE_REPORT,
+        },
+        () => {
+          const report = {};
+          this.pages.forEach((page) => {
+            report[page] = this._measure(compilation, page);
+          });
+          const limits = this._budgets(compilation, report);
+          fs.ensureDirSync(path.dirname(this.output));
+          fs.writeFileSync(this.output, JSON.stringify(report, null, 2));
+          console.log(`Bundle sizes per page (KiB), see ${this.output}`);
+          console.table(
+            Object.fromEntries(
+              Object.entries(report).map(([page, { size, gzip }]) => [
+                page,
+                { size: kib(size), gzip: kib(gzip), budget: limits[page] },
+              ])
+            )
+          );
+        }
+      );
+    });
+  }
+
+  /**
+   * Measure the scripts and styles downloaded by a page.
+   */
+  _measure(compilation, page) {
+    const groups = [...compilation.entrypoints.values()];
+    const pageGroup = compilation.namedChunkGroups.get(this.chunkName(page));
+    if (pageGroup) {
+      groups.push(pageGroup);
+    }
+    const files = new Set();
+    groups.forEach((group) => {
+      group.chunks.forEach((chunk) => {
+        chunk.files.forEach((file) => {
+          // Filenames may carry a ?v= cache busting argument.
+          if (/\.(js|css)$/.test(file.split('?')[0])) {
+            files.add(file);
+          }
+        });
+      });
+    });
+    let size = 0;
+    let gzip = 0;
+    files.forEach((file) => {
+      const buffer = Buffer.from(compilation.getAsset(file).source.source());
+      size += buffer.length;
+      gzip += zlib.gzipSync(buffer).length;
+    });
+    return { size, gzip, files: [...files].sort() };
+  }
+
+  /**
+   * Fail the build for the pages over budget or without one, or update the
+   * budgets file with UPDATE_BUNDLE_BUDGETS=1. Returns the budget of each
+   * page, in KiB.
+   */
+  _budgets(compilation, report) {
+    if (!this.budgetsFile) {
+      return {};
+    }
+    const { WebpackError } = compilation.compiler.webpack;
+    const budgets = fs.readJsonSync(this.budgetsFile);
+    if (process.env.UPDATE_BUNDLE_BUDGETS === '1') {
+      budgets.sizes = Object.fromEntries(
+        Object.entries(report).map(([page, { size }]) => [page, kib(size)])
+      );
+      fs.writeFileSync(
+        this.budgetsFile,
+        JSON.stringify(budgets, null, 2) + '\n'
+      );
+      console.log(`Updated the bundle budgets in ${this.budgetsFile}`);
+    }
+    const limits = {};
+    Object.entries(report).forEach(([page, { size }]) => {
+      const measured = budgets.sizes[page];
+      if (measured === undefined) {
+        compilation.errors.push(
+          new WebpackError(
+            `The ${page} page has no bundle budget, build with UPDATE_BUNDLE_BUDGETS=1 to measure it.`
+          )
+        );
+        return;
+      }
+      const limit = Math.ceil((measured * (100 + budgets.margin)) / 100);
+      limits[page] = limit;
+      if (kib(size) > limit) {
+        compilation.errors.push(
+          new WebpackError(
+            `The ${page} page downloads ${kib(size)} KiB of code, over its budget of ${limit} KiB (${measured} KiB measured, plus ${budgets.margin}%).`
+          )
+        );
+      }
+    });
+    return limits;
+  }
+}
+
+module.exports = BundleReportPlugin;
@@ -0,0 +1,57 @@
+/*
+ * Copyright (c) Jupyter Development Team.
+ * Distributed under the terms of the Modified BSD License.
+ */
+
+const zlib = require('zlib');
+const rspack = require('@rspack/core');
+
+const PLUGIN_NAME = 'CompressionPlugin';
+
+// Emit .gz and .br siblings of the text assets, served by the
+// notebook server in place of the originals when the browser accepts them.
+class CompressionPlugin {
+  constructor(options = {}) {
+    this.test = options.test || /\.(js|css|json|svg|map)$/;
+    this.threshold = options.threshold || 1024;
+  }
+
+  apply(compiler) {
+    compiler.hooks.thisCompilation.tap(PLUGIN_NAME, (compilation) => {
+      compilation.hooks.processAssets.tap(
+        {
+          name: PLUGIN_NAME,
+          stage: rspack.Compilation.PROCESS_ASSETS_STAGE_OPTIMIZE_TRANSFER,
+        },
+        (assets) => {
+          Object.keys(assets).forEach((name) => {
+            // Filenames may carry a ?v= cache busting argument.
+            const file = name.split('?')[0];
+            if (!this.test.test(file)) {
+              return;
+            }
+            const buffer = Buffer.from(assets[name].source());
+            if (buffer.length < this.threshold) {
+              return;
+            }
+            const gzip = zlib.gzipSync(buffer, {
+              level: zlib.constants.Z_BEST_COMPRESSION,
+            });
+            const brotli = zlib.brotliCompressSync(buffer, {
+              params: {
+                [zlib.constants.BROTLI_PARAM_QUALITY]:
+                  zlib.constants.BROTLI_MAX_QUALITY,
+                [zlib.constants.BROTLI_PARAM_SIZE_HINT]: buffer.length,
+              },
+            });
+            const { RawSource } = rspack.sources;
+            compilation.emitAsset(`${file}.gz`, new RawSource(gzip));
+            compilation.emitAsset(`${file}.br`, new RawSource(brotli));
+          });
+        }
+      );
+    });
+  }
+}
+
+module.exports = CompressionPlugin;
@@ -0,0 +1,113 @@
+// Copyright (c) Jupyter Development Team.
+// Distributed under the terms of the Modified BSD License.
+
+// A shared worker answering the polling requests of all the notebook tabs of
+// a server, so the server sees one request per endpoint and period instead of
+// one per tab. It is loaded when the `share_connections` option is enabled.
+
+/**
+ * How long, in ms, a response is shared between the tabs.
+ */
+const MAX_AGE = 5000;
+
+/**
+ * The pending or recent responses, by request.
+ */
+const responses = new Map();
+
+/**
+ * The query parameter added to the requests not to be cached, like `?1712345`.
+ */
+const CACHE_BUSTER = /^\d+$/;
+
+/**
+ * The key of a request: its endpoint and query, without the cache buster.
+ */
+function requestKey(url, headers) {
+  const { origin, pathname, searchParams } = new URL(url);
+  const params = Array.from(searchParams.entries())
+    .filter(([name, value]) => !(value === '' && CACHE_BUSTER.test(name)))
+    .sort(([a], [b]) => (a < b ? -1 : a > b ? 1 : 0));
+  const query = new URLSearchParams(params).toString();
+  const endpoint = `${origin}${pathname}`.replace(/\/$/, '');
+  const request = query ? `${endpoint}?${query}` : endpoint;
+  // Tabs authenticated differently must not share responses.
+  return `${request}\n${headers.authorization || ''}`;
+}
+
+/**
+ * Drop the responses older than `MAX_AGE`.
+ */
+function prune(now) {
+  for (const [key, entry] of responses) {
+    if (now - entry.time > MAX_AGE) {
+      responses.delete(key);
+    }
+  }
+}
+
+/**
+ * Fetch a response, as a message that can be posted to the tabs.
+ */
+async function fetchResponse(url, headers) {
+  const response = await fetch(url, {
+    headers,
+    cache: 'no-store',
+    credentials: 'same-origin',
+  });
+  return {
+    status: response.status,
+    statusText: response.statusText,
+    headers: Array.from(response.headers.entries()),
+    body: await response.text(),
+  };
+}
+
+/**
+ * Get the response to a request, reusing a recent one for the same request.
+ */
+function getResponse(url, headers) {
+  const key = requestKey(url, headers);
+  const now = Date.now();
+  prune(now);
+  let entry = responses.get(key);
+  if (!entry) {
+    entry = { time: now, response: fetchResponse(url, headers) };
+    responses.set(key, entry);
+    entry.response.catch(() => {
+      if (responses.get(key) === entry) {
+        responses.delete(key);
+      }
+    });
+  }
+  return entry.response;
+}
+
+/**
+ * Drop the responses for an endpoint, after a tab changed its state.
+ */
+function invalidate(url) {
+  for (const key of responses.keys()) {
+    // The responses of the endpoint and its models, not of `${url}specs`.
+    if (key.startsWith(url) && /^[?/\n]/.test(key.slice(url.length))) {
+      responses.delete(key);
+    }
+  }
+}
+
+self.onconnect = (event) => {
+  const port = event.ports[0];
+  port.onmessage = async ({ data }) => {
+    if (data.invalidate) {
+      invalidate(data.invalidate);
+      return;
+    }
+    const { id, url, headers } = data;
+    try {
+      const response = await getResponse(url, headers);
+      port.postMessage({ id, ...response });
+    } catch (error) {
+      port.postMessage({ id, error: String(error) });
+    }
+  };
+};
@@ -73,7 +73,7 @@ async function main() {
     // list all the other plugins grouped by page
     case '{{ @key }}': {
       baseMods = baseMods.concat([
-        {{{ list_plugins }}}
+        {{{ list_plugins lazy=true }}}
       ]);
       break;
     }
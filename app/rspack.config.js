@@ -10,6 +10,7 @@ const rspack = require('@rspack/core');
 const merge = require('webpack-merge').default;
 const Handlebars = require('handlebars');
 const { ModuleFederationPlugin } = rspack.container;
+const BundleReportPlugin = require('./bundle-report');
 const BundleAnalyzerPlugin =
   require('webpack-bundle-analyzer').BundleAnalyzerPlugin;
 
@@ -44,6 +45,13 @@ Object.keys(plugins).forEach((page) => {
   });
 });
 
+/**
+ * The name of the chunk group of the plugins of a page, e.g. page-tree
+ */
+function pageChunkName(page) {
+  return `page${page.replace(/\//g, '-')}`;
+}
+
 Handlebars.registerHelper('json', function (context) {
   return JSON.stringify(context);
 });
@@ -54,19 +62,43 @@ Handlebars.registerHelper('ispage', function (key, page) {
 });
 
 // custom helper to load the plugins on the index page
-Handlebars.registerHelper('list_plugins', function () {
+// The plugins of the other pages are imported lazily, as one chunk group per
+// page, so a page does not download the code of the others.
+// An extension is listed as `true` for all its plugins, as a list of the
+// plugins to load, or as `{ "exclude": [...] }` for all its plugins but those
+// the notebook application provides itself.
+Handlebars.registerHelper('list_plugins', function (options) {
   let str = '';
   const page = this;
+  const chunk = pageChunkName(options.data.key);
+  // Get the exports of an extension, with the given accessor applied.
+  const load = (extension, accessor) =>
+    options.hash.lazy
+      ? `import(/* webpackChunkName: "${chunk}" */ \'${extension}\').then((m) => m.default${accessor})`
+      : `require(\'${extension}\')${accessor ? `.default${accessor}` : ''}`;
   Object.keys(this).forEach((extension) => {
     const plugin = page[extension];
     if (plugin === true) {
-      str += `require(\'${extension}\'),\n  `;
+      str += `${load(extension, '')},\n  `;
     } else if (Array.isArray(plugin)) {
       const plugins = plugin.map((p) => `'${p}',`).join('\n');
       str += `
-      require(\'${extension}\').default.filter(({id}) => [
+      ${load(
+        extension,
+        `.filter(({id}) => [
+       ${plugins}
+      ].includes(id))`
+      )},
+      `;
+    } else if (plugin && Array.isArray(plugin.exclude)) {
+      const plugins = plugin.exclude.map((p) => `'${p}',`).join('\n');
+      str += `
+      ${load(
+        extension,
+        `.filter(({id}) => ![
        ${plugins}
-      ].includes(id)),
+      ].includes(id))`
+      )},
       `;
     }
   });
@@ -205,25 +237,22 @@ if (process.argv.includes('--analyze')) {
   extras.push(new BundleAnalyzerPlugin());
 }
 
+const pages = ['consoles', 'edit', 'error', 'notebooks', 'terminals', 'tree'];
+
 const htmlPlugins = [];
-['consoles', 'edit', 'error', 'notebooks', 'terminals', 'tree'].forEach(
-  (name) => {
-    htmlPlugins.push(
-      new HtmlWebpackPlugin({
-        chunksSortMode: 'none',
-        template: path.join(
-          path.resolve('./templates'),
-          `${name}_template.html`
-        ),
-        title: name,
-        filename: path.join(
-          path.resolve(__dirname, '..', 'notebook/templates'),
-          `${name}.html`
-        ),
-      })
-    );
-  }
-);
+pages.forEach((name) => {
+  htmlPlugins.push(
+    new HtmlWebpackPlugin({
+      chunksSortMode: 'none',
+      template: path.join(path.resolve('./templates'), `${name}_template.html`),
+      title: name,
+      filename: path.join(
+        path.resolve(__dirname, '..', 'notebook/templates'),
+        `${name}.html`
+      ),
+    })
+  );
+});
 
 module.exports = [
   merge(baseConfig, {
@@ -245,6 +274,9 @@ module.exports = [
           jlab_core: {
             test: /[\\/]node_modules[\\/]@(jupyterlab|jupyter-notebook|lumino(?!\/datagrid))[\\/]/,
             name: 'notebook_core',
+            // Only the modules loaded on every page, the ones imported by the
+            // plugins of a single page stay in the chunks of that page.
+            chunks: 'initial',
           },
         },
       },
@@ -254,6 +286,17 @@ module.exports = [
     },
     plugins: [
       ...htmlPlugins,
+      new BundleReportPlugin({
+        pages: pages
+          .filter((name) => name !== 'error')
+          .map((name) => `/${name}`),
+        chunkName: pageChunkName,
+        output: path.join(buildDir, 'bundle-report.json'),
+      }),
+      // The shared worker is loaded by url, so it keeps its name.
+      new rspack.CopyRspackPlugin({
+        patterns: [{ from: path.resolve(__dirname, 'connections-worker.js') }],
+      }),
       new WPPlugin.JSONLicenseWebpackPlugin({
         excludedPackageTest: (packageName) =>
           packageName === '@jupyter-notebook/app',
@@ -5,6 +5,7 @@
 
 const merge = require('webpack-merge').default;
 const config = require('./rspack.config');
+const CompressionPlugin = require('./compression');
 const WPPlugin = require('@jupyter/builder').WPPlugin;
 
 config[0] = merge(config[0], {
@@ -23,6 +24,8 @@ config[0] = merge(config[0], {
       excludedPackageTest: (packageName) =>
         packageName === '@jupyter-notebook/app',
     }),
+    // Precompressed siblings of the bundles, served by the notebook server
+    new CompressionPlugin(),
   ],
 });
 
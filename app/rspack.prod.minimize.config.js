@@ -6,6 +6,7 @@
 const merge = require('webpack-merge').default;
 const WPPlugin = require('@jupyter/builder').WPPlugin;
 const config = require('./rspack.config');
+const CompressionPlugin = require('./compression');
 
 config[0] = merge(config[0], {
   mode: 'production',
@@ -23,6 +24,8 @@ config[0] = merge(config[0], {
       excludedPackageTest: (packageName) =>
         packageName === '@jupyter-notebook/app',
     }),
+    // Precompressed siblings of the bundles, served by the notebook server
+    new CompressionPlugin(),
   ],
 });
 
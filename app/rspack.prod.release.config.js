@@ -3,12 +3,19 @@
  * Distributed under the terms of the Modified BSD License.
  */
 
+const path = require('path');
 const merge = require('webpack-merge').default;
 const config = require('./rspack.prod.minimize.config');
+const BundleReportPlugin = require('./bundle-report');
 
 config[0] = merge(config[0], {
   // Turn off source maps
   devtool: false,
 });
 
+// Fail the release builds when a page downloads more code than its budget
+config[0].plugins.find(
+  (plugin) => plugin instanceof BundleReportPlugin
+).budgetsFile = path.resolve(__dirname, 'bundle-budgets.json');
+
 module.exports = config;
@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from typing import Any
 
+# Imported first, so that --profile-startup also times importing the app.
+from ._startup_profile import startup_profile  # noqa: F401
 from ._version import __version__, version_info  # noqa: F401
 
 
@@ -0,0 +1,126 @@
+"""The kernel events stream, for ``kernel_events_interval``."""
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+import typing as t
+from pathlib import Path
+
+from jupyter_client.utils import ensure_async  # type:ignore[attr-defined]
+from jupyter_events import EventLogger
+
+KERNELS_EVENT_SCHEMA_ID = "https://events.jupyter.org/jupyter_notebook/kernels/v1"
+
+#: The methods of the session manager changing the sessions.
+SESSION_METHODS = ("create_session", "update_session", "delete_session")
+
+#: How often, in seconds, the kernel specs are looked for on disk.
+KERNELSPECS_INTERVAL = 60.0
+
+
+class KernelEvents:
+    """Emit an event when the kernels, the sessions or the kernel specs change.
+
+    The kernels are compared in memory every ``interval`` seconds, without those
+    of ``hidden_ids``. The kernel specs are looked for on disk every
+    ``KERNELSPECS_INTERVAL`` seconds, once for all the pages instead of being
+    polled by each of them.
+    """
+
+    def __init__(
+        self,
+        log: logging.Logger,
+        event_logger: EventLogger,
+        kernel_manager: t.Any,
+        kernel_spec_manager: t.Any,
+        interval: float,
+        run_in_executor: t.Callable[..., t.Awaitable[t.Any]],
+    ) -> None:
+        self.log = log
+        self.event_logger = event_logger
+        self.kernel_manager = kernel_manager
+        self.kernel_spec_manager = kernel_spec_manager
+        self.interval = interval
+        self.run_in_executor = run_in_executor
+        #: The ids of the kernels not listed, like those of the kernel pool.
+        self.hidden_ids: t.Callable[[], t.Collection[str]] = frozenset
+        self._kernel_ids: set[str] = set()
+        self._specs: dict[str, tuple[str, float | None]] | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        """Start watching the kernels, on the running event loop."""
+        self._kernel_ids = self._get_kernel_ids()
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        """Stop watching the kernels."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def watch_sessions(self, session_manager: t.Any) -> None:
+        """Emit an event once a session is created, updated or deleted."""
+        for name in SESSION_METHODS:
+            method = getattr(session_manager, name)
+            setattr(session_manager, name, self._emit_after(method, "sessions"))
+
+    def emit(self, action: str) -> None:
+        """Emit a kernels event."""
+        self.event_logger.emit(schema_id=KERNELS_EVENT_SCHEMA_ID, data={"action": action})
+
+    def check_kernels(self) -> None:
+        """Emit an event if the kernels changed since the last check."""
+        kernel_ids = self._get_kernel_ids()
+        if kernel_ids != self._kernel_ids:
+            self.emit("kernels")
+        self._kernel_ids = kernel_ids
+
+    async def check_kernelspecs(self) -> None:
+        """Emit an event if the kernel specs changed since the last check."""
+        specs = await self.run_in_executor(self._find_kernelspecs)
+        if self._specs is not None and specs != self._specs:
+            self.emit("kernelspecs")
+        self._specs = specs
+
+    async def _run(self) -> None:
+        elapsed = KERNELSPECS_INTERVAL
+        while True:
+            try:
+                self.check_kernels()
+                if elapsed >= KERNELSPECS_INTERVAL:
+                    elapsed = 0.0
+                    await self.check_kernelspecs()
+            except Exception:
+                self.log.exception("Failed to check the kernels")
+            await asyncio.sleep(self.interval)
+            elapsed += self.interval
+
+    def _get_kernel_ids(self) -> set[str]:
+        return set(self.kernel_manager.list_kernel_ids()) - set(self.hidden_ids())
+
+    def _find_kernelspecs(self) -> dict[str, tuple[str, float | None]]:
+        """The resource directory of each kernel spec, and when its spec changed."""
+        specs = {}
+        for name, resource_dir in self.kernel_spec_manager.find_kernel_specs().items():
+            try:
+                mtime: float | None = Path(resource_dir, "kernel.json").stat().st_mtime
+            except OSError:
+                mtime = None
+            specs[name] = (resource_dir, mtime)
+        return specs
+
+    def _emit_after(
+        self, method: t.Callable[..., t.Any], action: str
+    ) -> t.Callable[..., t.Awaitable[t.Any]]:
+        @functools.wraps(method)
+        async def wrapper(*args: t.Any, **kwargs: t.Any) -> t.Any:
+            result = await ensure_async(method(*args, **kwargs))
+            self.emit(action)
+            return result
+
+        return wrapper
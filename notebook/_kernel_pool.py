@@ -0,0 +1,162 @@
+"""Kernels started ahead of time, for ``kernel_pool_size``."""
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+from __future__ import annotations
+
+import asyncio
+import os
+import typing as t
+from collections import Counter
+
+from jupyter_client.utils import ensure_async  # type:ignore[attr-defined]
+
+from .metrics import KERNEL_POOL_CLAIMS_TOTAL
+
+#: How often, in seconds, the pooled kernels that are gone are replaced.
+KERNEL_POOL_CHECK_INTERVAL = 10.0
+
+
+class KernelPool:
+    """Keep kernels running for new sessions to take.
+
+    The pool replaces ``start_kernel`` of the kernel manager. The pooled
+    kernels run in the root directory, with the environment of the server.
+    A kernel of a pooled kernel spec is taken from the pool if it is started
+    in the root directory, with no other environment variables than those of
+    the server and ``ignored_env``, and a new one is started in the background
+    to replace it. Pooled kernels are hidden from ``list_kernels`` and are not
+    culled until they are taken, and the ones that are gone are replaced
+    every ``interval`` seconds.
+    """
+
+    def __init__(
+        self,
+        kernel_manager: t.Any,
+        size: int,
+        kernel_names: list[str],
+        ignored_env: t.Iterable[str] = (),
+        interval: float = KERNEL_POOL_CHECK_INTERVAL,
+    ) -> None:
+        self.kernel_manager = kernel_manager
+        self.size = size
+        self.ignored_env = frozenset(ignored_env)
+        self.interval = interval
+        self._kernels: dict[str, list[str]] = {name: [] for name in kernel_names}
+        self._starting: Counter[str] = Counter()
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._task: asyncio.Task[None] | None = None
+        self._start_kernel = kernel_manager.start_kernel
+        self._list_kernels = kernel_manager.list_kernels
+        self._cull_kernel_if_idle = kernel_manager.cull_kernel_if_idle
+
+    def install(self) -> None:
+        """Take the new kernels from the pool, and start filling it."""
+        km = self.kernel_manager
+        km.start_kernel = self.start_kernel
+        km.list_kernels = self.list_kernels
+        km.cull_kernel_if_idle = self.cull_kernel_if_idle
+        self.fill()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop filling the pool, and shut down the pooled kernels."""
+        km = self.kernel_manager
+        km.start_kernel = self._start_kernel
+        km.list_kernels = self._list_kernels
+        km.cull_kernel_if_idle = self._cull_kernel_if_idle
+        tasks = [*self._tasks, *([self._task] if self._task is not None else [])]
+        self._task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        pooled = self.pooled_ids()
+        for kernels in self._kernels.values():
+            kernels.clear()
+        for kernel_id in pooled:
+            if kernel_id not in km:
+                continue
+            try:
+                await ensure_async(km.shutdown_kernel(kernel_id))
+            except Exception:
+                km.log.exception("Failed to shut down the pooled kernel %s", kernel_id)
+
+    def fill(self) -> None:
+        """Forget the pooled kernels that are gone, and start kernels in the
+        background until the pool is full."""
+        km = self.kernel_manager
+        for name, kernels in self._kernels.items():
+            kernels[:] = [kernel_id for kernel_id in kernels if kernel_id in km]
+            while len(kernels) + self._starting[name] < self.size:
+                self._starting[name] += 1
+                task = asyncio.create_task(self._add_kernel(name))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            self.fill()
+
+    async def _add_kernel(self, name: str) -> None:
+        try:
+            kernel_id = await ensure_async(self._start_kernel(path="", kernel_name=name))
+        except Exception:
+            self.kernel_manager.log.exception("Failed to start a %s kernel for the pool", name)
+            return
+        finally:
+            self._starting[name] -= 1
+        self._kernels[name].append(kernel_id)
+
+    def _can_take(self, path: str | None, env: dict[str, str] | None) -> bool:
+        """Whether a pooled kernel runs where and as a kernel is asked for."""
+        km = self.kernel_manager
+        if km.cwd_for_path(path or "") != km.cwd_for_path(""):
+            return False
+        extra_env = {key for key, value in (env or {}).items() if os.environ.get(key) != value}
+        return extra_env <= self.ignored_env
+
+    async def start_kernel(
+        self, *, kernel_id: str | None = None, path: str | None = None, **kwargs: t.Any
+    ) -> str:
+        """Start a kernel, or take one from the pool."""
+        km = self.kernel_manager
+        kernel_name = kwargs.get("kernel_name") or km.default_kernel_name
+        kernels = self._kernels.get(kernel_name)
+        if kernels is None:
+            return t.cast(str, await self._start_kernel(kernel_id=kernel_id, path=path, **kwargs))
+
+        if kernel_id is None and self._can_take(path, kwargs.get("env")):
+            while kernels:
+                pooled_id = kernels.pop(0)
+                if pooled_id not in km:
+                    # Shut down or died while waiting.
+                    continue
+                if "env" in kwargs and hasattr(km, "update_env"):
+                    # The ignored variables are applied when the kernel restarts.
+                    km.update_env(kernel_id=pooled_id, env=kwargs["env"])
+                KERNEL_POOL_CLAIMS_TOTAL.labels(kernel_name=kernel_name, result="hit").inc()
+                self.fill()
+                return pooled_id
+
+        KERNEL_POOL_CLAIMS_TOTAL.labels(kernel_name=kernel_name, result="miss").inc()
+        self.fill()
+        return t.cast(str, await self._start_kernel(kernel_id=kernel_id, path=path, **kwargs))
+
+    def list_kernels(self) -> list[dict[str, t.Any]]:
+        """List the running kernels, except the pooled ones."""
+        pooled = self.pooled_ids()
+        return [model for model in self._list_kernels() if model["id"] not in pooled]
+
+    async def cull_kernel_if_idle(self, kernel_id: str) -> None:
+        """Cull a kernel if it is idle, unless it is pooled."""
+        if kernel_id not in self.pooled_ids():
+            await ensure_async(self._cull_kernel_if_idle(kernel_id))
+
+    def pooled_ids(self) -> set[str]:
+        """Get the ids of all the pooled kernels."""
+        return {kernel_id for kernels in self._kernels.values() for kernel_id in kernels}
+
+    def pooled_kernels(self) -> dict[str, list[str]]:
+        """Get the ids of the pooled kernels, by kernel spec."""
+        return {name: list(kernels) for name, kernels in self._kernels.items()}
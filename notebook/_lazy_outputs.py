@@ -0,0 +1,130 @@
+"""The heavy outputs of large notebooks, for ``lazy_outputs_threshold``."""
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import typing as t
+from collections import OrderedDict
+
+from tornado import web
+
+#: The mime type of the outputs replaced by a stub, loaded when visible.
+LAZY_OUTPUT_MIMETYPE = "application/vnd.jupyter.notebook.lazy-output+json"
+
+#: The size in bytes of the mime bundle of an output, over which it is lazy.
+LAZY_OUTPUT_MIN_SIZE = 16 * 1024
+
+#: The total size in bytes of the lazy outputs kept in memory.
+MAX_LAZY_OUTPUTS_SIZE = 64 * 1024 * 1024
+
+
+def _rich_outputs(nb: dict[str, t.Any]) -> t.Iterator[dict[str, t.Any]]:
+    """Iterate over the outputs of a notebook with a mime bundle."""
+    for cell in nb.get("cells", []):
+        for output in cell.get("outputs", []):
+            if "data" in output:
+                yield output
+
+
+class LazyOutputs:
+    """Replace the heavy outputs of notebooks by stubs, and keep them to be fetched.
+
+    The outputs are keyed by the hash of their content, so the stubs still
+    resolve after the notebook is saved, or when the same output is in
+    several notebooks. The least recently used outputs are dropped past
+    ``max_size`` bytes, and loaded again from their notebook when needed.
+    """
+
+    def __init__(
+        self, min_size: int = LAZY_OUTPUT_MIN_SIZE, max_size: int = MAX_LAZY_OUTPUTS_SIZE
+    ) -> None:
+        self.min_size = min_size
+        self.max_size = max_size
+        self._outputs: OrderedDict[str, tuple[dict[str, t.Any], int]] = OrderedDict()
+        self._size = 0
+        # The notebooks are stripped in the io thread pool.
+        self._lock = threading.Lock()
+
+    def strip(self, path: str, nb: dict[str, t.Any]) -> int:
+        """Replace the heavy outputs of a notebook by stubs, in place.
+
+        Returns the number of outputs replaced.
+        """
+        count = 0
+        for output in _rich_outputs(nb):
+            if LAZY_OUTPUT_MIMETYPE in output["data"]:
+                continue
+            bundle = {"data": output["data"], "metadata": output.get("metadata", {})}
+            serialized = json.dumps(bundle, sort_keys=True).encode()
+            size = len(serialized)
+            if size < self.min_size:
+                continue
+            key = hashlib.sha256(serialized).hexdigest()
+            self._add(key, bundle, size)
+            output["data"] = {
+                LAZY_OUTPUT_MIMETYPE: {
+                    "key": key,
+                    "path": path,
+                    "size": size,
+                    "mimetypes": sorted(bundle["data"]),
+                }
+            }
+            output["metadata"] = {}
+            count += 1
+        return count
+
+    def get(self, key: str) -> dict[str, t.Any] | None:
+        """Get the mime bundle and metadata of an output, if kept."""
+        with self._lock:
+            if key not in self._outputs:
+                return None
+            self._outputs.move_to_end(key)
+            return self._outputs[key][0]
+
+    def restore(
+        self,
+        nb: dict[str, t.Any],
+        load: t.Callable[[str], dict[str, t.Any] | None],
+        path: str | None = None,
+    ) -> None:
+        """Put back the outputs of the stubs of a notebook, in place.
+
+        ``load`` reads a notebook, if an output is not kept anymore: first the
+        notebook saved at ``path``, then the one the stub was fetched from, in
+        case the notebook was renamed or saved as another one since. Raises a
+        409 error if an output cannot be found, rather than losing it.
+        """
+        loaded: set[str] = set()
+        for output in _rich_outputs(nb):
+            stub = output["data"].get(LAZY_OUTPUT_MIMETYPE)
+            if not isinstance(stub, dict):
+                continue
+            bundle = self.get(stub["key"])
+            for candidate in (path, stub["path"]):
+                if bundle is not None or candidate is None or candidate in loaded:
+                    continue
+                loaded.add(candidate)
+                original = load(candidate)
+                if original is not None:
+                    self.strip(candidate, original)
+                bundle = self.get(stub["key"])
+            if bundle is None:
+                msg = f"The output {stub['key']} of the notebook is not available anymore"
+                raise web.HTTPError(409, msg)
+            output["data"] = bundle["data"]
+            output["metadata"] = bundle["metadata"]
+
+    def _add(self, key: str, bundle: dict[str, t.Any], size: int) -> None:
+        with self._lock:
+            if key in self._outputs:
+                self._outputs.move_to_end(key)
+                return
+            self._outputs[key] = (bundle, size)
+            self._size += size
+            while self._size > self.max_size and len(self._outputs) > 1:
+                _, (_, dropped) = self._outputs.popitem(last=False)
+                self._size -= dropped
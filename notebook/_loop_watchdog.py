@@ -0,0 +1,131 @@
+"""A watchdog of the event loop, for ``event_loop_lag_threshold``."""
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+import typing as t
+from types import FrameType
+
+from tornado import web
+
+from .metrics import EVENT_LOOP_LAG_SECONDS, EVENT_LOOP_STALLS_TOTAL
+
+
+class Stall(t.NamedTuple):
+    """What the event loop was running when it got blocked."""
+
+    heartbeat: float
+    handler: str
+    path: str
+    stack: str
+
+
+def _find_handler(frame: FrameType | None) -> web.RequestHandler | None:
+    """Find the request handler a stack is running, if any."""
+    while frame is not None:
+        candidate = frame.f_locals.get("self")
+        if isinstance(candidate, web.RequestHandler):
+            return candidate
+        frame = frame.f_back
+    return None
+
+
+class LoopWatchdog:
+    """Log what blocks the event loop for more than ``threshold`` seconds.
+
+    A task sleeps ``interval`` seconds in a loop, and records how late it
+    wakes up. A thread checks that the task keeps waking up: once the loop is
+    blocked for more than ``threshold`` seconds, it takes the stack of the
+    loop thread, until a request handler is found in that stack. The stall is
+    logged with them when the loop runs again.
+    """
+
+    def __init__(self, log: logging.Logger, threshold: float, interval: float) -> None:
+        self.log = log
+        self.threshold = threshold
+        self.interval = interval
+        self._heartbeat = time.monotonic()
+        self._stall: Stall | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._thread: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        """Start watching the running event loop."""
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.create_task(self._beat())
+        self._thread = threading.Thread(
+            target=self._watch,
+            args=(threading.get_ident(),),
+            name="notebook-loop-watchdog",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop watching the event loop."""
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _beat(self) -> None:
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - start - self.interval)
+            EVENT_LOOP_LAG_SECONDS.observe(lag)
+            heartbeat, self._heartbeat = self._heartbeat, now
+            stall, self._stall = self._stall, None
+            if lag > self.threshold:
+                # A stall taken during another beat is not this one.
+                if stall is not None and stall.heartbeat == heartbeat:
+                    self._log_stall(lag, stall)
+                else:
+                    self._log_stall(lag, None)
+
+    def _log_stall(self, lag: float, stall: Stall | None) -> None:
+        handler = stall.handler if stall is not None else ""
+        EVENT_LOOP_STALLS_TOTAL.labels(handler=handler).inc()
+        if stall is None:
+            self.log.warning("The event loop was blocked for %.3fs", lag)
+        elif not stall.handler:
+            self.log.warning("The event loop was blocked for %.3fs, running:\n%s", lag, stall.stack)
+        else:
+            self.log.warning(
+                "The event loop was blocked for %.3fs by %s handling %s, running:\n%s",
+                lag,
+                stall.handler,
+                stall.path,
+                stall.stack,
+            )
+
+    def _watch(self, loop_thread_id: int) -> None:
+        while not self._stopped.wait(self.interval):
+            heartbeat = self._heartbeat
+            blocked = time.monotonic() - heartbeat - self.interval
+            stall = self._stall
+            # The stack is taken again until it blames a handler, a stale one is replaced.
+            if blocked <= self.threshold or (
+                stall is not None and stall.heartbeat == heartbeat and stall.handler
+            ):
+                continue
+            frame = sys._current_frames().get(loop_thread_id)
+            if frame is None:
+                continue
+            handler = _find_handler(frame)
+            self._stall = Stall(
+                heartbeat=heartbeat,
+                handler=type(handler).__name__ if handler is not None else "",
+                path=handler.request.path if handler is not None else "",
+                stack="".join(traceback.format_list(traceback.extract_stack(frame))),
+            )
+            del frame
@@ -0,0 +1,91 @@
+"""The last saved notebooks, for the differential saves of the notebook page."""
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+from __future__ import annotations
+
+import json
+import typing as t
+import uuid
+from collections import OrderedDict
+
+from tornado import web
+
+#: The total size in bytes of the notebooks kept in memory.
+MAX_REVISIONS_SIZE = 64 * 1024 * 1024
+
+
+class Revision(t.NamedTuple):
+    """A notebook as it was saved."""
+
+    id: str
+    nb: dict[str, t.Any]
+    last_modified: t.Any
+    size: int
+
+
+class NotebookRevisions:
+    """The last revision of the notebooks saved from the notebook page.
+
+    A notebook saved whole gets a new revision, kept in memory with its
+    content. The next saves only send the cells changed since that revision,
+    see ``apply_patch``. The least recently saved notebooks are dropped past
+    ``max_size`` bytes, and are saved whole again.
+    """
+
+    def __init__(self, max_size: int = MAX_REVISIONS_SIZE) -> None:
+        self.max_size = max_size
+        self._revisions: OrderedDict[str, Revision] = OrderedDict()
+        self._size = 0
+
+    def add(self, path: str, nb: dict[str, t.Any], last_modified: t.Any, size: int) -> str:
+        """Keep a notebook as saved, and return its new revision."""
+        self.discard(path)
+        revision = Revision(uuid.uuid4().hex, nb, last_modified, size)
+        self._revisions[path] = revision
+        self._size += size
+        while self._size > self.max_size and len(self._revisions) > 1:
+            _, dropped = self._revisions.popitem(last=False)
+            self._size -= dropped.size
+        return revision.id
+
+    def get(self, path: str, revision_id: str | None) -> Revision | None:
+        """Get a revision of a notebook, if it is the last one kept."""
+        revision = self._revisions.get(path)
+        if revision is None or revision.id != revision_id:
+            return None
+        self._revisions.move_to_end(path)
+        return revision
+
+    def discard(self, path: str) -> None:
+        """Forget the revision of a notebook."""
+        revision = self._revisions.pop(path, None)
+        if revision is not None:
+            self._size -= revision.size
+
+
+def notebook_size(nb: dict[str, t.Any]) -> int:
+    """The size in bytes of a notebook serialized as JSON."""
+    # The JSON is escaped to ASCII, so its length is its size in bytes.
+    return len(json.dumps(nb))
+
+
+def apply_patch(base: dict[str, t.Any], patch: dict[str, t.Any]) -> dict[str, t.Any]:
+    """Build the notebook of a differential save, from the notebook it is based on.
+
+    The cells of ``patch`` are whole cells, or ``{"id": ...}`` for the cells
+    unchanged since ``base``. Its metadata and format replace those of
+    ``base``, if any. Raises a 409 error if a cell is not in ``base``.
+    """
+    base_cells = {cell.get("id"): cell for cell in base.get("cells", [])}
+    cells = []
+    for cell in patch["cells"]:
+        if cell.keys() == {"id"}:
+            if cell["id"] not in base_cells:
+                raise web.HTTPError(409, f"The cell {cell['id']} is not in the base revision")
+            cells.append(base_cells[cell["id"]])
+        else:
+            cells.append(cell)
+    nb = {key: patch.get(key, base.get(key)) for key in ("metadata", "nbformat", "nbformat_minor")}
+    nb["cells"] = cells
+    return nb
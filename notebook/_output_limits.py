@@ -0,0 +1,171 @@
+"""The limits of the size of the outputs, for ``max_cell_output_size``."""
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+import typing as t
+from collections import OrderedDict
+from pathlib import Path
+
+from nbformat import from_dict
+
+#: The mime type of the stub replacing the outputs of a cell past its limit.
+TRUNCATED_OUTPUT_MIMETYPE = "application/vnd.jupyter.notebook.truncated-output+json"
+
+_KEY_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+
+def _serialize(value: t.Any) -> bytes:
+    return json.dumps(value, sort_keys=True).encode()
+
+
+def _stream_head(text: str | list[str], size: int) -> str:
+    """The first whole lines of a stream text fitting in ``size`` bytes."""
+    if isinstance(text, list):
+        text = "".join(text)
+    head = text.encode()[: max(size, 0)].decode(errors="ignore")
+    end = head.rfind("\n")
+    return head[: end + 1] if end >= 0 else head
+
+
+def _stub(key: str, hidden: int, count: int) -> dict[str, t.Any]:
+    """A display output fetching the outputs spilled under ``key`` on demand."""
+    return from_dict(  # type:ignore[no-untyped-call,no-any-return]
+        {
+            "output_type": "display_data",
+            "data": {
+                TRUNCATED_OUTPUT_MIMETYPE: {"key": key, "size": hidden, "outputs": count},
+                "text/plain": f"Output truncated, {hidden} bytes are not shown.",
+            },
+            "metadata": {},
+        }
+    )
+
+
+class OutputStore:
+    """The outputs of the truncated cells not shown, as files keyed by their hash.
+
+    The same outputs saved several times are written once. If ``max_size`` is
+    not 0, the least recently written outputs are deleted past ``max_size``
+    bytes, and cannot be shown anymore from the notebooks truncated.
+    """
+
+    def __init__(self, directory: str | Path, max_size: int = 0) -> None:
+        self.directory = Path(directory)
+        self.max_size = max_size
+        # The outputs are spilled from the io thread pool and from save hooks.
+        self._lock = threading.Lock()
+        # The sizes of the outputs by least recently written, once pruned.
+        self._sizes: OrderedDict[Path, int] | None = None
+        self._size = 0
+
+    def put(self, outputs: list[dict[str, t.Any]]) -> str:
+        """Keep the outputs of a cell, and return their key."""
+        serialized = _serialize(outputs)
+        key = hashlib.sha256(serialized).hexdigest()
+        path = self.directory / f"{key}.json"
+        with self._lock:
+            if path.is_file():
+                # Only the recency of the outputs kept is written, for pruning.
+                if self.max_size > 0:
+                    os.utime(path)
+                    if self._sizes is not None and path in self._sizes:
+                        self._sizes.move_to_end(path)
+                return key
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(serialized)
+            tmp_path.replace(path)
+            if self.max_size > 0:
+                self._prune(path, len(serialized))
+        return key
+
+    def get(self, key: str) -> list[dict[str, t.Any]] | None:
+        """Get the outputs kept under a key, if any."""
+        if not _KEY_PATTERN.fullmatch(key):
+            return None
+        try:
+            data = (self.directory / f"{key}.json").read_bytes()
+        except FileNotFoundError:
+            return None
+        return t.cast(list[dict[str, t.Any]], json.loads(data))
+
+    def _prune(self, added: Path, size: int) -> None:
+        if self._sizes is None:
+            # The outputs already kept are listed once, then tracked as written.
+            entries = []
+            for path in self.directory.glob("*.json"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, path, stat.st_size))
+            self._sizes = OrderedDict((path, size) for _, path, size in sorted(entries))
+            self._size = sum(self._sizes.values())
+        else:
+            self._sizes[added] = size
+            self._size += size
+        self._sizes.move_to_end(added)
+        while self._size > self.max_size and len(self._sizes) > 1:
+            path, size = self._sizes.popitem(last=False)
+            path.unlink(missing_ok=True)
+            self._size -= size
+
+
+def truncate_outputs(
+    nb: dict[str, t.Any], store: OutputStore, cell_limit: int = 0, notebook_limit: int = 0
+) -> int:
+    """Truncate the outputs of the cells of a notebook past the limits, in place.
+
+    The sizes are those of the outputs as JSON, in bytes, and a limit of 0 is
+    no limit. The outputs of a cell past its limit are replaced by the outputs
+    fitting in the limit, with the head of the stream cut in the middle,
+    followed by a stub of the rest, which is spilled to ``store``. Returns the
+    number of cells truncated.
+    """
+    remaining = notebook_limit if notebook_limit > 0 else None
+    count = 0
+    for cell in nb.get("cells", []):
+        outputs = cell.get("outputs")
+        if not outputs:
+            continue
+        sizes = [len(_serialize(output)) for output in outputs]
+        total = sum(sizes)
+        budget = remaining
+        if cell_limit > 0:
+            budget = cell_limit if budget is None else min(budget, cell_limit)
+        if budget is None or total <= budget:
+            if remaining is not None:
+                remaining = max(remaining - total, 0)
+            continue
+        kept: list[dict[str, t.Any]] = []
+        rest: list[dict[str, t.Any]] = []
+        used = 0
+        for index, (output, size) in enumerate(zip(outputs, sizes, strict=True)):
+            if used + size <= budget:
+                kept.append(output)
+                used += size
+                continue
+            rest = outputs[index:]
+            if output.get("output_type") == "stream":
+                text = output.get("text", "")
+                if isinstance(text, list):
+                    text = "".join(text)
+                head = _stream_head(text, budget - used)
+                if head:
+                    kept.append(from_dict({**output, "text": head}))  # type:ignore[no-untyped-call]
+                    used += len(_serialize(kept[-1]))
+                    rest[0] = from_dict({**output, "text": text[len(head) :]})  # type:ignore[no-untyped-call]
+            break
+        key = store.put(rest)
+        cell["outputs"] = [*kept, _stub(key, total - used, len(rest))]
+        count += 1
+        if remaining is not None:
+            remaining = max(remaining - used, 0)
+    return count
@@ -0,0 +1,112 @@
+"""Timings of the notebook app startup phases, for ``--profile-startup``."""
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+from __future__ import annotations
+
+import json
+import os
+import time
+import typing as t
+from contextlib import contextmanager
+from pathlib import Path
+
+
+class StartupProfile:
+    """Record the start and end of each startup phase.
+
+    Phases are kept as complete events of the Chrome trace format, so the
+    report can be loaded as a flame graph in https://www.speedscope.app,
+    https://ui.perfetto.dev or ``chrome://tracing``.
+    """
+
+    def __init__(self) -> None:
+        # Created when the notebook package is first imported.
+        self.origin = time.perf_counter()
+        self.events: list[tuple[str, float, float]] = []
+        # Until the server knows whether the profile was asked for.
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Stop recording phases, and drop those recorded so far."""
+        self.enabled = False
+        self.events.clear()
+
+    def record(self, name: str, start: float, end: float | None = None) -> None:
+        """Record a phase that ran from ``start`` to ``end`` (now by default)."""
+        if not self.enabled:
+            return
+        if end is None:
+            end = time.perf_counter()
+        self.events.append((name, start, end))
+
+    @contextmanager
+    def phase(self, name: str) -> t.Iterator[None]:
+        """Record the time spent in the body of the ``with`` statement."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start)
+
+    @contextmanager
+    def instrument(
+        self, owner: type, attr: str, name: str | t.Callable[..., str]
+    ) -> t.Iterator[None]:
+        """Record every call to the method ``owner.attr`` as a phase.
+
+        ``name`` can be a callable receiving the call arguments, to tell
+        apart e.g. the extensions being loaded. The method is restored on exit.
+        """
+        original = getattr(owner, attr)
+        shadowed = attr in owner.__dict__
+
+        def wrapper(*args: t.Any, **kwargs: t.Any) -> t.Any:
+            phase_name = name(*args, **kwargs) if callable(name) else name
+            with self.phase(phase_name):
+                return original(*args, **kwargs)
+
+        setattr(owner, attr, wrapper)
+        try:
+            yield
+        finally:
+            if shadowed:
+                setattr(owner, attr, original)
+            else:
+                delattr(owner, attr)
+
+    def report(self) -> dict[str, t.Any]:
+        """Get the recorded phases, as a Chrome trace with a summary."""
+        pid = os.getpid()
+        events = sorted(self.events, key=lambda event: (event[1], -event[2]))
+        return {
+            "traceEvents": [
+                {
+                    "name": name,
+                    "cat": "startup",
+                    "ph": "X",
+                    "ts": round((start - self.origin) * 1e6),
+                    "dur": round((end - start) * 1e6),
+                    "pid": pid,
+                    "tid": 0,
+                }
+                for name, start, end in events
+            ],
+            "displayTimeUnit": "ms",
+            "phases": [
+                {
+                    "name": name,
+                    "start": round(start - self.origin, 6),
+                    "duration": round(end - start, 6),
+                }
+                for name, start, end in events
+            ],
+        }
+
+    def write(self, path: str) -> None:
+        """Write the report as JSON."""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Path(path).write_text(json.dumps(self.report(), indent=2), encoding="utf-8")
+
+
+startup_profile = StartupProfile()
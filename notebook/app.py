@@ -2,27 +2,45 @@
 
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import copy
+import email.utils
+import functools
+import hashlib
+import inspect
+import itertools
+import json
+import mimetypes
 import os
 import re
+import threading
+import time
 import typing as t
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from pathlib import Path
+from stat import S_ISDIR, S_ISLNK, S_ISREG
 
+import nbformat
+from jinja2 import Environment, Template, TemplateNotFound, meta
+from jupyter_client.jsonutil import json_default
 from jupyter_client.utils import ensure_async  # type:ignore[attr-defined]
 from jupyter_core.application import base_aliases
-from jupyter_core.paths import jupyter_config_dir
-from jupyter_server.base.handlers import JupyterHandler
+from jupyter_core.paths import is_file_hidden, jupyter_config_dir, jupyter_config_path
+from jupyter_events import EventLogger
+from jupyter_server.auth.decorator import authorized
+from jupyter_server.base.handlers import APIHandler, FileFindHandler, JupyterHandler
 from jupyter_server.extension.handler import (
     ExtensionHandlerJinjaMixin,
     ExtensionHandlerMixin,
 )
-from jupyter_server.serverapp import flags
+from jupyter_server.extension.manager import ExtensionManager
+from jupyter_server.serverapp import ServerApp, flags
+from jupyter_server.services.contents.fileio import FileManagerMixin
 from jupyter_server.utils import url_escape, url_is_absolute
 from jupyter_server.utils import url_path_join as ujoin
-from jupyterlab.commands import (  # type:ignore[import-untyped]
-    get_app_dir,
-    get_user_settings_dir,
-    get_workspaces_dir,
-)
 from jupyterlab_server import LabServerApp
 from jupyterlab_server.config import (  # type:ignore[attr-defined]
     LabConfig,
@@ -30,35 +48,154 @@ from jupyterlab_server.config import (  # type:ignore[attr-defined]
     recursive_update,
 )
 from jupyterlab_server.handlers import _camelCase, is_url
+from jupyterlab_server.settings_utils import SchemaHandler, get_settings
+from jupyterlab_server.translation_utils import translator
 from notebook_shim.shim import NotebookConfigShimMixin  # type:ignore[import-untyped]
 from tornado import web
-from traitlets import Bool, Unicode, default
+from traitlets import Bool, Float, Int, List, Unicode, default, observe
 from traitlets.config.loader import Config
 
+from ._kernel_events import KernelEvents
+from ._kernel_pool import KernelPool
+from ._lazy_outputs import MAX_LAZY_OUTPUTS_SIZE, LazyOutputs
+from ._loop_watchdog import LoopWatchdog
+from ._notebook_revisions import (
+    MAX_REVISIONS_SIZE,
+    NotebookRevisions,
+    apply_patch,
+    notebook_size,
+)
+from ._output_limits import OutputStore, truncate_outputs
+from ._startup_profile import startup_profile
 from ._version import __version__
+from .metrics import (
+    CONTENTS_MANAGER_DURATION_SECONDS,
+    PAGE_CONFIG_DURATION_SECONDS,
+    PAGE_RENDER_DURATION_SECONDS,
+    RESPONSE_SIZE_BYTES,
+    observe_duration,
+)
+
+startup_profile.record("import notebook.app", startup_profile.origin)
 
 HERE = Path(__file__).parent.resolve()
 
+T = t.TypeVar("T")
+
 Flags = dict[str | tuple[str, ...], tuple[dict[str, t.Any] | Config, str]]
 
-app_dir = Path(get_app_dir())
+# The LabConfig traits that are mirrored into the page config.
+LAB_CONFIG_TRAITS = LabConfig.class_trait_names()
+
+
+# File extensions the tree page redirects to the notebook page without loading the model.
+NOTEBOOK_EXTENSIONS = frozenset({".ipynb"})
+
+# Bound on the number of paths whose metadata is cached for the tree page.
+MAX_PATH_INFO_CACHE_SIZE = 1024
+
+# Template variables that change on every request, pages using them are never cached.
+UNCACHEABLE_TEMPLATE_VARIABLES = frozenset({"xsrf_token", "xsrf_form_html"})
+
+# The events emitted when a checkpoint is created, restored or deleted.
+CHECKPOINTS_EVENT_SCHEMA_ID = "https://events.jupyter.org/jupyter_notebook/checkpoints/v1"
+
+# The contents manager methods emitting a checkpoints event, with their action.
+CHECKPOINT_ACTIONS = {
+    "create_checkpoint": "create",
+    "restore_checkpoint": "restore",
+    "delete_checkpoint": "delete",
+}
+
+# The server methods timed by --profile-startup, with the name of their phase.
+STARTUP_PHASES: list[tuple[type, str, str | t.Callable[..., str]]] = [
+    (ServerApp, "load_config_file", "load config"),
+    (ServerApp, "init_server_extensions", "find and link extensions"),
+    (ExtensionManager, "link_extension", lambda _, name: f"link extension {name}"),
+    (ServerApp, "init_webapp", "initialize webapp"),
+    (ExtensionManager, "load_extension", lambda _, name: f"load extension {name}"),
+]
+
+# Precompressed siblings of the static files, in order of preference.
+PRECOMPRESSED_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+# The number of entries of a directory listing page, unless a limit is requested.
+LISTING_PAGE_SIZE = 500
+
+# Bound on the number of directories whose sorted entries are cached.
+MAX_DIRECTORY_LISTINGS = 16
+
+# Bound on the number of models of a listing page got at the same time.
+MAX_LISTING_MODEL_TASKS = 16
+
+
+class StaticPageConfig(t.NamedTuple):
+    """The parts of the page config that do not depend on the request."""
+
+    jupyter_config_dir: str
+    traits: dict[str, t.Any]
+    labextensions: dict[str, t.Any]
+    serial: int
+
+
 version = __version__
 
+
+@functools.cache
+def get_app_dir() -> Path:
+    """Get the JupyterLab app directory.
+
+    Importing ``jupyterlab.commands`` is slow, so it is deferred until the
+    directory is actually needed rather than done when importing this module.
+    """
+    from jupyterlab.commands import get_app_dir as get_lab_app_dir  # type:ignore[import-untyped]
+
+    return Path(get_lab_app_dir())
+
+
+def __getattr__(name: str) -> t.Any:
+    # Keep the module level ``app_dir`` working without computing it on import.
+    if name == "app_dir":
+        return get_app_dir()
+    msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(msg)
+
+
 # mypy: disable-error-code="no-untyped-call"
 
 
 class NotebookBaseHandler(ExtensionHandlerJinjaMixin, ExtensionHandlerMixin, JupyterHandler):
     """The base notebook API handler."""
 
+    # The static page config and page config data the page config was built
+    # from, or None if it has to be compared whole to cache the page.
+    _page_config_source: tuple[StaticPageConfig, dict[str, t.Any]] | None = None
+
     @property
     def custom_css(self) -> t.Any:
         return self.settings.get("custom_css", True)
 
     def get_page_config(self) -> dict[str, t.Any]:
         """Get the page config."""
-        config = LabConfig()
         app: JupyterNotebookApp = self.extensionapp  # type:ignore[assignment]
         base_url = self.settings.get("base_url", "/")
+        with observe_duration(PAGE_CONFIG_DURATION_SECONDS, handler=type(self).__name__):
+            static_page_config = app.get_static_page_config(base_url, logger=self.log)
+            return self._build_page_config(static_page_config)
+
+    async def get_page_config_async(self) -> dict[str, t.Any]:
+        """Get the page config, doing the file system work off the event loop."""
+        app: JupyterNotebookApp = self.extensionapp  # type:ignore[assignment]
+        base_url = self.settings.get("base_url", "/")
+        with observe_duration(PAGE_CONFIG_DURATION_SECONDS, handler=type(self).__name__):
+            static_page_config = await app.run_in_executor(
+                app.get_static_page_config, base_url, self.log
+            )
+            return self._build_page_config(static_page_config)
+
+    def _build_page_config(self, static_page_config: StaticPageConfig) -> dict[str, t.Any]:
+        """Overlay the request specific fields on the static page config."""
+        app: JupyterNotebookApp = self.extensionapp  # type:ignore[assignment]
         page_config_data = self.settings.setdefault("page_config_data", {})
         page_config = {
             **page_config_data,
@@ -96,39 +233,154 @@ class NotebookBaseHandler(ExtensionHandlerJinjaMixin, ExtensionHandlerMixin, Jup
 
         page_config.setdefault("mathjaxConfig", mathjax_config)
         page_config.setdefault("fullMathjaxUrl", mathjax_url)
-        page_config.setdefault("jupyterConfigDir", jupyter_config_dir())
+        page_config.setdefault("jupyterConfigDir", static_page_config.jupyter_config_dir)
 
-        # Put all our config in page_config
-        for name in config.trait_names():
-            page_config[_camelCase(name)] = getattr(app, name)
-
-        # Add full versions of all the urls
-        for name in config.trait_names():
-            if not name.endswith("_url"):
-                continue
-            full_name = _camelCase("full_" + name)
-            full_url = getattr(app, name)
-            if not is_url(full_url):
-                # Relative URL will be prefixed with base_url
-                full_url = ujoin(base_url, full_url)
-            page_config[full_name] = full_url
-
-        labextensions_path = app.extra_labextensions_path + app.labextensions_path
-        recursive_update(
-            page_config,
-            get_page_config(
-                labextensions_path,
-                logger=self.log,
-            ),
-        )
+        # The app traits and the labextensions metadata only change when the
+        # app is reconfigured or an extension is installed, so they are cached
+        # on the app. Copy them so per-request updates do not leak into the cache.
+        page_config.update(copy.deepcopy(static_page_config.traits))
+        recursive_update(page_config, copy.deepcopy(static_page_config.labextensions))
 
         # modify page config with custom hook
         page_config_hook = self.settings.get("page_config_hook", None)
         if page_config_hook:
             page_config = page_config_hook(self, page_config)
+        elif app.cache_page_config:
+            self._page_config_source = (static_page_config, page_config_data)
 
         return page_config
 
+    def render_page(self, name: str, page_config: dict[str, t.Any]) -> None:
+        """Render a page template and write it with a strong ETag.
+
+        The rendered page is cached on the app, keyed on the values of the
+        template variables it uses, so reloading a page only renders it again
+        when one of them changed.
+        """
+        with observe_duration(PAGE_RENDER_DURATION_SECONDS, handler=type(self).__name__):
+            etag, html = self._render_page(name, page_config)
+        if etag is None:
+            self.write(html)
+            return
+
+        self.set_header("Etag", etag)
+        if self.check_etag_header():
+            self.set_status(304)
+            return
+        self.write(html)
+
+    def _render_page(self, name: str, page_config: dict[str, t.Any]) -> tuple[str | None, str]:
+        """Get the ETag and html of a page, the ETag is None if it cannot be cached."""
+        app: JupyterNotebookApp = self.extensionapp  # type:ignore[assignment]
+        ns = {"page_config": page_config, **self.template_namespace}
+        template = self.get_template(name)
+        variables = app.get_template_variables(template)
+        if variables is None or app.page_cache_size <= 0:
+            return None, template.render(**ns)
+
+        values = {
+            key: ns.get(key)
+            for key in sorted(variables)
+            if key != "page_config" and not callable(ns.get(key))
+        }
+        if "page_config" in variables:
+            values["page_config"] = self._page_config_key(page_config)
+        fingerprint = hashlib.sha256(
+            json.dumps(values, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+        key = (name, fingerprint)
+        cached = app._rendered_pages.get(key)
+        if cached is not None and cached[0] is template:
+            app._rendered_pages.move_to_end(key)
+            return cached[1], cached[2]
+
+        html = template.render(**ns)
+        etag = f'"{hashlib.sha256(html.encode("utf-8")).hexdigest()}"'
+        app._rendered_pages[key] = (template, etag, html)
+        while len(app._rendered_pages) > app.page_cache_size:
+            app._rendered_pages.popitem(last=False)
+        return etag, html
+
+    def _page_config_key(self, page_config: dict[str, t.Any]) -> t.Any:
+        """Get what the rendered pages are cached by for a page config.
+
+        The static parts of the page config are the bulk of it, and are known
+        by the serial of the static page config they were copied from, so
+        only the other fields are compared.
+        """
+        if self._page_config_source is None:
+            return page_config
+        static_page_config, page_config_data = self._page_config_source
+        static_keys = static_page_config.traits.keys() | static_page_config.labextensions.keys()
+        return {
+            "serial": static_page_config.serial,
+            "data": page_config_data,
+            "fields": {key: value for key, value in page_config.items() if key not in static_keys},
+        }
+
+    async def call_contents_manager(self, method: str, *args: t.Any, **kwargs: t.Any) -> t.Any:
+        """Call a contents manager method, recording how long it took."""
+        func = getattr(self.contents_manager, method)
+        with observe_duration(
+            CONTENTS_MANAGER_DURATION_SECONDS, handler=type(self).__name__, method=method
+        ):
+            return await ensure_async(func(*args, **kwargs))
+
+    def on_finish(self) -> None:
+        """Record the size of the response."""
+        super().on_finish()
+        size = self._headers.get("Content-Length")
+        if size is not None:
+            RESPONSE_SIZE_BYTES.labels(handler=type(self).__name__).observe(int(size))
+
+    async def get_path_info(self, path: str) -> PathInfo | None:
+        """Get the type of a path and whether it is hidden, or None if it does not exist.
+
+        Contents managers can answer this in a single call by implementing
+        ``get_path_info(path)``, returning a dict with ``type`` and ``hidden``
+        keys or None. Otherwise existing files with a notebook extension are
+        classified as notebooks without loading their model (unless
+        ``sniff_notebook_type`` is set), and other paths are fetched without
+        content, checking notebooks and directories with ``is_hidden``. Results are cached
+        on the app for ``path_info_ttl`` seconds.
+        """
+        app: JupyterNotebookApp = self.extensionapp  # type:ignore[assignment]
+        info = app.get_cached_path_info(path)
+        if info is not None:
+            return info
+
+        cm = self.contents_manager
+        if hasattr(cm, "get_path_info"):
+            resolved = await self.call_contents_manager("get_path_info", path)
+            if resolved is None:
+                return None
+            info = PathInfo(type=resolved["type"], hidden=bool(resolved.get("hidden", False)))
+        elif (
+            not app.sniff_notebook_type
+            and Path(path).suffix in NOTEBOOK_EXTENSIONS
+            and await self.call_contents_manager("file_exists", path)
+        ):
+            # Trust the extension rather than loading the notebook model,
+            # which can mean validation and checkpoint lookups.
+            hidden = False
+            if not cm.allow_hidden:
+                hidden = await self.call_contents_manager("is_hidden", path)
+            info = PathInfo(type="notebook", hidden=hidden)
+        else:
+            try:
+                model = await self.call_contents_manager("get", path, content=False)
+            except web.HTTPError as e:
+                if e.status_code == 404:
+                    return None
+                raise
+            hidden = False
+            if model["type"] == "directory" and not cm.allow_hidden:
+                hidden = await self.call_contents_manager("is_hidden", path)
+            info = PathInfo(type=model["type"], hidden=hidden)
+
+        app.cache_path_info(path, info)
+        return info
+
 
 class TreeHandler(NotebookBaseHandler):
     """A tree page handler."""
@@ -144,60 +396,60 @@ class TreeHandler(NotebookBaseHandler):
         """
         path = path.strip("/")
         cm = self.contents_manager
+        info = await self.get_path_info(path)
+        if info is None:
+            raise web.HTTPError(404)
 
-        if await ensure_async(cm.dir_exists(path=path)):
-            if await ensure_async(cm.is_hidden(path)) and not cm.allow_hidden:
-                self.log.info("Refusing to serve hidden directory, via 404 Error")
-                raise web.HTTPError(404)
+        if info.hidden and not cm.allow_hidden:
+            self.log.info("Refusing to serve hidden %s, via 404 Error", info.type)
+            raise web.HTTPError(404)
 
+        if info.type == "directory":
             # Set treePath for routing to the directory
-            page_config = self.get_page_config()
+            page_config = await self.get_page_config_async()
             page_config["treePath"] = path
 
-            tpl = self.render_template("tree.html", page_config=page_config)
-            return self.write(tpl)
-        if await ensure_async(cm.file_exists(path)):
-            # it's not a directory, we have redirecting to do
-            model = await ensure_async(cm.get(path, content=False))
-            if model["type"] == "notebook":
-                url = ujoin(self.base_url, "notebooks", url_escape(path))
-            else:
-                # Return raw content if file is not a notebook
-                url = ujoin(self.base_url, "files", url_escape(path))
-            self.log.debug("Redirecting %s to %s", self.request.path, url)
-            self.redirect(url)
-            return None
-        raise web.HTTPError(404)
+            return self.render_page("tree.html", page_config)
+
+        # it's not a directory, we have redirecting to do
+        if info.type == "notebook":
+            url = ujoin(self.base_url, "notebooks", url_escape(path))
+        else:
+            # Return raw content if file is not a notebook
+            url = ujoin(self.base_url, "files", url_escape(path))
+        self.log.debug("Redirecting %s to %s", self.request.path, url)
+        self.redirect(url)
+        return None
 
 
 class ConsoleHandler(NotebookBaseHandler):
     """A console page handler."""
 
     @web.authenticated
-    def get(self, path: str | None = None) -> t.Any:  # noqa: ARG002
+    async def get(self, path: str | None = None) -> t.Any:  # noqa: ARG002
         """Get the console page."""
-        tpl = self.render_template("consoles.html", page_config=self.get_page_config())
-        return self.write(tpl)
+        page_config = await self.get_page_config_async()
+        return self.render_page("consoles.html", page_config)
 
 
 class TerminalHandler(NotebookBaseHandler):
     """A terminal page handler."""
 
     @web.authenticated
-    def get(self, path: str | None = None) -> t.Any:  # noqa: ARG002
+    async def get(self, path: str | None = None) -> t.Any:  # noqa: ARG002
         """Get the terminal page."""
-        tpl = self.render_template("terminals.html", page_config=self.get_page_config())
-        return self.write(tpl)
+        page_config = await self.get_page_config_async()
+        return self.render_page("terminals.html", page_config)
 
 
 class FileHandler(NotebookBaseHandler):
     """A file page handler."""
 
     @web.authenticated
-    def get(self, path: str | None = None) -> t.Any:  # noqa: ARG002
+    async def get(self, path: str | None = None) -> t.Any:  # noqa: ARG002
         """Get the file page."""
-        tpl = self.render_template("edit.html", page_config=self.get_page_config())
-        return self.write(tpl)
+        page_config = await self.get_page_config_async()
+        return self.render_page("edit.html", page_config)
 
 
 class NotebookHandler(NotebookBaseHandler):
@@ -207,36 +459,544 @@ class NotebookHandler(NotebookBaseHandler):
     async def get(self, path: str = "") -> t.Any:
         """Get the notebook page. Redirect if it's a directory."""
         path = path.strip("/")
-        cm = self.contents_manager
 
-        if await ensure_async(cm.dir_exists(path=path)):
+        if await self.call_contents_manager("dir_exists", path=path):
             url = ujoin(self.base_url, "tree", url_escape(path))
             self.log.debug("Redirecting %s to %s since path is a directory", self.request.path, url)
             self.redirect(url)
             return None
-        tpl = self.render_template("notebooks.html", page_config=self.get_page_config())
-        return self.write(tpl)
+        page_config = await self.get_page_config_async()
+        return self.render_page("notebooks.html", page_config)
 
 
 class CustomCssHandler(NotebookBaseHandler):
     """A custom CSS handler."""
 
+    def initialize(self, name: str, custom_css_files: list[str], **kwargs: t.Any) -> None:
+        """Initialize the handler with the candidate custom.css files, in priority order."""
+        super().initialize(name, **kwargs)
+        self.custom_css_files = custom_css_files
+
     @web.authenticated
-    def get(self) -> t.Any:
+    async def get(self) -> t.Any:
         """Get the custom css file."""
+        app: JupyterNotebookApp = self.extensionapp  # type:ignore[assignment]
+        custom_css = await app.run_in_executor(app.load_custom_css, self.custom_css_files)
+        if custom_css is None:
+            raise web.HTTPError(404)
 
         self.set_header("Content-Type", "text/css")
-        page_config = self.get_page_config()
-        custom_css_file = f"{page_config['jupyterConfigDir']}/custom/custom.css"
+        self.set_header("Cache-Control", "no-cache")
+        self.set_header("Etag", custom_css.etag)
+        self.set_header("Last-Modified", custom_css.last_modified)
+        if self.check_etag_header() or (
+            "If-None-Match" not in self.request.headers and self._not_modified_since(custom_css)
+        ):
+            self.set_status(304)
+            return None
+        return self.write(custom_css.content)
+
+    def _not_modified_since(self, custom_css: CustomCss) -> bool:
+        """Whether the If-Modified-Since header matches the file."""
+        since = self.request.headers.get("If-Modified-Since")
+        if not since:
+            return False
+        try:
+            since_date = email.utils.parsedate_to_datetime(since)
+        except (TypeError, ValueError):
+            return False
+        if since_date.tzinfo is None:
+            # "-0000" and zone-less dates are naive, HTTP dates are in UTC.
+            since_date = since_date.replace(tzinfo=timezone.utc)
+        return custom_css.last_modified.replace(microsecond=0) <= since_date
+
+
+class SettingsBundleHandler(ExtensionHandlerMixin, SchemaHandler):
+    """Get the settings of all the plugins in one response.
+
+    This saves the page from fetching the settings of every plugin one by one.
+    """
+
+    def initialize(  # type:ignore[override]
+        self,
+        name: str,
+        app_settings_dir: str,
+        schemas_dir: str,
+        settings_dir: str,
+        labextensions_path: list[str],
+        **kwargs: t.Any,  # noqa: ARG002
+    ) -> None:
+        """Initialize the handler."""
+        SchemaHandler.initialize(
+            self, app_settings_dir, schemas_dir, settings_dir, labextensions_path
+        )
+        ExtensionHandlerMixin.initialize(self, name)
+
+    @web.authenticated
+    async def get(self) -> None:
+        """Get the settings, or 304 if the client already has them."""
+        app: JupyterNotebookApp = self.extensionapp  # type:ignore[assignment]
+        bundle = await app.run_in_executor(app.get_settings_bundle, self.get_current_locale)
+        self.set_header("Content-Type", "application/json")
+        # disable browser caching, rely on 304 replies for savings
+        self.set_header("Cache-Control", "no-cache")
+        self.set_header("Etag", bundle.etag)
+        if self.check_etag_header():
+            self.set_status(304)
+            return
+        self.finish(bundle.content)
+
+
+class DirectoryListingHandler(ExtensionHandlerMixin, APIHandler):
+    """Get the listing of a directory one page at a time.
 
-        if not Path(custom_css_file).is_file():
-            static_path_root = re.match("^(.*?)static", page_config["staticDir"])
-            if static_path_root is not None:
-                custom_dir = static_path_root.groups()[0]
-                custom_css_file = f"{custom_dir}custom/custom.css"
+    The entries are sorted with the directories first, then by name, and the
+    models are only built for the entries of the requested page. The response
+    is a directory model, as for the contents API, with the ``offset`` of the
+    page and the ``total`` number of entries.
+    """
 
-        with Path(custom_css_file).open() as css_f:
-            return self.write(css_f.read())
+    auth_resource = "contents"
+
+    @web.authenticated
+    @authorized
+    async def get(self, path: str = "") -> None:
+        """Get a page of the listing of a directory."""
+        path = path.strip("/")
+        offset = self._get_int_argument("offset", 0)
+        limit = self._get_int_argument("limit", LISTING_PAGE_SIZE)
+        cm = self.contents_manager
+        model = await ensure_async(cm.get(path, content=False))
+        if model["type"] != "directory":
+            raise web.HTTPError(400, f"{path!r} is not a directory")
+
+        if isinstance(cm, FileManagerMixin):
+            app: JupyterNotebookApp = self.extensionapp  # type:ignore[assignment]
+            names = await app.run_in_executor(app.list_directory, cm._get_os_path(path))
+            page = await self._get_models(
+                [f"{path}/{name}" if path else name for name in names[offset : offset + limit]]
+            )
+            total = len(names)
+        else:
+            content = (await ensure_async(cm.get(path, content=True)))["content"]
+            content.sort(
+                key=lambda entry: _listing_order(entry["type"] == "directory", entry["name"])
+            )
+            page = content[offset : offset + limit]
+            total = len(content)
+
+        model.update(content=page, format="json", offset=offset, total=total)
+        self.set_header("Content-Type", "application/json")
+        self.finish(json.dumps(model, default=json_default))
+
+    async def _get_models(self, paths: list[str]) -> list[dict[str, t.Any]]:
+        """Get the models of the entries of a page, without their content."""
+        cm = self.contents_manager
+        if not inspect.iscoroutinefunction(cm.get):
+            app: JupyterNotebookApp = self.extensionapp  # type:ignore[assignment]
+            return await app.run_in_executor(lambda: [cm.get(p, content=False) for p in paths])
+        semaphore = asyncio.Semaphore(MAX_LISTING_MODEL_TASKS)
+
+        async def get(path: str) -> dict[str, t.Any]:
+            async with semaphore:
+                return t.cast(dict[str, t.Any], await cm.get(path, content=False))
+
+        return list(await asyncio.gather(*(get(p) for p in paths)))
+
+    def _get_int_argument(self, name: str, default: int) -> int:
+        """Get a non-negative integer query argument."""
+        value = self.get_argument(name, None)
+        if value is None:
+            return default
+        try:
+            number = int(value)
+        except ValueError:
+            number = -1
+        if number < 0:
+            raise web.HTTPError(400, f"{name} must be a non-negative integer")
+        return number
+
+
+class NotebookContentsHandler(ExtensionHandlerMixin, APIHandler):
+    """Get and save the notebooks of the notebook page.
+
+    The notebooks are got with their heavy outputs replaced by stubs if they
+    are large, and the outputs of the stubs are fetched from
+    ``LazyOutputsHandler`` when they are shown. The notebooks are saved whole,
+    or as the cells changed since the last revision saved.
+    """
+
+    auth_resource = "contents"
+
+    @web.authenticated
+    @authorized
+    async def get(self, path: str = "") -> None:
+        """Get a notebook model."""
+        path = path.strip("/")
+        app: JupyterNotebookApp = self.extensionapp  # type:ignore[assignment]
+        cm = self.contents_manager
+        model = await ensure_async(cm.get(path, type="notebook", content=True))
+        if app.max_cell_output_size > 0 or app.max_notebook_output_size > 0:
+            await app.run_in_executor(app.truncate_outputs, model["content"])
+        size = model.get("size")
+        if size is not None and size > app.lazy_outputs_threshold > 0:
+            await app.run_in_executor(app.lazy_outputs.strip, path, model["content"])
+        self.set_header("Content-Type", "application/json")
+        self.finish(json.dumps(model, default=json_default))
+
+    @web.authenticated
+    @authorized
+    async def put(self, path: str = "") -> None:
+        """Save a whole notebook, and start a new revision of it."""
+        model = self.get_json_body()
+        if not model or model.get("type") != "notebook" or not model.get("content"):
+            raise web.HTTPError(400, "A notebook model is required")
+        await self._save(path.strip("/"), model["content"])
+
+    @web.authenticated
+    @authorized
+    async def patch(self, path: str = "") -> None:
+        """Save the cells of a notebook changed since a revision.
+
+        Replies with a 409 error if the revision is not the last one saved, or
+        if the notebook changed since, for the notebook to be saved whole.
+        """
+        path = path.strip("/")
+        patch = self.get_json_body()
+        if not patch or not isinstance(patch.get("cells"), list):
+            raise web.HTTPError(400, "A list of cells is required")
+        app: JupyterNotebookApp = self.extensionapp  # type:ignore[assignment]
+        revision = app.notebook_revisions.get(path, patch.get("revision"))
+        if revision is not None:
+            try:
+                current = await ensure_async(self.contents_manager.get(path, content=False))
+            except web.HTTPError:
+                current = {}
+            if current.get("last_modified") != revision.last_modified:
+                app.notebook_revisions.discard(path)
+                revision = None
+        if revision is None:
+            msg = f"The notebook {path!r} changed since revision {patch.get('revision')}"
+            raise web.HTTPError(409, msg)
+        await self._save(path, apply_patch(revision.nb, patch))
+
+    async def _save(self, path: str, nb: dict[str, t.Any]) -> None:
+        app: JupyterNotebookApp = self.extensionapp  # type:ignore[assignment]
+        await self._restore_lazy_outputs(path, nb)
+        if app.max_cell_output_size > 0 or app.max_notebook_output_size > 0:
+            # Spilling the outputs writes to the store, so not from the save hooks.
+            count = await app.run_in_executor(app.truncate_outputs, nb)
+            if count:
+                app.log.info("Truncated the outputs of %d cells of %s", count, path)
+        model = {"type": "notebook", "format": "json", "content": nb}
+        saved = await ensure_async(self.contents_manager.save(model, path))
+        # The lazy outputs are put back and the outputs are truncated in place,
+        # so the revision is the notebook as saved.
+        size = await app.run_in_executor(self._strip_revision, path, nb)
+        saved["revision"] = app.notebook_revisions.add(path, nb, saved.get("last_modified"), size)
+        self.set_header("Content-Type", "application/json")
+        self.finish(json.dumps(saved, default=json_default))
+
+    def _strip_revision(self, path: str, nb: dict[str, t.Any]) -> int:
+        """Replace the heavy outputs of a revision by stubs, as the notebook page
+        gets it, and return its size.
+
+        The outputs are kept once by ``lazy_outputs``, and put back by the
+        next save.
+        """
+        app: JupyterNotebookApp = self.extensionapp  # type:ignore[assignment]
+        size = notebook_size(nb)
+        if size > app.lazy_outputs_threshold > 0 and app.lazy_outputs.strip(path, nb):
+            size = notebook_size(nb)
+        return size
+
+    async def _restore_lazy_outputs(self, path: str, nb: dict[str, t.Any]) -> None:
+        """Put back the outputs of the stubs of a notebook, off the event loop.
+
+        This is done before the save hooks, which run on the event loop.
+        """
+        app: JupyterNotebookApp = self.extensionapp  # type:ignore[assignment]
+        cm = self.contents_manager
+        loop = asyncio.get_running_loop()
+
+        def load(stub_path: str) -> dict[str, t.Any] | None:
+            if isinstance(cm, FileManagerMixin):
+                return _read_notebook_file(cm, stub_path)
+            future = asyncio.run_coroutine_threadsafe(self._get_notebook(stub_path), loop)
+            return future.result()
+
+        await app.run_in_executor(app.lazy_outputs.restore, nb, load, path)
+
+    async def _get_notebook(self, path: str) -> dict[str, t.Any] | None:
+        try:
+            model = await ensure_async(self.contents_manager.get(path, type="notebook"))
+        except web.HTTPError:
+            return None
+        return t.cast(dict[str, t.Any], model["content"])
+
+
+class LazyOutputsHandler(ExtensionHandlerMixin, APIHandler):
+    """Get the outputs of the stubs of a notebook, by their ``key`` arguments."""
+
+    auth_resource = "contents"
+
+    @web.authenticated
+    @authorized
+    async def get(self, path: str = "") -> None:
+        """Get the mime bundle and metadata of outputs."""
+        path = path.strip("/")
+        app: JupyterNotebookApp = self.extensionapp  # type:ignore[assignment]
+        keys = self.get_arguments("key")
+        if any(app.lazy_outputs.get(key) is None for key in keys):
+            # Dropped from memory, or kept by another server process.
+            model = await ensure_async(self.contents_manager.get(path, type="notebook"))
+            await app.run_in_executor(app.lazy_outputs.strip, path, model["content"])
+        outputs = {}
+        for key in keys:
+            output = app.lazy_outputs.get(key)
+            if output is None:
+                raise web.HTTPError(404, f"No output {key} in {path!r}")
+            outputs[key] = output
+        self.set_header("Content-Type", "application/json")
+        self.finish(json.dumps({"outputs": outputs}, default=json_default))
+
+
+class TruncatedOutputsHandler(ExtensionHandlerMixin, APIHandler):
+    """Get the outputs of a truncated cell not shown, by their key."""
+
+    auth_resource = "contents"
+
+    @web.authenticated
+    @authorized
+    async def get(self, key: str) -> None:
+        """Get the outputs of a stub."""
+        app: JupyterNotebookApp = self.extensionapp  # type:ignore[assignment]
+        outputs = await app.run_in_executor(app.output_store.get, key)
+        if outputs is None:
+            raise web.HTTPError(404, f"No truncated outputs {key}")
+        self.set_header("Content-Type", "application/json")
+        self.finish(json.dumps({"outputs": outputs}, default=json_default))
+
+
+def _read_notebook_file(contents_manager: FileManagerMixin, path: str) -> dict[str, t.Any] | None:
+    """Read a notebook of a file contents manager, if it exists."""
+    os_path = contents_manager._get_os_path(path)
+    if not Path(os_path).is_file():
+        return None
+    return t.cast(dict[str, t.Any], nbformat.read(os_path, as_version=4))
+
+
+def _listing_order(is_dir: bool, name: str) -> tuple[bool, str, str]:
+    """The sort key of a directory entry, directories first and then by name."""
+    return (not is_dir, name.casefold(), name)
+
+
+def _accepted_encodings(accept_encoding: str) -> set[str]:
+    """Get the content codings accepted by an ``Accept-Encoding`` header."""
+    accepted = set()
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        quality = params.strip().lower()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+class PrecompressedFileFindHandler(FileFindHandler):
+    """Serve the static files, preferring their precompressed siblings.
+
+    The production build writes ``.br`` and ``.gz`` files next to the bundles,
+    which are sent as is with the matching ``Content-Encoding`` when the
+    browser accepts it, instead of being compressed on every request. They
+    keep the immutable caching LabServerApp sets up for the static files.
+    """
+
+    content_encoding: str | None = None
+    precompressed: bool = False
+
+    def validate_absolute_path(self, root: str, absolute_path: str) -> str | None:
+        """Serve a precompressed sibling of the file if the browser accepts it."""
+        validated = super().validate_absolute_path(root, absolute_path)
+        if validated is None:
+            return None
+        accepted = _accepted_encodings(self.request.headers.get("Accept-Encoding", ""))
+        for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+            if not Path(validated + suffix).is_file():
+                continue
+            self.precompressed = True
+            if encoding in accepted or "*" in accepted:
+                self.content_encoding = encoding
+                # Validated in turn, so the size and mtime are those of the sibling.
+                return super().validate_absolute_path(root, validated + suffix)
+        return validated
+
+    def get_content_type(self) -> str:
+        """Get the content type of the uncompressed file."""
+        if self.content_encoding is None:
+            return super().get_content_type()
+        assert self.absolute_path is not None  # noqa: S101
+        mime_type, _ = mimetypes.guess_type(Path(self.absolute_path).with_suffix(""))
+        return mime_type or "application/octet-stream"
+
+    def set_headers(self) -> None:
+        """Set the encoding headers."""
+        super().set_headers()
+        if self.content_encoding is not None:
+            self.set_header("Content-Encoding", self.content_encoding)
+        if self.precompressed:
+            self.set_header("Vary", "Accept-Encoding")
+
+
+class PathInfo(t.NamedTuple):
+    """The metadata needed to route a request for a path."""
+
+    type: str
+    hidden: bool
+
+
+class CustomCss(t.NamedTuple):
+    """A cached custom.css file."""
+
+    path: str
+    mtime_ns: int
+    size: int
+    content: bytes
+    etag: str
+    last_modified: datetime
+
+
+class SettingsBundle(t.NamedTuple):
+    """The serialized settings of all the plugins."""
+
+    key: tuple[t.Any, ...]
+    content: bytes
+    etag: str
+
+
+def _stamp_paths(paths: t.Iterable[Path]) -> tuple[tuple[str, int | None], ...]:
+    """Get the modification times of paths, None for the missing ones."""
+    stamps: list[tuple[str, int | None]] = []
+    for path in paths:
+        try:
+            stamps.append((str(path), path.stat().st_mtime_ns))
+        except OSError:
+            stamps.append((str(path), None))
+    return tuple(stamps)
+
+
+def _page_config_fingerprint(labextensions_path: list[str]) -> tuple[t.Any, ...]:
+    """Get a cheap fingerprint of the files the static page config is built from.
+
+    Installing, updating or removing a labextension touches its parent (or
+    ``@org``) directory, and editing the ``labconfig`` page config touches
+    ``page_config.json``, so a change in any of these mtimes means the page
+    config has to be rebuilt.
+    """
+    paths: list[Path] = []
+    for ext_dir in labextensions_path:
+        root = Path(ext_dir)
+        paths.append(root)
+        paths.extend(sorted(root.glob("@*")))
+    for config_dir in jupyter_config_path():
+        root = Path(config_dir, "labconfig")
+        paths.extend([root / "page_config.json", root / "page_config.d"])
+    return _stamp_paths(paths)
+
+
+def _settings_fingerprint(
+    app_settings_dir: str, schemas_dir: str, settings_dir: str, labextensions_path: list[str]
+) -> tuple[t.Any, ...]:
+    """Get a cheap fingerprint of the files the plugin settings are read from.
+
+    These are the schemas, the user settings and the overrides. The schemas
+    of the labextensions change when they are installed or updated, which is
+    tracked like for the page config.
+    """
+    paths = [
+        *sorted(Path(schemas_dir).glob("**/*.json")),
+        *sorted(Path(settings_dir).glob("**/*.jupyterlab-settings")),
+        *sorted(Path(app_settings_dir).glob("overrides.*")),
+        *sorted(Path(app_settings_dir).glob("overrides.d/*")),
+    ]
+    return (_stamp_paths(paths), _page_config_fingerprint(labextensions_path))
+
+
+def _find_template_variables(env: Environment, name: str) -> set[str] | None:
+    """Find the variables used by a template and all the templates it references."""
+    variables: set[str] = set()
+    pending, seen = [name], {name}
+    while pending:
+        current = pending.pop()
+        if env.loader is None:
+            return None
+        try:
+            source = env.loader.get_source(env, current)[0]
+        except TemplateNotFound:
+            return None
+        ast = env.parse(source)
+        variables |= meta.find_undeclared_variables(ast)
+        for ref in meta.find_referenced_templates(ast):
+            if ref is None:
+                # Dynamic includes cannot be analysed.
+                return None
+            if ref not in seen:
+                seen.add(ref)
+                pending.append(ref)
+    return variables
+
+
+def _profile_startup_requested(argv: list[str]) -> bool:
+    """Whether the command line asks for the startup profile."""
+    for arg in argv:
+        if arg == "--profile-startup":
+            return True
+        name, _, value = arg.partition("=")
+        if name.lstrip("-") == "JupyterNotebookApp.profile_startup":
+            return value.lower() in ("1", "true", "yes", "")
+    return False
+
+
+def _emit_checkpoint_event(
+    event_logger: EventLogger, action: str, method: t.Callable[..., t.Any]
+) -> t.Callable[..., t.Any]:
+    """Wrap a contents manager method to emit a checkpoints event once it succeeded."""
+    signature = inspect.signature(method)
+
+    def emit(result: t.Any, *args: t.Any, **kwargs: t.Any) -> None:
+        arguments = signature.bind(*args, **kwargs).arguments
+        data = {"action": action, "path": arguments["path"].strip("/")}
+        if action == "create":
+            data["checkpoint_id"] = result["id"]
+            last_modified = result["last_modified"]
+            if isinstance(last_modified, datetime):
+                last_modified = last_modified.isoformat()
+            data["last_modified"] = last_modified
+        else:
+            data["checkpoint_id"] = arguments["checkpoint_id"]
+        event_logger.emit(schema_id=CHECKPOINTS_EVENT_SCHEMA_ID, data=data)
+
+    if inspect.iscoroutinefunction(method):
+
+        @functools.wraps(method)
+        async def async_wrapper(*args: t.Any, **kwargs: t.Any) -> t.Any:
+            result = await method(*args, **kwargs)
+            emit(result, *args, **kwargs)
+            return result
+
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(*args: t.Any, **kwargs: t.Any) -> t.Any:
+        result = method(*args, **kwargs)
+        emit(result, *args, **kwargs)
+        return result
+
+    return wrapper
 
 
 aliases = dict(base_aliases)
@@ -254,7 +1014,6 @@ class JupyterNotebookApp(NotebookConfigShimMixin, LabServerApp):  # type:ignore[
     default_url = Unicode("/tree", config=True, help="The default URL to redirect to from `/`")
     file_url_prefix = "/tree"
     load_other_extensions = True
-    app_dir = app_dir
     subcommands: dict[str, t.Any] = {}
 
     expose_app_in_browser = Bool(
@@ -271,17 +1030,266 @@ class JupyterNotebookApp(NotebookConfigShimMixin, LabServerApp):  # type:ignore[
         """,
     )
 
+    cache_page_config = Bool(
+        True,
+        config=True,
+        help="""Whether to cache the parts of the page config that do not change between requests.
+
+        The cache is rebuilt whenever a labextension directory or a ``labconfig``
+        page config file changes. Call ``invalidate_page_config`` to drop it explicitly.
+        """,
+    )
+
+    io_max_workers = Int(
+        4,
+        config=True,
+        help="""The maximum number of threads used to run blocking file system
+        work, such as labextension discovery, off the event loop.
+        """,
+    )
+
+    page_cache_size = Int(
+        64,
+        config=True,
+        help="""The maximum number of rendered pages kept in memory.
+
+        Set to 0 to render the page templates on every request.
+        """,
+    )
+
+    path_info_ttl = Float(
+        2.0,
+        config=True,
+        help="""How long, in seconds, the type of a path looked up by the tree
+        page is cached, to save contents manager round trips when navigating.
+
+        Set to 0 to always ask the contents manager.
+        """,
+    )
+
+    sniff_notebook_type = Bool(
+        False,
+        config=True,
+        help="""Whether the tree page asks the contents manager for the type of
+        ``.ipynb`` files before redirecting to them.
+
+        By default the extension is trusted, which avoids loading the notebook
+        model. Enable this for contents managers that may report such files as
+        another type.
+        """,
+    )
+
+    share_connections = Bool(
+        False,
+        config=True,
+        help="""Whether the notebook tabs share their polling requests through a
+        shared worker in the browser.
+
+        The kernels, sessions, terminals, kernel specs and user models are then
+        fetched once per period for all the open tabs instead of once per tab.
+        """,
+    )
+
+    kernel_pool_size = Int(
+        0,
+        config=True,
+        help="""The number of kernels of each of ``kernel_pool_kernel_names`` kept running
+        ahead of time, so new notebooks do not wait for their kernel to start.
+
+        Only the kernels started in the root directory, with no environment
+        variables other than those of the server and ``kernel_pool_ignored_env``,
+        are taken from the pool. Set to 0 to disable the pool.
+        """,
+    )
+
+    kernel_pool_ignored_env = List(
+        Unicode(),
+        config=True,
+        help="""The environment variables a kernel can be asked for and still be
+        taken from the pool, although the pooled kernels were started without them.
+
+        The kernels of notebooks are started with ``JPY_SESSION_NAME``, so it has
+        to be listed for the notebooks to take pooled kernels. The kernels taken
+        then only see these variables once they restart.
+        """,
+    )
+
+    kernel_pool_kernel_names = List(
+        Unicode(),
+        config=True,
+        help="""The kernel specs of the pooled kernels.
+
+        Defaults to the default kernel spec of the kernel manager.
+        """,
+    )
+
+    kernel_pool: KernelPool | None = None
+
+    event_loop_lag_threshold = Float(
+        0.0,
+        config=True,
+        help="""The time, in seconds, the event loop can be blocked before the stack
+        of the code blocking it is logged, with the handler and path of the request.
+
+        The lag of the event loop is then also exported as a metric. Set to 0 to
+        disable the watchdog.
+        """,
+    )
+
+    event_loop_lag_interval = Float(
+        0.1,
+        config=True,
+        help="""How often, in seconds, the event loop watchdog samples the lag of the loop.""",
+    )
+
+    loop_watchdog: LoopWatchdog | None = None
+
+    kernel_events_interval = Float(
+        0.5,
+        config=True,
+        help="""How often, in seconds, the kernels are checked for changes, which are
+        pushed to the notebook pages as events.
+
+        The pages then refresh the kernels, sessions and kernel specs on these
+        events instead of polling them. Set to 0 to disable the events, which
+        also need the event logger of the server.
+        """,
+    )
+
+    kernel_events: KernelEvents | None = None
+
+    lazy_outputs_threshold = Int(
+        0,
+        config=True,
+        help="""The size in bytes over which notebooks open with their heavy outputs
+        loaded lazily, as the notebook page scrolls to them.
+
+        The outputs are put back when the notebook is saved. Set to 0 to always
+        load the whole notebook.
+        """,
+    )
+
+    max_lazy_outputs_size = Int(
+        MAX_LAZY_OUTPUTS_SIZE,
+        config=True,
+        help="""The size in bytes of the heavy outputs kept in memory, for the notebooks
+        loaded lazily.
+
+        The least recently used outputs are dropped past it, and read again from
+        their notebook when they are fetched or the notebook is saved.
+        """,
+    )
+
+    max_notebook_revisions_size = Int(
+        MAX_REVISIONS_SIZE,
+        config=True,
+        help="""The size in bytes of the notebooks kept in memory, for the differential
+        saves of the notebook page.
+
+        The least recently saved notebooks are dropped past it, and are saved
+        whole on their next save.
+        """,
+    )
+
+    lazy_outputs: LazyOutputs
+    notebook_revisions: NotebookRevisions
+
+    max_cell_output_size = Int(
+        0,
+        config=True,
+        help="""The size in bytes over which the outputs of a cell are truncated,
+        when notebooks are saved or opened on the notebook page.
+
+        The rest of the outputs is kept in ``output_store_dir``, and shown on demand.
+        Set to 0 to not limit the outputs of cells.
+        """,
+    )
+
+    max_notebook_output_size = Int(
+        0,
+        config=True,
+        help="""The size in bytes over which the outputs of a notebook are truncated,
+        from the first cell past the limit.
+
+        Set to 0 to not limit the outputs of notebooks.
+        """,
+    )
+
+    output_store_dir = Unicode(
+        "",
+        config=True,
+        help="""The directory the rest of the outputs of the truncated cells is kept in.
+
+        Defaults to ``notebook_outputs`` in the Jupyter data directory.
+        """,
+    )
+
+    max_output_store_size = Int(
+        0,
+        config=True,
+        help="""The size in bytes over which the least recently written outputs are
+        deleted from ``output_store_dir``.
+
+        The notebooks are saved truncated, so the outputs deleted are lost: they
+        cannot be shown anymore from the notebooks still referencing them.
+        Set to 0 to never delete them.
+        """,
+    )
+
+    _output_store: OutputStore | None = None
+
+    _page_config_cache: tuple[t.Any, StaticPageConfig] | None = None
+    _page_config_serials = itertools.count()
+    _path_info_cache: dict[str, tuple[float, PathInfo]]
+    _directory_listings: OrderedDict[str, tuple[int, list[str]]]
+    _directory_listings_lock: threading.Lock
+    _custom_css_cache: CustomCss | None = None
+    _settings_bundle: SettingsBundle | None = None
+    _template_variables: dict[str, tuple[Template, frozenset[str] | None]]
+    _rendered_pages: OrderedDict[tuple[str, str], tuple[Template, str, str]]
+    _io_executor: ThreadPoolExecutor | None = None
+
+    profile_startup = Bool(
+        False,
+        config=True,
+        help="""Whether to write a report of how long each startup phase took.
+
+        The report is a JSON file in the Chrome trace format, which can be
+        loaded as a flame graph, see ``startup_profile_file``. The startup is
+        only timed when this is set on the command line, with ``--profile-startup``.
+        """,
+    )
+
+    startup_profile_file = Unicode(
+        "",
+        config=True,
+        help="""The file the startup profile is written to.
+
+        Defaults to ``notebook-startup-<pid>.json`` in the Jupyter runtime directory.
+        """,
+    )
+
     flags: Flags = flags  # type:ignore[assignment]
     flags["expose-app-in-browser"] = (
         {"JupyterNotebookApp": {"expose_app_in_browser": True}},
         "Expose the global app instance to browser via window.jupyterapp.",
     )
 
+    flags["profile-startup"] = (
+        {"JupyterNotebookApp": {"profile_startup": True}},
+        "Write a report of how long each startup phase took.",
+    )
+
     flags["custom-css"] = (
         {"JupyterNotebookApp": {"custom_css": True}},
         "Load custom CSS in template html files. Default is True",
     )
 
+    @property
+    def app_dir(self) -> Path:
+        """The JupyterLab app directory."""
+        return get_app_dir()
+
     @default("static_dir")
     def _default_static_dir(self) -> str:
         return str(HERE / "static")
@@ -292,27 +1300,281 @@ class JupyterNotebookApp(NotebookConfigShimMixin, LabServerApp):  # type:ignore[
 
     @default("app_settings_dir")
     def _default_app_settings_dir(self) -> str:
-        return str(app_dir / "settings")
+        return str(self.app_dir / "settings")
 
     @default("schemas_dir")
     def _default_schemas_dir(self) -> str:
-        return str(app_dir / "schemas")
+        return str(self.app_dir / "schemas")
 
     @default("themes_dir")
     def _default_themes_dir(self) -> str:
-        return str(app_dir / "themes")
+        return str(self.app_dir / "themes")
 
     @default("user_settings_dir")
     def _default_user_settings_dir(self) -> str:
+        from jupyterlab.commands import get_user_settings_dir
+
         return t.cast(str, get_user_settings_dir())
 
     @default("workspaces_dir")
     def _default_workspaces_dir(self) -> str:
+        from jupyterlab.commands import get_workspaces_dir
+
         return t.cast(str, get_workspaces_dir())
 
     def _prepare_templates(self) -> None:
-        super(LabServerApp, self)._prepare_templates()
-        self.jinja2_env.globals.update(custom_css=self.custom_css)  # type:ignore[has-type]
+        with startup_profile.phase("prepare templates"):
+            super(LabServerApp, self)._prepare_templates()
+            self.jinja2_env.globals.update(custom_css=self.custom_css)  # type:ignore[has-type]
+            self._template_variables = {}
+            self._rendered_pages = OrderedDict()
+
+    def get_template_variables(self, template: Template) -> frozenset[str] | None:
+        """Get the names of the variables a template and the templates it includes use.
+
+        Returns None when the page cannot be cached, either because the
+        template uses per-request values or because its source is unavailable.
+        """
+        name = t.cast(str, template.name)
+        cached = self._template_variables.get(name)
+        if cached is not None and cached[0] is template:
+            return cached[1]
+
+        variables = _find_template_variables(template.environment, name)
+        result = None
+        if variables is not None and not variables & UNCACHEABLE_TEMPLATE_VARIABLES:
+            result = frozenset(variables)
+        self._template_variables[name] = (template, result)
+        return result
+
+    def get_static_page_config(self, base_url: str, logger: t.Any = None) -> StaticPageConfig:
+        """Get the request independent parts of the page config.
+
+        Returns the app traits (with full versions of the urls) and the page
+        config built from the labextensions, reusing the previous result as
+        long as none of the labextensions directories changed.
+
+        This walks the file system, use ``run_in_executor`` to call it from
+        a request handler.
+        """
+        labextensions_path = self.extra_labextensions_path + self.labextensions_path
+        key = None
+        if self.cache_page_config:
+            key = (base_url, _page_config_fingerprint(labextensions_path))
+            cached = self._page_config_cache
+            if cached is not None and cached[0] == key:
+                return cached[1]
+
+        # Put all our config in page_config
+        trait_config: dict[str, t.Any] = {}
+        for name in LAB_CONFIG_TRAITS:
+            trait_config[_camelCase(name)] = getattr(self, name)
+
+        # Add full versions of all the urls
+        for name in LAB_CONFIG_TRAITS:
+            if not name.endswith("_url"):
+                continue
+            full_name = _camelCase("full_" + name)
+            full_url = getattr(self, name)
+            if not is_url(full_url):
+                # Relative URL will be prefixed with base_url
+                full_url = ujoin(base_url, full_url)
+            trait_config[full_name] = full_url
+
+        static_page_config = StaticPageConfig(
+            jupyter_config_dir=jupyter_config_dir(),
+            traits=trait_config,
+            labextensions=get_page_config(labextensions_path, logger=logger),
+            serial=next(self._page_config_serials),
+        )
+        if key is not None:
+            self._page_config_cache = (key, static_page_config)
+        return static_page_config
+
+    def invalidate_page_config(self) -> None:
+        """Drop the cached page config, e.g. after installing an extension."""
+        self._page_config_cache = None
+
+    @property
+    def io_executor(self) -> ThreadPoolExecutor:
+        """The thread pool used for blocking file system work."""
+        if self._io_executor is None:
+            self._io_executor = ThreadPoolExecutor(
+                max_workers=self.io_max_workers, thread_name_prefix="notebook-io"
+            )
+        return self._io_executor
+
+    @property
+    def output_store(self) -> OutputStore:
+        """The store of the rest of the outputs of the truncated cells."""
+        if self._output_store is None:
+            directory = self.output_store_dir or str(Path(self.data_dir, "notebook_outputs"))
+            self._output_store = OutputStore(directory, self.max_output_store_size)
+        return self._output_store
+
+    def truncate_outputs(self, nb: dict[str, t.Any]) -> int:
+        """Truncate the outputs of a notebook past the output size limits, in place."""
+        return truncate_outputs(
+            nb, self.output_store, self.max_cell_output_size, self.max_notebook_output_size
+        )
+
+    async def run_in_executor(self, func: t.Callable[..., T], *args: t.Any) -> T:
+        """Run a blocking function in the io thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.io_executor, func, *args)
+
+    @observe(*LAB_CONFIG_TRAITS)
+    def _lab_config_changed(self, change: t.Any) -> None:  # noqa: ARG002
+        self.invalidate_page_config()
+
+    def get_cached_path_info(self, path: str) -> PathInfo | None:
+        """Get the cached metadata for a path, if it has not expired."""
+        cached = self._path_info_cache.get(path)
+        if cached is None:
+            return None
+        expires, info = cached
+        if expires < time.monotonic():
+            del self._path_info_cache[path]
+            return None
+        return info
+
+    def cache_path_info(self, path: str, info: PathInfo) -> None:
+        """Cache the metadata for a path for ``path_info_ttl`` seconds."""
+        if self.path_info_ttl <= 0:
+            return
+        now = time.monotonic()
+        if len(self._path_info_cache) >= MAX_PATH_INFO_CACHE_SIZE:
+            self._path_info_cache = {
+                key: value for key, value in self._path_info_cache.items() if value[0] >= now
+            }
+        self._path_info_cache[path] = (now + self.path_info_ttl, info)
+
+    def list_directory(self, os_dir: str) -> list[str]:
+        """Get the names of the entries of a directory listed by the contents manager.
+
+        The names are sorted with the directories first and then by name, and
+        kept in memory until the directory is modified. This does blocking
+        file system calls, use ``run_in_executor`` to call it from a request
+        handler.
+        """
+        mtime_ns = Path(os_dir).stat().st_mtime_ns
+        with self._directory_listings_lock:
+            cached = self._directory_listings.get(os_dir)
+            if cached is not None and cached[0] == mtime_ns:
+                self._directory_listings.move_to_end(os_dir)
+                return cached[1]
+
+        cm = self.serverapp.contents_manager  # type:ignore[union-attr]
+        entries = []
+        with os.scandir(os_dir) as it:
+            for entry in it:
+                # Skip the entries the contents manager does not list either.
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                    if not (S_ISLNK(st.st_mode) or S_ISREG(st.st_mode) or S_ISDIR(st.st_mode)):
+                        continue
+                    if not cm.should_list(entry.name) or (
+                        not cm.allow_hidden and is_file_hidden(entry.path, stat_res=st)
+                    ):
+                        continue
+                    entries.append(_listing_order(entry.is_dir(), entry.name))
+                except OSError:
+                    continue
+        names = [name for _, _, name in sorted(entries)]
+
+        with self._directory_listings_lock:
+            self._directory_listings[os_dir] = (mtime_ns, names)
+            self._directory_listings.move_to_end(os_dir)
+            while len(self._directory_listings) > MAX_DIRECTORY_LISTINGS:
+                self._directory_listings.popitem(last=False)
+        return names
+
+    def get_custom_css_files(self) -> list[str]:
+        """Get the custom.css files to look for, in priority order.
+
+        The file in the Jupyter config directory takes precedence over the
+        one shipped next to the static directory.
+        """
+        page_config_data = self.serverapp.web_app.settings.get("page_config_data", {})  # type:ignore[union-attr]
+        config_dir = page_config_data.get("jupyterConfigDir") or jupyter_config_dir()
+        custom_css_files = [f"{config_dir}/custom/custom.css"]
+        static_path_root = re.match("^(.*?)static", self.static_dir.replace(os.sep, "/"))
+        if static_path_root is not None:
+            custom_dir = static_path_root.groups()[0]
+            custom_css_files.append(f"{custom_dir}custom/custom.css")
+        return custom_css_files
+
+    def load_custom_css(self, custom_css_files: list[str]) -> CustomCss | None:
+        """Load the first existing custom.css file.
+
+        The content is kept in memory and only read again when the file's
+        modification time or size change. This does blocking file system
+        calls, use ``run_in_executor`` to call it from a request handler.
+        """
+        for path in custom_css_files:
+            try:
+                stat = Path(path).stat()
+            except OSError:
+                continue
+            if not S_ISREG(stat.st_mode):
+                continue
+
+            cached = self._custom_css_cache
+            if (
+                cached is not None
+                and cached.path == path
+                and cached.mtime_ns == stat.st_mtime_ns
+                and cached.size == stat.st_size
+            ):
+                return cached
+
+            content = Path(path).read_bytes()
+            custom_css = CustomCss(
+                path=path,
+                mtime_ns=stat.st_mtime_ns,
+                size=stat.st_size,
+                content=content,
+                etag=f'"{hashlib.sha256(content).hexdigest()}"',
+                last_modified=datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+            )
+            self._custom_css_cache = custom_css
+            return custom_css
+        return None
+
+    def get_settings_bundle(self, get_locale: t.Callable[[], str]) -> SettingsBundle:
+        """Get the settings of all the plugins, serialized as for the settings API.
+
+        They are only read again when a schema, a user settings file or an
+        override changes, ``get_locale`` is called to translate the schemas
+        then. This does blocking file system calls, use ``run_in_executor``
+        to call it from a request handler.
+        """
+        labextensions_path = self.extra_labextensions_path + self.labextensions_path
+        key = _settings_fingerprint(
+            self.app_settings_dir, self.schemas_dir, self.user_settings_dir, labextensions_path
+        )
+        cached = self._settings_bundle
+        if cached is not None and cached.key == key:
+            return cached
+
+        translator.set_locale(get_locale())
+        result, warnings = get_settings(
+            self.app_settings_dir,
+            self.schemas_dir,
+            self.user_settings_dir,
+            labextensions_path=labextensions_path,
+            translator=translator.translate_schema,
+        )
+        for warning in warnings:
+            if warning:
+                self.log.warning(warning)
+
+        content = json.dumps(result).encode("utf-8")
+        bundle = SettingsBundle(
+            key=key, content=content, etag=f'"{hashlib.sha256(content).hexdigest()}"'
+        )
+        self._settings_bundle = bundle
+        return bundle
 
     def server_extension_is_enabled(self, extension: str) -> bool:
         """Check if server extension is enabled."""
@@ -326,12 +1588,46 @@ class JupyterNotebookApp(NotebookConfigShimMixin, LabServerApp):  # type:ignore[
             extension_enabled = False
         return extension_enabled
 
+    def initialize_settings(self) -> None:
+        """Emit the checkpoints and kernels events the notebook page listens to,
+        put back the lazy outputs of the notebooks saved, and truncate their outputs."""
+        super().initialize_settings()
+        assert self.serverapp is not None  # noqa: S101
+        contents_manager = self.serverapp.contents_manager
+        contents_manager.register_pre_save_hook(self._restore_lazy_outputs)
+        contents_manager.register_pre_save_hook(self._truncate_outputs)
+        event_logger = self.serverapp.event_logger
+        if event_logger is None:
+            return
+        event_logger.register_event_schema(HERE / "event_schemas" / "checkpoints" / "v1.yaml")
+        for method_name, action in CHECKPOINT_ACTIONS.items():
+            method = getattr(contents_manager, method_name)
+            wrapper = _emit_checkpoint_event(event_logger, action, method)
+            setattr(contents_manager, method_name, wrapper)
+        if self.kernel_events_interval > 0:
+            event_logger.register_event_schema(HERE / "event_schemas" / "kernels" / "v1.yaml")
+            self.kernel_events = KernelEvents(
+                self.log,
+                event_logger,
+                self.serverapp.kernel_manager,
+                self.serverapp.kernel_spec_manager,
+                self.kernel_events_interval,
+                self.run_in_executor,
+            )
+            self.kernel_events.watch_sessions(self.serverapp.session_manager)
+
     def initialize_handlers(self) -> None:
         """Initialize handlers."""
         assert self.serverapp is not None  # noqa: S101
         page_config = self.serverapp.web_app.settings.setdefault("page_config_data", {})
         nbclassic_enabled = self.server_extension_is_enabled("nbclassic")
         page_config["nbclassic_enabled"] = nbclassic_enabled
+        page_config["checkpointEvents"] = self.serverapp.event_logger is not None
+        page_config["kernelEvents"] = self.kernel_events is not None
+        page_config["shareConnections"] = self.share_connections
+        page_config["lazyOutputsThreshold"] = self.lazy_outputs_threshold
+        page_config["maxCellOutputSize"] = self.max_cell_output_size
+        page_config["maxNotebookOutputSize"] = self.max_notebook_output_size
 
         # If running under JupyterHub, add more metadata.
         if "hub_prefix" in self.serverapp.tornado_settings:
@@ -355,13 +1651,180 @@ class JupyterNotebookApp(NotebookConfigShimMixin, LabServerApp):  # type:ignore[
         self.handlers.append(("/edit(.*)", FileHandler))
         self.handlers.append(("/consoles/(.*)", ConsoleHandler))
         self.handlers.append(("/terminals/(.*)", TerminalHandler))
-        self.handlers.append(("/custom/custom.css", CustomCssHandler))
+        self.handlers.append(
+            (
+                "/custom/custom.css",
+                CustomCssHandler,
+                {"custom_css_files": self.get_custom_css_files()},
+            )
+        )
+        self.handlers.append(("/api/notebook/listing(.*)", DirectoryListingHandler))
+        self.handlers.append(("/api/notebook/contents(.*)", NotebookContentsHandler))
+        self.handlers.append(("/api/notebook/outputs(.*)", LazyOutputsHandler))
+        self.handlers.append(
+            ("/api/notebook/truncated-outputs/([0-9a-f]{64})", TruncatedOutputsHandler)
+        )
+        if self.schemas_dir:
+            self.handlers.append(
+                (
+                    "/api/notebook/settings",
+                    SettingsBundleHandler,
+                    {
+                        "app_settings_dir": self.app_settings_dir,
+                        "schemas_dir": self.schemas_dir,
+                        "settings_dir": self.user_settings_dir,
+                        "labextensions_path": (
+                            self.extra_labextensions_path + self.labextensions_path
+                        ),
+                    },
+                )
+            )
         super().initialize_handlers()
 
+    def _prepare_handlers(self) -> None:
+        with startup_profile.phase("prepare handlers"):
+            assert self.serverapp is not None  # noqa: S101
+            if self.static_paths:
+                # Added first, so it takes precedence over the default static handler.
+                self.serverapp.web_app.add_handlers(
+                    ".*$",
+                    [
+                        (
+                            ujoin(self.static_url_prefix, "(.*)"),
+                            PrecompressedFileFindHandler,
+                            {"path": self.static_paths},
+                        )
+                    ],
+                )
+            super()._prepare_handlers()
+
     def initialize(self, argv: list[str] | None = None) -> None:  # noqa: ARG002
         """Subclass because the ExtensionApp.initialize() method does not take arguments"""
+        self._path_info_cache = {}
+        self._directory_listings = OrderedDict()
+        # The directories are listed from the io thread pool.
+        self._directory_listings_lock = threading.Lock()
+        self.lazy_outputs = LazyOutputs(max_size=self.max_lazy_outputs_size)
+        self.notebook_revisions = NotebookRevisions(self.max_notebook_revisions_size)
         super().initialize()
 
+    @classmethod
+    def initialize_server(
+        cls, argv: list[str] | None = None, load_other_extensions: bool = True, **kwargs: t.Any
+    ) -> ServerApp:
+        """Initialize the server, timing each phase for ``--profile-startup``.
+
+        The server methods are only instrumented when the profile is asked
+        for on the command line, as the config files are not loaded yet.
+        """
+        with contextlib.ExitStack() as stack:
+            if _profile_startup_requested(argv or []):
+                for owner, attr, name in STARTUP_PHASES:
+                    stack.enter_context(startup_profile.instrument(owner, attr, name))
+                stack.enter_context(startup_profile.phase("initialize server"))
+            else:
+                startup_profile.disable()
+            serverapp: ServerApp = super().initialize_server(
+                argv=argv, load_other_extensions=load_other_extensions, **kwargs
+            )
+
+        point = serverapp.extension_manager.extension_points.get(cls.name)
+        if point is not None and point.app is not None and point.app.profile_startup:
+            point.app.write_startup_profile()
+        return serverapp
+
+    def write_startup_profile(self) -> str | None:
+        """Write the startup profile and return the path of the report, if it was recorded."""
+        if not startup_profile.enabled:
+            self.log.warning("The startup is only profiled with --profile-startup")
+            return None
+        path = self.startup_profile_file or str(
+            Path(self.runtime_dir, f"notebook-startup-{os.getpid()}.json")
+        )
+        startup_profile.write(path)
+        self.log.info("Wrote the startup profile to %s", path)
+        return path
+
+    def _restore_lazy_outputs(
+        self,
+        model: dict[str, t.Any],
+        path: str,
+        contents_manager: t.Any,
+        **kwargs: t.Any,  # noqa: ARG002
+    ) -> None:
+        """Put back the outputs of the stubs of a notebook before it is saved.
+
+        The notebook page saves through ``NotebookContentsHandler``, which puts
+        them back off the event loop first, this is for the other saves.
+        """
+
+        def load(stub_path: str) -> dict[str, t.Any] | None:
+            # Hooks run synchronously, so only files can be read again.
+            if not isinstance(contents_manager, FileManagerMixin):
+                return None
+            return _read_notebook_file(contents_manager, stub_path)
+
+        if model.get("type") == "notebook" and model.get("content"):
+            self.lazy_outputs.restore(model["content"], load, path.strip("/"))
+
+    def _truncate_outputs(
+        self,
+        model: dict[str, t.Any],
+        path: str,
+        contents_manager: t.Any,  # noqa: ARG002
+        **kwargs: t.Any,  # noqa: ARG002
+    ) -> None:
+        """Truncate the outputs of a notebook past the limits before it is saved.
+
+        The notebook page saves through ``NotebookContentsHandler``, which
+        truncates them off the event loop first, this is for the other saves.
+        """
+        if self.max_cell_output_size <= 0 and self.max_notebook_output_size <= 0:
+            return
+        if model.get("type") == "notebook" and model.get("content"):
+            count = self.truncate_outputs(model["content"])
+            if count:
+                self.log.info("Truncated the outputs of %d cells of %s", count, path)
+
+    async def _start_jupyter_server_extension(self, serverapp: ServerApp) -> None:
+        """Start the loop watchdog, the kernel events and the kernel pool, once the
+        event loop is running."""
+        if self.event_loop_lag_threshold > 0:
+            self.loop_watchdog = LoopWatchdog(
+                self.log, self.event_loop_lag_threshold, self.event_loop_lag_interval
+            )
+            self.loop_watchdog.start()
+        if self.kernel_events is not None:
+            self.kernel_events.start()
+        if self.kernel_pool_size <= 0:
+            return
+        kernel_manager = serverapp.kernel_manager
+        self.kernel_pool = KernelPool(
+            kernel_manager,
+            self.kernel_pool_size,
+            self.kernel_pool_kernel_names or [kernel_manager.default_kernel_name],
+            self.kernel_pool_ignored_env,
+        )
+        self.kernel_pool.install()
+        if self.kernel_events is not None:
+            self.kernel_events.hidden_ids = self.kernel_pool.pooled_ids
+
+    async def stop_extension(self) -> None:
+        """Stop the loop watchdog, the kernel events and the kernel pool, and shut down
+        the io thread pool."""
+        await super().stop_extension()
+        if self.kernel_pool is not None:
+            await self.kernel_pool.stop()
+            self.kernel_pool = None
+        if self.loop_watchdog is not None:
+            self.loop_watchdog.stop()
+            self.loop_watchdog = None
+        if self.kernel_events is not None:
+            self.kernel_events.stop()
+        if self._io_executor is not None:
+            self._io_executor.shutdown(wait=False)
+            self._io_executor = None
+
 
 main = launch_new_instance = JupyterNotebookApp.launch_instance
 
@@ -0,0 +1,382 @@
+"""Load test of the notebook server, with many concurrent users.
+
+Start a notebook server on a temporary root directory, and run virtual users
+against it for some time::
+
+    python -m notebook.loadtest --users 50 --duration 60
+
+Each virtual user repeatedly runs one of the ``TASKS``, chosen at random by
+weight, then waits a random time. The report gives the throughput, the
+latency percentiles of each request, and the event loop lag of the server.
+The arguments after ``--`` are passed to the server, e.g. to test a contents
+manager::
+
+    python -m notebook.loadtest --users 50 -- --ServerApp.contents_manager_class=...
+"""
+
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import secrets
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import typing as t
+from pathlib import Path
+
+import nbformat
+from jupyter_server.utils import url_escape
+from jupyter_server.utils import url_path_join as ujoin
+from tornado.httpclient import AsyncHTTPClient, HTTPClientError
+
+from .app import JupyterNotebookApp
+
+#: The notebooks of the root directory, as in the tests.
+NOTEBOOKS = (
+    "notebook1.ipynb",
+    "jlab_test_notebooks/notebook2.ipynb",
+    "jlab_test_notebooks/level2/notebook3.ipynb",
+)
+
+#: The tasks of the virtual users: their weight, and the urls they fetch in
+#: order. ``{dir}`` and ``{notebook}`` are replaced by a random directory and
+#: notebook of the root directory.
+TASKS: dict[str, tuple[int, tuple[str, ...]]] = {
+    "tree": (2, ("/tree/{dir}", "/api/contents/{dir}?content=1")),
+    "open notebook": (
+        1,
+        (
+            "/notebooks/{notebook}",
+            "/api/notebook/settings",
+            "/custom/custom.css",
+            "/api/contents/{notebook}?type=notebook&content=1",
+        ),
+    ),
+    "settings": (1, ("/api/notebook/settings",)),
+    "custom css": (1, ("/custom/custom.css",)),
+    "poll checkpoints": (5, ("/api/contents/{notebook}/checkpoints",)),
+}
+
+#: The interval between the samples of the event loop lag, in seconds.
+LAG_INTERVAL = 0.02
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Get the ``q`` percentile of sorted values, by the nearest rank."""
+    if not values:
+        return 0.0
+    rank = max(0, min(len(values) - 1, round(q / 100 * len(values)) - 1))
+    return values[rank]
+
+
+def summarize(values: list[float]) -> dict[str, float]:
+    """Get the p50, p99 and maximum of durations in seconds, in ms."""
+    values = sorted(values)
+    return {
+        "p50_ms": percentile(values, 50) * 1000,
+        "p99_ms": percentile(values, 99) * 1000,
+        "max_ms": (values[-1] if values else 0.0) * 1000,
+    }
+
+
+def create_notebooks(root_dir: Path, cells: int = 20) -> None:
+    """Create the ``NOTEBOOKS`` in a root directory, with code cells and outputs."""
+    for nbpath in NOTEBOOKS:
+        nb = nbformat.v4.new_notebook()  # type:ignore[no-untyped-call]
+        for i in range(cells):
+            cell = nbformat.v4.new_code_cell(f"print({i})")  # type:ignore[no-untyped-call]
+            cell.outputs.append(
+                nbformat.v4.new_output("stream", text=f"{i}\n")  # type:ignore[no-untyped-call]
+            )
+            nb.cells.append(cell)
+        path = root_dir / nbpath
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(nbformat.writes(nb, version=4))  # type:ignore[no-untyped-call]
+
+
+async def run(
+    url: str,
+    token: str,
+    *,
+    users: int,
+    duration: float,
+    wait: float = 1.0,
+    ramp_up: float = 0.0,
+    notebooks: t.Sequence[str] = NOTEBOOKS,
+    seed: int | None = None,
+) -> dict[str, t.Any]:
+    """Run virtual users against a server for ``duration`` seconds.
+
+    Each user starts within ``ramp_up`` seconds, and waits ``wait`` seconds on
+    average between two tasks. The tasks and their urls are drawn from a
+    random generator seeded with ``seed``. Returns the report of the requests.
+    """
+    rng = random.Random(seed)  # noqa: S311
+    client = AsyncHTTPClient(force_instance=True, max_clients=users)
+    headers = {"Authorization": f"token {token}"}
+    dirs = sorted({str(Path(nb).parent).replace(".", "") for nb in notebooks})
+    names = list(TASKS)
+    weights = [TASKS[name][0] for name in names]
+    latencies: dict[str, list[float]] = {}
+    failures: dict[str, int] = {}
+    start = time.perf_counter()
+    deadline = start + duration
+
+    async def user(index: int) -> None:
+        await asyncio.sleep(ramp_up * index / users)
+        while time.perf_counter() < deadline:
+            (name,) = rng.choices(names, weights)
+            params = {
+                "dir": url_escape(rng.choice(dirs)),
+                "notebook": url_escape(rng.choice(notebooks)),
+            }
+            for template in TASKS[name][1]:
+                request_start = time.perf_counter()
+                try:
+                    response = await client.fetch(
+                        ujoin(url, template.format(**params)), headers=headers, raise_error=False
+                    )
+                    failed = response.code >= 400
+                except (HTTPClientError, OSError):
+                    # Timeouts, and refused or reset connections.
+                    failed = True
+                latencies.setdefault(template, []).append(time.perf_counter() - request_start)
+                failures[template] = failures.get(template, 0) + failed
+            await asyncio.sleep(min(rng.uniform(0, 2 * wait), deadline - time.perf_counter()))
+
+    try:
+        await asyncio.gather(*(user(i) for i in range(users)))
+    finally:
+        client.close()
+    elapsed = time.perf_counter() - start
+
+    requests = sum(len(values) for values in latencies.values())
+    return {
+        "users": users,
+        "duration_seconds": elapsed,
+        "requests": requests,
+        "failures": sum(failures.values()),
+        "throughput_per_second": requests / elapsed,
+        "latency": summarize([value for values in latencies.values() for value in values]),
+        "urls": {
+            template: {
+                "requests": len(values),
+                "failures": failures[template],
+                **summarize(values),
+            }
+            for template, values in sorted(latencies.items())
+        },
+    }
+
+
+class LagSampler:
+    """Sample the lag of the event loop: how late a sleep wakes up."""
+
+    def __init__(self, interval: float = LAG_INTERVAL) -> None:
+        self.interval = interval
+        # The wall clock time of each sample, and the lag in seconds.
+        self.samples: list[tuple[float, float]] = []
+
+    async def run(self) -> None:
+        """Sample the lag of the running loop, until cancelled."""
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append((time.time(), max(0.0, loop.time() - start - self.interval)))
+
+    def lags(self, start: float = 0, end: float = float("inf")) -> list[float]:
+        """Get the lags sampled between two wall clock times."""
+        return [lag for stamp, lag in self.samples if start <= stamp <= end]
+
+
+def serve(root_dir: str, port: int, token: str, server_args: list[str]) -> None:
+    """Run a notebook server sampling its event loop lag, until it is stopped.
+
+    The lag samples are written to stdout as JSON when the server stops.
+    """
+    serverapp = JupyterNotebookApp.initialize_server(
+        argv=[
+            f"--ServerApp.root_dir={root_dir}",
+            "--ServerApp.ip=127.0.0.1",
+            f"--ServerApp.port={port}",
+            "--ServerApp.port_retries=0",
+            "--ServerApp.open_browser=False",
+            f"--IdentityProvider.token={token}",
+            *server_args,
+        ]
+    )
+    sampler = LagSampler()
+    tasks = set()
+
+    def start_sampler() -> None:
+        tasks.add(asyncio.create_task(sampler.run()))
+
+    serverapp.io_loop.add_callback(start_sampler)
+    serverapp.start()
+    json.dump(sampler.samples, sys.stdout)
+
+
+async def wait_for_server(
+    url: str, token: str, process: subprocess.Popen[str], timeout: float = 60
+) -> None:
+    """Wait until the server of a process answers.
+
+    Raises a ``RuntimeError`` if the process exits, and a ``TimeoutError``
+    after ``timeout`` seconds.
+    """
+    client = AsyncHTTPClient(force_instance=True)
+    deadline = time.monotonic() + timeout
+    try:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                msg = f"The server exited with code {process.returncode}, see --verbose"
+                raise RuntimeError(msg)
+            try:
+                response = await client.fetch(
+                    ujoin(url, "api/status"),
+                    headers={"Authorization": f"token {token}"},
+                    raise_error=False,
+                )
+            except OSError:
+                pass
+            else:
+                if response.code == 200:
+                    return
+            await asyncio.sleep(0.2)
+    finally:
+        client.close()
+    msg = f"The server at {url} did not start in {timeout} seconds"
+    raise TimeoutError(msg)
+
+
+def format_report(report: dict[str, t.Any]) -> str:
+    """Format a report as a table."""
+    lines = [
+        (
+            f"{report['users']} users for {report['duration_seconds']:.1f}s: "
+            f"{report['requests']} requests, {report['failures']} failures, "
+            f"{report['throughput_per_second']:.1f} requests/s"
+        ),
+        "",
+        f"{'Request':<52} {'Count':>7} {'Fail':>5} {'p50 ms':>8} {'p99 ms':>8}",
+    ]
+    rows = [*report["urls"].items(), ("All", {**report["latency"], **report})]
+    for name, row in rows:
+        lines.append(
+            f"{name:<52} {row['requests']:>7} {row['failures']:>5} "
+            f"{row['p50_ms']:>8.1f} {row['p99_ms']:>8.1f}"
+        )
+    lag = report.get("event_loop_lag")
+    if lag:
+        lines.extend(
+            [
+                "",
+                (
+                    f"Server event loop lag: p50 {lag['p50_ms']:.1f} ms, "
+                    f"p99 {lag['p99_ms']:.1f} ms, max {lag['max_ms']:.1f} ms"
+                ),
+            ]
+        )
+    return "\n".join(lines)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return t.cast(int, sock.getsockname()[1])
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run a load test from the command line."""
+    parser = argparse.ArgumentParser(
+        prog="python -m notebook.loadtest",
+        description="Load test a notebook server on a temporary root directory.",
+    )
+    parser.add_argument("--users", type=int, default=10, help="The number of virtual users.")
+    parser.add_argument(
+        "--duration", type=float, default=30, help="The duration of the test, in seconds."
+    )
+    parser.add_argument(
+        "--wait",
+        type=float,
+        default=1,
+        help="The average time a user waits between two tasks, in seconds.",
+    )
+    parser.add_argument(
+        "--ramp-up", type=float, default=0, help="The time to start all the users, in seconds."
+    )
+    parser.add_argument(
+        "--cells", type=int, default=20, help="The number of code cells of the notebooks."
+    )
+    parser.add_argument("--seed", type=int, help="The seed of the random tasks.")
+    parser.add_argument("--json", help="A file to write the report to, as JSON.")
+    parser.add_argument("--verbose", action="store_true", help="Show the server logs.")
+    parser.add_argument("--serve", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--token", help=argparse.SUPPRESS)
+    parser.add_argument("server_args", nargs="*", help="Arguments of the notebook server.")
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        serve(args.serve, args.port, args.token, args.server_args)
+        return 0
+
+    with tempfile.TemporaryDirectory() as root_dir:
+        create_notebooks(Path(root_dir), args.cells)
+        port = _free_port()
+        token = secrets.token_hex(16)
+        url = f"http://127.0.0.1:{port}/"
+        server = subprocess.Popen(  # noqa: S603
+            [
+                sys.executable,
+                "-m",
+                "notebook.loadtest",
+                f"--serve={root_dir}",
+                f"--port={port}",
+                f"--token={token}",
+                "--",
+                *args.server_args,
+            ],
+            stdout=subprocess.PIPE,
+            stderr=None if args.verbose else subprocess.DEVNULL,
+            text=True,
+        )
+        try:
+            asyncio.run(wait_for_server(url, token, server))
+            start = time.time()
+            report = asyncio.run(
+                run(
+                    url,
+                    token,
+                    users=args.users,
+                    duration=args.duration,
+                    wait=args.wait,
+                    ramp_up=args.ramp_up,
+                    seed=args.seed,
+                )
+            )
+            end = time.time()
+        finally:
+            server.terminate()
+            output, _ = server.communicate(timeout=30)
+
+    sampler = LagSampler()
+    sampler.samples = [tuple(sample) for sample in json.loads(output or "[]")]
+    report["event_loop_lag"] = summarize(sampler.lags(start, end))
+
+    print(format_report(report))  # noqa: T201
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
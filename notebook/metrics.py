@@ -0,0 +1,81 @@
+"""
+Prometheus metrics exported by Jupyter Notebook
+
+They are registered with the default registry, so they are served by
+the ``/metrics`` endpoint of Jupyter Server along with its own metrics.
+
+Read https://prometheus.io/docs/practices/naming/ for naming
+conventions for metrics & labels.
+"""
+
+from __future__ import annotations
+
+import time
+import typing as t
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Histogram
+
+PAGE_RENDER_DURATION_SECONDS = Histogram(
+    "notebook_page_render_duration_seconds",
+    "duration in seconds to render the html of a notebook page, cached or not",
+    ["handler"],
+)
+
+PAGE_CONFIG_DURATION_SECONDS = Histogram(
+    "notebook_page_config_duration_seconds",
+    "duration in seconds to build the page config of a notebook page",
+    ["handler"],
+)
+
+CONTENTS_MANAGER_DURATION_SECONDS = Histogram(
+    "notebook_contents_manager_duration_seconds",
+    "duration in seconds of the contents manager calls made by notebook page handlers",
+    ["handler", "method"],
+)
+
+RESPONSE_SIZE_BYTES = Histogram(
+    "notebook_response_size_bytes",
+    "size in bytes of the responses written by notebook page handlers",
+    ["handler"],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, float("inf")),
+)
+
+KERNEL_POOL_CLAIMS_TOTAL = Counter(
+    "notebook_kernel_pool_claims_total",
+    "kernels of a pooled kernel spec started, taken from the pool (hit) or not (miss)",
+    ["kernel_name", "result"],
+)
+
+EVENT_LOOP_LAG_SECONDS = Histogram(
+    "notebook_event_loop_lag_seconds",
+    "delay in seconds of the callbacks of the event loop, sampled by the loop watchdog",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, float("inf")),
+)
+
+EVENT_LOOP_STALLS_TOTAL = Counter(
+    "notebook_event_loop_stalls_total",
+    "times the event loop was blocked over the watchdog threshold, by the running handler",
+    ["handler"],
+)
+
+__all__ = [
+    "CONTENTS_MANAGER_DURATION_SECONDS",
+    "EVENT_LOOP_LAG_SECONDS",
+    "EVENT_LOOP_STALLS_TOTAL",
+    "KERNEL_POOL_CLAIMS_TOTAL",
+    "PAGE_CONFIG_DURATION_SECONDS",
+    "PAGE_RENDER_DURATION_SECONDS",
+    "RESPONSE_SIZE_BYTES",
+    "observe_duration",
+]
+
+
+@contextmanager
+def observe_duration(histogram: Histogram, **labels: str) -> t.Iterator[None]:
+    """Observe the time spent in the body of the ``with`` statement."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.labels(**labels).observe(time.perf_counter() - start)
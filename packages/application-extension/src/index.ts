@@ -43,16 +43,40 @@ import {
   ISettingRegistry,
 } from '@jupyterlab/settingregistry';
 
+import {
+  Contents,
+  Drive,
+  Event,
+  IDefaultDrive,
+  IEventManager,
+  IKernelManager,
+  IKernelSpecManager,
+  IServerSettings,
+  ISessionManager,
+  Kernel,
+  KernelManager,
+  KernelSpec,
+  KernelSpecManager,
+  ServerConnection,
+  Session,
+  SessionManager,
+} from '@jupyterlab/services';
+
 import { ITranslator, nullTranslator } from '@jupyterlab/translation';
 
 import {
   NotebookApp,
   NotebookShell,
+  IKernelEvents,
   INotebookShell,
+  KernelEvents,
   SidePanel,
   SidePanelHandler,
   SidePanelPalette,
   INotebookPathOpener,
+  NotebookDrive,
+  hasOutputLimits,
+  PagedDrive,
   defaultNotebookPathOpener,
 } from '@jupyter-notebook/application';
 
@@ -60,6 +84,8 @@ import { jupyterIcon } from '@jupyter-notebook/ui-components';
 
 import { SettingConnector } from './settingconnector';
 
+import { SharedConnections } from './sharedconnections';
+
 import { PromiseDelegate } from '@lumino/coreutils';
 
 import {
@@ -1309,7 +1335,162 @@ const settingsConnector: JupyterFrontEndPlugin<ISettingConnector> = {
   autoStart: true,
   provides: ISettingConnector,
   activate: (app: JupyterFrontEnd): ISettingConnector => {
-    return new SettingConnector(app.serviceManager.settings);
+    return new SettingConnector(
+      app.serviceManager.settings,
+      app.serviceManager.serverSettings
+    );
+  },
+};
+
+/**
+ * The default drive, fetching large directory listings one page at a time on
+ * the tree page. On the notebook page, it saves the cells changed since the
+ * last save, and fetches large notebooks with lazy or truncated outputs.
+ */
+const defaultDrive: JupyterFrontEndPlugin<Contents.IDrive> = {
+  id: '@jupyter-notebook/application-extension:default-drive',
+  description: 'Provides the default drive.',
+  autoStart: true,
+  provides: IDefaultDrive,
+  optional: [IServerSettings],
+  activate: (
+    app: JupyterFrontEnd,
+    serverSettings: ServerConnection.ISettings | null
+  ): Contents.IDrive => {
+    const options = { serverSettings: serverSettings ?? undefined };
+    const page = PageConfig.getOption('notebookPage');
+    if (page === 'tree') {
+      return new PagedDrive(options);
+    }
+    if (page === 'notebooks') {
+      const lazyOutputsThreshold = parseInt(
+        PageConfig.getOption('lazyOutputsThreshold') || '0',
+        10
+      );
+      // The server also truncates the outputs of the notebooks it sends.
+      return new NotebookDrive({
+        ...options,
+        lazyOutputs: lazyOutputsThreshold > 0 || hasOutputLimits(),
+      });
+    }
+    return new Drive(options);
+  },
+};
+
+/**
+ * The kernel events pushed by the server.
+ */
+const kernelEvents: JupyterFrontEndPlugin<IKernelEvents> = {
+  id: '@jupyter-notebook/application-extension:kernel-events',
+  description: 'Provides the kernel events pushed by the server.',
+  autoStart: true,
+  provides: IKernelEvents,
+  optional: [IEventManager],
+  activate: (
+    app: JupyterFrontEnd,
+    events: Event.IManager | null
+  ): IKernelEvents => {
+    return new KernelEvents({ events });
+  },
+};
+
+/**
+ * The kernel manager, refreshed on the kernel events instead of polling the
+ * server when they are pushed.
+ */
+const kernelManager: JupyterFrontEndPlugin<Kernel.IManager> = {
+  id: '@jupyter-notebook/application-extension:kernel-manager',
+  description: 'Provides the kernel manager.',
+  autoStart: true,
+  provides: IKernelManager,
+  requires: [IKernelEvents],
+  optional: [IServerSettings],
+  activate: (
+    app: JupyterFrontEnd,
+    kernelEvents: IKernelEvents,
+    serverSettings: ServerConnection.ISettings | null
+  ): Kernel.IManager => {
+    const kernels = new KernelManager({
+      serverSettings: serverSettings ?? undefined,
+      standby: kernelEvents.standby,
+    });
+    kernelEvents.watch({ kernels });
+    return kernels;
+  },
+};
+
+/**
+ * The session manager, refreshed on the kernel events instead of polling the
+ * server when they are pushed.
+ */
+const sessionManager: JupyterFrontEndPlugin<Session.IManager> = {
+  id: '@jupyter-notebook/application-extension:session-manager',
+  description: 'Provides the session manager.',
+  autoStart: true,
+  provides: ISessionManager,
+  requires: [IKernelManager, IKernelEvents],
+  optional: [IServerSettings],
+  activate: (
+    app: JupyterFrontEnd,
+    kernelManager: Kernel.IManager,
+    kernelEvents: IKernelEvents,
+    serverSettings: ServerConnection.ISettings | null
+  ): Session.IManager => {
+    const sessions = new SessionManager({
+      kernelManager,
+      serverSettings: serverSettings ?? undefined,
+      standby: kernelEvents.standby,
+    });
+    kernelEvents.watch({ sessions });
+    return sessions;
+  },
+};
+
+/**
+ * The kernel spec manager, refreshed on the kernel events instead of polling
+ * the server when they are pushed.
+ */
+const kernelSpecManager: JupyterFrontEndPlugin<KernelSpec.IManager> = {
+  id: '@jupyter-notebook/application-extension:kernel-spec-manager',
+  description: 'Provides the kernel spec manager.',
+  autoStart: true,
+  provides: IKernelSpecManager,
+  requires: [IKernelEvents],
+  optional: [IServerSettings],
+  activate: (
+    app: JupyterFrontEnd,
+    kernelEvents: IKernelEvents,
+    serverSettings: ServerConnection.ISettings | null
+  ): KernelSpec.IManager => {
+    const kernelspecs = new KernelSpecManager({
+      serverSettings: serverSettings ?? undefined,
+      standby: kernelEvents.standby,
+    });
+    kernelEvents.watch({ kernelspecs });
+    return kernelspecs;
+  },
+};
+
+/**
+ * The default server connection settings, sharing the polling requests of
+ * the notebook tabs in a shared worker when enabled on the server.
+ */
+const serverSettings: JupyterFrontEndPlugin<ServerConnection.ISettings> = {
+  id: '@jupyter-notebook/application-extension:server-settings',
+  description: 'Provides the server connection settings.',
+  autoStart: true,
+  provides: IServerSettings,
+  activate: (): ServerConnection.ISettings => {
+    const settings = ServerConnection.makeSettings();
+    if (!SharedConnections.isEnabled()) {
+      return settings;
+    }
+    const connections = new SharedConnections({
+      baseUrl: settings.baseUrl,
+      workerUrl: SharedConnections.getWorkerUrl(),
+      fetch: settings.fetch,
+    });
+    return ServerConnection.makeSettings({ fetch: connections.fetch });
   },
 };
 
@@ -1317,8 +1498,12 @@ const settingsConnector: JupyterFrontEndPlugin<ISettingConnector> = {
  * Export the plugins as default.
  */
 const plugins: JupyterFrontEndPlugin<any>[] = [
+  defaultDrive,
   dirty,
   info,
+  kernelEvents,
+  kernelManager,
+  kernelSpecManager,
   logo,
   menus,
   menuSpacer,
@@ -1327,6 +1512,8 @@ const plugins: JupyterFrontEndPlugin<any>[] = [
   pathOpener,
   paths,
   rendermime,
+  serverSettings,
+  sessionManager,
   settingsConnector,
   shell,
   sidePanelVisibility,
@@ -1,7 +1,9 @@
 // Copyright (c) Jupyter Development Team.
 // Distributed under the terms of the Modified BSD License.
 
-import { PageConfig } from '@jupyterlab/coreutils';
+import { PageConfig, URLExt } from '@jupyterlab/coreutils';
+
+import { ServerConnection } from '@jupyterlab/services';
 
 import type {
   ISettingConnector,
@@ -37,20 +39,38 @@ const SETTING_OVERRIDES: {
   },
 };
 
+/**
+ * The url of the endpoint returning the settings of all the plugins.
+ */
+const SETTINGS_BUNDLE_URL = 'api/notebook/settings';
+
+/**
+ * How long, in ms, the settings fetched in bulk are used to answer the
+ * requests for the settings of a single plugin.
+ */
+const SETTINGS_BUNDLE_LIFETIME = 10000;
+
 /**
  * A data connector for fetching settings.
  *
  * #### Notes
  * This connector is based on the default JupyterLab setting connector,
  * and additionally overrides the default values of some settings.
+ *
+ * The settings of all the plugins are fetched in one request, instead of
+ * one request per plugin when the settings registry loads them.
  */
 export class SettingConnector
   extends DataConnector<ISettingRegistry.IPlugin, string>
   implements ISettingConnector
 {
-  constructor(connector: IDataConnector<ISettingRegistry.IPlugin, string>) {
+  constructor(
+    connector: IDataConnector<ISettingRegistry.IPlugin, string>,
+    serverSettings?: ServerConnection.ISettings
+  ) {
     super();
     this._connector = connector;
+    this._serverSettings = serverSettings ?? ServerConnection.makeSettings();
   }
 
   /**
@@ -59,12 +79,15 @@ export class SettingConnector
    *
    * #### Notes
    * The REST API requests are throttled at one request per plugin per 100ms.
+   * The settings fetched in bulk are used first, if they are recent enough.
    */
   fetch(id: string): Promise<ISettingRegistry.IPlugin | undefined> {
     const throttlers = this._throttlers;
     if (!(id in throttlers)) {
       throttlers[id] = new Throttler(async () => {
-        const plugin = await this._connector.fetch(id);
+        const plugin =
+          (await this._fetchFromBundle(id)) ??
+          (await this._connector.fetch(id));
         return plugin && Private.overrideDefaults(plugin);
       }, 100);
     }
@@ -79,14 +102,15 @@ export class SettingConnector
     query: 'active' | 'all' | 'ids' = 'all'
   ): Promise<{ ids: string[]; values?: ISettingRegistry.IPlugin[] }> {
     const { isDisabled } = PageConfig.Extension;
-    const { ids, values } = await this._connector.list(
-      query === 'ids' ? 'ids' : undefined
-    );
 
     if (query === 'ids') {
+      const { ids } = await this._connector.list('ids');
       return { ids };
     }
 
+    const { ids, values } =
+      (await this._listFromBundle()) ?? (await this._connector.list());
+
     if (query === 'all') {
       return { ids, values: values.map(Private.overrideDefaults) };
     }
@@ -103,14 +127,114 @@ export class SettingConnector
     await this._connector.save(id, raw);
   }
 
+  /**
+   * Get the settings of a plugin from the bulk request.
+   *
+   * #### Notes
+   * A plugin is only served once from a bulk request, so fetching it again,
+   * e.g. after saving its settings, goes to the server.
+   */
+  private async _fetchFromBundle(
+    id: string
+  ): Promise<ISettingRegistry.IPlugin | undefined> {
+    const bundle =
+      this._bundle ??
+      this._setBundle(
+        Private.fetchBundle(this._serverSettings).then((text) =>
+          text === null ? [] : Private.parseBundle(text)
+        )
+      );
+    const plugins = await bundle;
+    const plugin = plugins.get(id);
+    plugins.delete(id);
+    return plugin;
+  }
+
+  /**
+   * List the settings of all the plugins from a bulk request.
+   *
+   * #### Notes
+   * The response also answers the requests for the settings of single
+   * plugins that usually follow, e.g. to load all of them.
+   */
+  private async _listFromBundle(): Promise<
+    { ids: string[]; values: ISettingRegistry.IPlugin[] } | null
+  > {
+    const text = await Private.fetchBundle(this._serverSettings);
+    if (text === null) {
+      return null;
+    }
+    // Parsed twice so the listed plugins and the fetched ones are not shared.
+    this._setBundle(Promise.resolve(Private.parseBundle(text)));
+    const values = Private.parseBundle(text).map((plugin) => {
+      plugin.data = { composite: {}, user: {} };
+      return plugin;
+    });
+    return { ids: values.map(({ id }) => id), values };
+  }
+
+  /**
+   * Use the settings fetched in bulk for `SETTINGS_BUNDLE_LIFETIME` ms.
+   */
+  private _setBundle(
+    plugins: Promise<ISettingRegistry.IPlugin[]>
+  ): Promise<Map<string, ISettingRegistry.IPlugin>> {
+    const bundle = plugins.then(
+      (values) => new Map(values.map((plugin) => [plugin.id, plugin]))
+    );
+    this._bundle = bundle;
+    window.clearTimeout(this._bundleTimeout);
+    this._bundleTimeout = window.setTimeout(() => {
+      this._bundle = null;
+    }, SETTINGS_BUNDLE_LIFETIME);
+    return bundle;
+  }
+
   private _connector: IDataConnector<ISettingRegistry.IPlugin, string>;
+  private _serverSettings: ServerConnection.ISettings;
   private _throttlers: { [key: string]: Throttler } = Object.create(null);
+  private _bundle: Promise<Map<string, ISettingRegistry.IPlugin>> | null =
+    null;
+  private _bundleTimeout = 0;
 }
 
 /**
  * A namespace for private module data.
  */
 namespace Private {
+  /**
+   * Fetch the settings of all the plugins, null if they are not available.
+   */
+  export async function fetchBundle(
+    serverSettings: ServerConnection.ISettings
+  ): Promise<string | null> {
+    const url = URLExt.join(serverSettings.baseUrl, SETTINGS_BUNDLE_URL);
+    try {
+      const response = await ServerConnection.makeRequest(
+        url,
+        {},
+        serverSettings
+      );
+      if (!response.ok) {
+        return null;
+      }
+      return await response.text();
+    } catch (error) {
+      console.warn('Failed to fetch the settings of all the plugins', error);
+      return null;
+    }
+  }
+
+  /**
+   * Parse the settings of all the plugins.
+   */
+  export function parseBundle(text: string): ISettingRegistry.IPlugin[] {
+    const { settings } = JSON.parse(text) as {
+      settings: ISettingRegistry.IPlugin[];
+    };
+    return settings;
+  }
+
   /**
    * Override the default values of the plugin settings listed
    * in `SETTING_OVERRIDES`.
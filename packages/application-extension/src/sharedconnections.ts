@@ -0,0 +1,191 @@
+// Copyright (c) Jupyter Development Team.
+// Distributed under the terms of the Modified BSD License.
+
+import { PageConfig, URLExt } from '@jupyterlab/coreutils';
+
+import { PromiseDelegate } from '@lumino/coreutils';
+
+/**
+ * The REST endpoints polled by every tab, whose responses are shared.
+ */
+const SHARED_ENDPOINTS = [
+  'api/kernels',
+  'api/kernelspecs',
+  'api/me',
+  'api/sessions',
+  'api/terminals',
+];
+
+/**
+ * The status codes of the responses without a body.
+ */
+const NULL_BODY_STATUSES = [101, 204, 205, 304];
+
+/**
+ * The name of the shared worker, tabs using the same one share their requests.
+ */
+const WORKER_NAME = 'jupyter-notebook-connections';
+
+/**
+ * A fetch function sending the polling requests of the tab to a shared worker.
+ *
+ * #### Notes
+ * The worker answers the requests of all the notebook tabs of a server, so
+ * the kernels, sessions, terminals, kernel specs and user models are fetched
+ * once per period for all the tabs instead of once per tab. Changing the
+ * state of one of these endpoints drops the shared responses, and the
+ * requests go to the server directly if the worker cannot be loaded.
+ */
+export class SharedConnections {
+  /**
+   * Construct a new shared connections object.
+   */
+  constructor(options: SharedConnections.IOptions) {
+    this._fetch = options.fetch;
+    this._endpoints = SHARED_ENDPOINTS.map(
+      (endpoint) => new URL(URLExt.join(options.baseUrl, endpoint)).href
+    );
+    this._worker = new SharedWorker(options.workerUrl, { name: WORKER_NAME });
+    this._worker.addEventListener('error', this._onError);
+    this._worker.port.onmessage = this._onMessage;
+    this._worker.port.start();
+  }
+
+  /**
+   * Fetch a resource, through the shared worker for the polling requests.
+   */
+  readonly fetch = async (
+    input: RequestInfo | URL,
+    init?: RequestInit
+  ): Promise<Response> => {
+    const request = new Request(input, init);
+    const url = new URL(request.url);
+    const path = `${url.origin}${url.pathname}`.replace(/\/$/, '');
+    const endpoint = this._endpoints.find(
+      (endpoint) => path === endpoint || path.startsWith(`${endpoint}/`)
+    );
+    if (!endpoint || !this._worker) {
+      return this._fetch(request);
+    }
+
+    if (request.method !== 'GET') {
+      const response = await this._fetch(request);
+      this._worker?.port.postMessage({ invalidate: endpoint });
+      return response;
+    }
+
+    // Only the lists of models are polled, the single models are not shared.
+    if (path !== endpoint) {
+      return this._fetch(request);
+    }
+
+    const headers: { [name: string]: string } = {};
+    request.headers.forEach((value, name) => {
+      headers[name] = value;
+    });
+    const id = ++this._requestId;
+    const delegate = new PromiseDelegate<Response>();
+    this._pending.set(id, { delegate, request });
+    this._worker.port.postMessage({ id, url: request.url, headers });
+    return delegate.promise;
+  };
+
+  /**
+   * Handle a response of the shared worker.
+   */
+  private _onMessage = (event: MessageEvent): void => {
+    const { id, error, status, statusText, headers, body } = event.data;
+    const pending = this._pending.get(id);
+    if (!pending) {
+      return;
+    }
+    this._pending.delete(id);
+    if (error !== undefined) {
+      // Like fetch, fail with a TypeError on network errors.
+      pending.delegate.reject(new TypeError(error));
+      return;
+    }
+    pending.delegate.resolve(
+      new Response(NULL_BODY_STATUSES.includes(status) ? null : body, {
+        status,
+        statusText,
+        headers,
+      })
+    );
+  };
+
+  /**
+   * Send the requests to the server directly if the worker failed.
+   */
+  private _onError = (): void => {
+    console.warn('Failed to load the shared worker, not sharing connections.');
+    this._worker = null;
+    for (const { delegate, request } of this._pending.values()) {
+      this._fetch(request).then(delegate.resolve, delegate.reject);
+    }
+    this._pending.clear();
+  };
+
+  private _endpoints: string[];
+  private _fetch: SharedConnections.FetchFunction;
+  private _pending = new Map<
+    number,
+    { delegate: PromiseDelegate<Response>; request: Request }
+  >();
+  private _requestId = 0;
+  private _worker: SharedWorker | null;
+}
+
+/**
+ * A namespace for SharedConnections statics.
+ */
+export namespace SharedConnections {
+  /**
+   * A fetch function.
+   */
+  export type FetchFunction = (
+    input: RequestInfo | URL,
+    init?: RequestInit
+  ) => Promise<Response>;
+
+  /**
+   * The instantiation options for shared connections.
+   */
+  export interface IOptions {
+    /**
+     * The base url of the server.
+     */
+    baseUrl: string;
+
+    /**
+     * The url of the shared worker script.
+     */
+    workerUrl: string;
+
+    /**
+     * The fetch function used for the requests that are not shared.
+     */
+    fetch: FetchFunction;
+  }
+
+  /**
+   * Whether the connections are shared, which is opted in on the server.
+   */
+  export function isEnabled(): boolean {
+    return (
+      PageConfig.getOption('shareConnections') === 'true' &&
+      typeof SharedWorker !== 'undefined'
+    );
+  }
+
+  /**
+   * The url of the shared worker script, versioned so it can be cached.
+   */
+  export function getWorkerUrl(): string {
+    const url = URLExt.join(
+      PageConfig.getOption('fullStaticUrl'),
+      'connections-worker.js'
+    );
+    return `${url}?v=${encodeURIComponent(PageConfig.getOption('appVersion'))}`;
+  }
+}
@@ -6,3 +6,8 @@ export * from './shell';
 export * from './panelhandler';
 export * from './pathopener';
 export * from './tokens';
+export * from './pageddrive';
+export * from './kernelevents';
+export * from './lazyoutputs';
+export * from './notebookdrive';
+export * from './outputlimits';
@@ -0,0 +1,157 @@
+// Copyright (c) Jupyter Development Team.
+// Distributed under the terms of the Modified BSD License.
+
+import { PageConfig } from '@jupyterlab/coreutils';
+
+import { Event } from '@jupyterlab/services';
+
+import { Poll } from '@lumino/polling';
+
+import { IKernelEvents } from './tokens';
+
+/**
+ * The id of the schema of the kernels events emitted by the server.
+ */
+export const KERNELS_EVENT_SCHEMA_ID =
+  'https://events.jupyter.org/jupyter_notebook/kernels/v1';
+
+/**
+ * How often, in milliseconds, the managers watched are refreshed anyway, to
+ * catch up on the events missed while the events socket reconnects.
+ */
+const FALLBACK_INTERVAL = 60 * 1000;
+
+/**
+ * The changes of the kernels, sessions and kernel specs, as pushed by the
+ * server.
+ *
+ * #### Notes
+ * When the server pushes these events, the polls of the managers watched are
+ * in standby, and the managers are refreshed when the server pushes their
+ * changes, instead of every tab polling the server on a timer. They are also
+ * refreshed every minute while the page is visible, for the events missed.
+ */
+export class KernelEvents implements IKernelEvents {
+  /**
+   * Construct a new kernel events object.
+   */
+  constructor(options: KernelEvents.IOptions) {
+    const { events } = options;
+    this.enabled = !!events && PageConfig.getOption('kernelEvents') === 'true';
+    if (events && this.enabled) {
+      events.stream.connect(this._onEvent, this);
+      this._fallback = new Poll({
+        auto: false,
+        // The managers are fetched once when watched, not when the poll starts.
+        factory: ({ phase }) =>
+          phase === 'started' ? Promise.resolve() : this._refreshAll(),
+        frequency: { interval: FALLBACK_INTERVAL, backoff: false },
+        name: '@jupyter-notebook/application:KernelEvents#fallback',
+        standby: 'when-hidden',
+      });
+    }
+  }
+
+  /**
+   * Whether the server pushes the kernel events.
+   */
+  readonly enabled: boolean;
+
+  /**
+   * The standby of the polls of the managers watched: always, unless they
+   * are being refreshed.
+   */
+  readonly standby = (): boolean | Poll.Standby => {
+    if (!this.enabled) {
+      return 'when-hidden';
+    }
+    return this._refreshing > 0 ? 'never' : true;
+  };
+
+  /**
+   * Refresh managers when the server pushes their changes, after fetching
+   * their models once.
+   */
+  watch(managers: IKernelEvents.IManagers): void {
+    Object.assign(this._managers, managers);
+    for (const manager of Object.values(managers)) {
+      void this._refresh(() => manager.ready);
+    }
+    void this._fallback?.start();
+  }
+
+  /**
+   * Handle an event pushed by the server.
+   */
+  private _onEvent(sender: Event.IManager, event: Event.Emission): void {
+    if (event.schema_id !== KERNELS_EVENT_SCHEMA_ID) {
+      return;
+    }
+    const { kernels, sessions, kernelspecs } = this._managers;
+    switch (event.action) {
+      case 'kernels':
+        if (kernels) {
+          void this._refresh(() => kernels.refreshRunning());
+        }
+        if (sessions) {
+          void this._refresh(() => sessions.refreshRunning());
+        }
+        break;
+      case 'sessions':
+        if (sessions) {
+          void this._refresh(() => sessions.refreshRunning());
+        }
+        break;
+      case 'kernelspecs':
+        if (kernelspecs) {
+          void this._refresh(() => kernelspecs.refreshSpecs());
+        }
+        break;
+    }
+  }
+
+  /**
+   * Refresh all the managers watched.
+   */
+  private async _refreshAll(): Promise<void> {
+    const { kernels, sessions, kernelspecs } = this._managers;
+    await Promise.all([
+      kernels && this._refresh(() => kernels.refreshRunning()),
+      sessions && this._refresh(() => sessions.refreshRunning()),
+      kernelspecs && this._refresh(() => kernelspecs.refreshSpecs()),
+    ]);
+  }
+
+  /**
+   * Refresh a manager, taking its poll out of standby meanwhile.
+   */
+  private async _refresh(refresh: () => Promise<void>): Promise<void> {
+    this._refreshing++;
+    try {
+      await refresh();
+    } catch (reason) {
+      console.error('Failed to refresh from the kernel events', reason);
+    } finally {
+      this._refreshing--;
+    }
+  }
+
+  private _fallback: Poll | null = null;
+  private _managers: IKernelEvents.IManagers = {};
+  private _refreshing = 0;
+}
+
+/**
+ * A namespace for KernelEvents statics.
+ */
+export namespace KernelEvents {
+  /**
+   * The instantiation options for kernel events.
+   */
+  export interface IOptions {
+    /**
+     * The manager of the events pushed by the server.
+     */
+    events?: Event.IManager | null;
+  }
+}
@@ -0,0 +1,152 @@
+// Copyright (c) Jupyter Development Team.
+// Distributed under the terms of the Modified BSD License.
+
+import { URLExt } from '@jupyterlab/coreutils';
+
+import { ServerConnection } from '@jupyterlab/services';
+
+/**
+ * The url of the lazy outputs.
+ */
+const OUTPUTS_URL = 'api/notebook/outputs';
+
+/**
+ * The mime type of the outputs replaced by a stub, loaded when visible.
+ */
+export const LAZY_OUTPUT_MIMETYPE =
+  'application/vnd.jupyter.notebook.lazy-output+json';
+
+/**
+ * The stub of a lazy output.
+ */
+export interface ILazyOutputStub {
+  /**
+   * The key of the output.
+   */
+  key: string;
+
+  /**
+   * The path of the notebook of the output, when it was opened.
+   */
+  path: string;
+
+  /**
+   * The size of the output, in bytes.
+   */
+  size: number;
+
+  /**
+   * The mime types of the output.
+   */
+  mimetypes: string[];
+}
+
+/**
+ * A lazy output, as fetched from the server.
+ */
+export interface ILazyOutput {
+  /**
+   * The mime bundle of the output.
+   */
+  data: { [mimetype: string]: any };
+
+  /**
+   * The metadata of the output.
+   */
+  metadata: { [key: string]: any };
+}
+
+/**
+ * Fetch the lazy outputs, batching the outputs shown at the same time in one
+ * request per notebook.
+ */
+export class LazyOutputsFetcher {
+  /**
+   * Construct a new fetcher of lazy outputs.
+   */
+  constructor(options: LazyOutputsFetcher.IOptions = {}) {
+    this.serverSettings =
+      options.serverSettings ?? ServerConnection.makeSettings();
+  }
+
+  /**
+   * The server settings of the fetcher.
+   */
+  readonly serverSettings: ServerConnection.ISettings;
+
+  /**
+   * Fetch the output of a stub.
+   */
+  fetch(stub: ILazyOutputStub): Promise<ILazyOutput> {
+    return new Promise((resolve, reject) => {
+      let batch = this._batches.get(stub.path);
+      if (!batch) {
+        batch = new Map();
+        this._batches.set(stub.path, batch);
+        requestAnimationFrame(() => void this._send(stub.path));
+      }
+      const waiting = batch.get(stub.key) ?? [];
+      waiting.push({ resolve, reject });
+      batch.set(stub.key, waiting);
+    });
+  }
+
+  private async _send(path: string): Promise<void> {
+    const batch = this._batches.get(path);
+    this._batches.delete(path);
+    if (!batch) {
+      return;
+    }
+    const settings = this.serverSettings;
+    const query = [...batch.keys()]
+      .map((key) => `key=${encodeURIComponent(key)}`)
+      .join('&');
+    const url =
+      URLExt.join(settings.baseUrl, OUTPUTS_URL, URLExt.encodeParts(path)) +
+      `?${query}`;
+    try {
+      const response = await ServerConnection.makeRequest(url, {}, settings);
+      if (response.status !== 200) {
+        throw await ServerConnection.ResponseError.create(response);
+      }
+      const { outputs } = await response.json();
+      batch.forEach((waiting, key) => {
+        waiting.forEach(({ resolve }) => resolve(outputs[key]));
+      });
+    } catch (reason) {
+      batch.forEach((waiting) => {
+        waiting.forEach(({ reject }) => reject(reason));
+      });
+    }
+  }
+
+  private _batches = new Map<string, Map<string, Private.IWaiting[]>>();
+}
+
+/**
+ * A namespace for LazyOutputsFetcher statics.
+ */
+export namespace LazyOutputsFetcher {
+  /**
+   * The instantiation options for a fetcher of lazy outputs.
+   */
+  export interface IOptions {
+    /**
+     * The server settings of the fetcher.
+     */
+    serverSettings?: ServerConnection.ISettings;
+  }
+}
+
+/**
+ * A namespace for private data.
+ */
+namespace Private {
+  /**
+   * A request waiting for an output.
+   */
+  export interface IWaiting {
+    resolve: (output: ILazyOutput) => void;
+    reject: (reason: unknown) => void;
+  }
+}
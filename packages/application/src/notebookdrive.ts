@@ -0,0 +1,180 @@
+// Copyright (c) Jupyter Development Team.
+// Distributed under the terms of the Modified BSD License.
+
+import { URLExt } from '@jupyterlab/coreutils';
+
+import { Contents, Drive, ServerConnection } from '@jupyterlab/services';
+
+import { ISignal, Signal } from '@lumino/signaling';
+
+/**
+ * The url of the notebooks of the notebook page.
+ */
+const CONTENTS_URL = 'api/notebook/contents';
+
+/**
+ * The drive of the notebook page, saving the notebooks as the cells changed
+ * since their last save.
+ *
+ * #### Notes
+ * A notebook is first saved whole, and the server keeps it as a revision.
+ * The next saves send the cells changed since that revision, and the ids of
+ * the others. The notebook is saved whole again when the server does not have
+ * the revision anymore, or when the notebook changed on disk.
+ *
+ * With `lazyOutputs`, the large notebooks are fetched with their heavy outputs
+ * replaced by stubs, of the `LAZY_OUTPUT_MIMETYPE`. The server decides which
+ * notebooks are large, and puts the stubs back when they are saved.
+ */
+export class NotebookDrive extends Drive {
+  /**
+   * Construct a new notebook drive.
+   */
+  constructor(options: NotebookDrive.IOptions = {}) {
+    super(options);
+    this._lazyOutputs = options.lazyOutputs ?? false;
+    super.fileChanged.connect((sender, args) => {
+      this._changed.emit(args);
+    });
+  }
+
+  /**
+   * A signal emitted when a file operation takes place.
+   */
+  get fileChanged(): ISignal<this, Contents.IChangedArgs> {
+    return this._changed;
+  }
+
+  /**
+   * Get a file or directory, with the heavy outputs of large notebooks
+   * replaced by stubs with `lazyOutputs`.
+   */
+  async get(
+    localPath: string,
+    options?: Contents.IFetchOptions
+  ): Promise<Contents.IModel> {
+    if (
+      !this._lazyOutputs ||
+      options?.type !== 'notebook' ||
+      options.content === false
+    ) {
+      return super.get(localPath, options);
+    }
+    const response = await this._request(localPath, {});
+    return response.json();
+  }
+
+  /**
+   * Save a file, sending only the cells of a notebook changed since its
+   * last save.
+   */
+  async save(
+    localPath: string,
+    options: Partial<Contents.IModel> = {}
+  ): Promise<Contents.IModel> {
+    if (options.type !== 'notebook' || !options.content) {
+      this._revisions.delete(localPath);
+      return super.save(localPath, options);
+    }
+    const { cells, ...notebook } = options.content;
+    const serialized: string[] = cells.map((cell: any) =>
+      JSON.stringify(cell)
+    );
+    const ids: string[] = cells.map((cell: any) => cell.id);
+    const revision = this._revisions.get(localPath);
+    let response: Response | null = null;
+    if (
+      revision &&
+      new Set(ids).size === ids.length &&
+      ids.every((id) => id)
+    ) {
+      const patch = {
+        ...notebook,
+        revision: revision.id,
+        cells: cells.map((cell: any, i: number) =>
+          revision.cells.get(cell.id) === serialized[i]
+            ? { id: cell.id }
+            : cell
+        ),
+      };
+      response = await this._request(
+        localPath,
+        { method: 'PATCH', body: JSON.stringify(patch) },
+        [409]
+      );
+    }
+    if (!response || response.status === 409) {
+      response = await this._request(localPath, {
+        method: 'PUT',
+        body: JSON.stringify(options),
+      });
+    }
+    const { revision: id, ...model } = await response.json();
+    this._revisions.set(localPath, {
+      id,
+      cells: new Map(ids.map((cellId, i) => [cellId, serialized[i]])),
+    });
+    this._changed.emit({ type: 'save', oldValue: null, newValue: model });
+    return model;
+  }
+
+  /**
+   * Make a request to the notebook contents of the notebook page.
+   */
+  private async _request(
+    localPath: string,
+    init: RequestInit,
+    expected: number[] = []
+  ): Promise<Response> {
+    const settings = this.serverSettings;
+    const url = URLExt.join(
+      settings.baseUrl,
+      CONTENTS_URL,
+      URLExt.encodeParts(localPath)
+    );
+    const response = await ServerConnection.makeRequest(url, init, settings);
+    if (response.status !== 200 && !expected.includes(response.status)) {
+      throw await ServerConnection.ResponseError.create(response);
+    }
+    return response;
+  }
+
+  private _lazyOutputs: boolean;
+  private _revisions = new Map<string, Private.IRevision>();
+  private _changed = new Signal<this, Contents.IChangedArgs>(this);
+}
+
+/**
+ * A namespace for NotebookDrive statics.
+ */
+export namespace NotebookDrive {
+  /**
+   * The instantiation options for a notebook drive.
+   */
+  export interface IOptions extends Drive.IOptions {
+    /**
+     * Whether to fetch the large notebooks with lazy outputs.
+     */
+    lazyOutputs?: boolean;
+  }
+}
+
+/**
+ * A namespace for private data.
+ */
+namespace Private {
+  /**
+   * The last revision of a notebook saved.
+   */
+  export interface IRevision {
+    /**
+     * The id of the revision, on the server.
+     */
+    id: string;
+
+    /**
+     * The cells of the notebook, as JSON by id.
+     */
+    cells: Map<string, string>;
+  }
+}
@@ -0,0 +1,71 @@
+// Copyright (c) Jupyter Development Team.
+// Distributed under the terms of the Modified BSD License.
+
+import { PageConfig, URLExt } from '@jupyterlab/coreutils';
+
+import { ServerConnection } from '@jupyterlab/services';
+
+/**
+ * The url of the rest of the outputs of the truncated cells.
+ */
+const TRUNCATED_OUTPUTS_URL = 'api/notebook/truncated-outputs';
+
+/**
+ * The mime type of the stub replacing the outputs of a cell past the output
+ * size limits of the server.
+ */
+export const TRUNCATED_OUTPUT_MIMETYPE =
+  'application/vnd.jupyter.notebook.truncated-output+json';
+
+/**
+ * The stub of the truncated outputs of a cell.
+ */
+export interface ITruncatedOutputStub {
+  /**
+   * The key of the outputs of the cell not shown.
+   */
+  key: string;
+
+  /**
+   * The size of the outputs not shown, in bytes.
+   */
+  size: number;
+
+  /**
+   * The number of outputs of the cell not shown.
+   */
+  outputs: number;
+}
+
+/**
+ * Whether the server limits the size of the outputs of the notebooks.
+ */
+export function hasOutputLimits(): boolean {
+  return ['maxCellOutputSize', 'maxNotebookOutputSize'].some(
+    (option) => parseInt(PageConfig.getOption(option) || '0', 10) > 0
+  );
+}
+
+/**
+ * Fetch the outputs of a truncated cell not shown, following its stub.
+ *
+ * @param stub The stub of the truncated outputs
+ * @param settings The server settings
+ * @returns The outputs not shown, in the nbformat
+ */
+export async function fetchTruncatedOutputs(
+  stub: ITruncatedOutputStub,
+  settings: ServerConnection.ISettings = ServerConnection.makeSettings()
+): Promise<{ [key: string]: any }[]> {
+  const url = URLExt.join(
+    settings.baseUrl,
+    TRUNCATED_OUTPUTS_URL,
+    encodeURIComponent(stub.key)
+  );
+  const response = await ServerConnection.makeRequest(url, {}, settings);
+  if (response.status !== 200) {
+    throw await ServerConnection.ResponseError.create(response);
+  }
+  const { outputs } = await response.json();
+  return outputs;
+}
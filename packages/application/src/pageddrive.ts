@@ -0,0 +1,173 @@
+// Copyright (c) Jupyter Development Team.
+// Distributed under the terms of the Modified BSD License.
+
+import { URLExt } from '@jupyterlab/coreutils';
+
+import { Contents, Drive, ServerConnection } from '@jupyterlab/services';
+
+/**
+ * The url of the paged directory listings.
+ */
+const LISTING_URL = 'api/notebook/listing';
+
+/**
+ * The default number of entries of a directory fetched at once.
+ */
+const DEFAULT_PAGE_SIZE = 500;
+
+/**
+ * A drive fetching the listings of the directories one page at a time.
+ *
+ * #### Notes
+ * Only the first page of a directory is fetched at first, and `loadMore`
+ * fetches the next page and appends it to the listing, for example when the
+ * user scrolls to the end of a file browser. The next `get` of the directory
+ * returns the extended listing, and the later ones fetch the entries loaded
+ * so far again.
+ */
+export class PagedDrive extends Drive {
+  /**
+   * Construct a new paged drive.
+   */
+  constructor(options: PagedDrive.IOptions = {}) {
+    super(options);
+    this.pageSize = options.pageSize ?? DEFAULT_PAGE_SIZE;
+  }
+
+  /**
+   * The number of entries of a page.
+   */
+  readonly pageSize: number;
+
+  /**
+   * Get a file or directory, with the loaded pages of a directory listing.
+   */
+  async get(
+    localPath: string,
+    options?: Contents.IFetchOptions
+  ): Promise<Contents.IModel> {
+    if (
+      options?.content === false ||
+      (options?.type ?? 'directory') !== 'directory'
+    ) {
+      return super.get(localPath, options);
+    }
+
+    const listing = this._listings.get(localPath);
+    if (listing && this._extended.delete(localPath)) {
+      return { ...listing, content: [...listing.content] };
+    }
+    const limit = Math.max(this.pageSize, listing?.content.length ?? 0);
+    const model = await this._fetch(localPath, 0, limit);
+    if (!model) {
+      // Not a directory.
+      this._listings.delete(localPath);
+      return super.get(localPath, options);
+    }
+    this._listings.set(localPath, model);
+    return { ...model, content: [...model.content] };
+  }
+
+  /**
+   * Whether a directory has entries that are not loaded yet.
+   */
+  hasMore(localPath: string): boolean {
+    const listing = this._listings.get(localPath);
+    return !!listing && listing.total > listing.content.length;
+  }
+
+  /**
+   * Fetch the next page of a directory listing, for the next `get`.
+   *
+   * @returns Whether a page was loaded.
+   */
+  async loadMore(localPath: string): Promise<boolean> {
+    const listing = this._listings.get(localPath);
+    if (!listing || !this.hasMore(localPath)) {
+      return false;
+    }
+    const page = await this._fetch(
+      localPath,
+      listing.content.length,
+      this.pageSize
+    );
+    if (!page || this._listings.get(localPath) !== listing) {
+      // Fetched again meanwhile.
+      return false;
+    }
+    // Entries created since the previous page may shift the next ones.
+    const names = new Set(
+      listing.content.map((entry: Contents.IModel) => entry.name)
+    );
+    listing.content.push(
+      ...page.content.filter((entry: Contents.IModel) => !names.has(entry.name))
+    );
+    listing.total = page.total;
+    this._extended.add(localPath);
+    return true;
+  }
+
+  /**
+   * Fetch a page of a directory listing, or null if it is not a directory.
+   */
+  private async _fetch(
+    localPath: string,
+    offset: number,
+    limit: number
+  ): Promise<Private.IListing | null> {
+    const settings = this.serverSettings;
+    const url =
+      URLExt.join(
+        settings.baseUrl,
+        LISTING_URL,
+        URLExt.encodeParts(localPath)
+      ) +
+      URLExt.objectToQueryString({ offset: `${offset}`, limit: `${limit}` });
+    const response = await ServerConnection.makeRequest(url, {}, settings);
+    if (response.status === 400) {
+      return null;
+    }
+    if (response.status !== 200) {
+      throw await ServerConnection.ResponseError.create(response);
+    }
+    return response.json();
+  }
+
+  private _listings = new Map<string, Private.IListing>();
+  private _extended = new Set<string>();
+}
+
+/**
+ * A namespace for PagedDrive statics.
+ */
+export namespace PagedDrive {
+  /**
+   * The instantiation options for a paged drive.
+   */
+  export interface IOptions extends Drive.IOptions {
+    /**
+     * The number of entries of a directory fetched at once.
+     */
+    pageSize?: number;
+  }
+}
+
+/**
+ * A namespace for private data.
+ */
+namespace Private {
+  /**
+   * A page of a directory listing, or the pages loaded so far.
+   */
+  export interface IListing extends Contents.IModel {
+    /**
+     * The entries of the directory.
+     */
+    content: Contents.IModel[];
+
+    /**
+     * The number of entries of the directory.
+     */
+    total: number;
+  }
+}
@@ -1,5 +1,9 @@
+import { Kernel, KernelSpec, Session } from '@jupyterlab/services';
+
 import { Token } from '@lumino/coreutils';
 
+import { Poll } from '@lumino/polling';
+
 /**
  * The INotebookPathOpener interface.
  */
@@ -55,3 +59,42 @@ export namespace INotebookPathOpener {
 export const INotebookPathOpener = new Token<INotebookPathOpener>(
   '@jupyter-notebook/application:INotebookPathOpener'
 );
+
+/**
+ * The status of the kernels, and the changes of the kernels, sessions and
+ * kernel specs, as pushed by the server.
+ */
+export interface IKernelEvents {
+  /**
+   * Whether the server pushes the kernel events.
+   */
+  readonly enabled: boolean;
+
+  /**
+   * The standby of the polls of the managers refreshed by the events.
+   */
+  readonly standby: () => boolean | Poll.Standby;
+
+  /**
+   * Refresh managers when the server pushes their changes.
+   */
+  watch(managers: IKernelEvents.IManagers): void;
+}
+
+export namespace IKernelEvents {
+  /**
+   * The managers refreshed by the events.
+   */
+  export interface IManagers {
+    kernels?: Kernel.IManager;
+    sessions?: Session.IManager;
+    kernelspecs?: KernelSpec.IManager;
+  }
+}
+
+/**
+ * The IKernelEvents token.
+ */
+export const IKernelEvents = new Token<IKernelEvents>(
+  '@jupyter-notebook/application:IKernelEvents'
+);
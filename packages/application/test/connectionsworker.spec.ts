@@ -0,0 +1,58 @@
+// Copyright (c) Jupyter Development Team.
+// Distributed under the terms of the Modified BSD License.
+
+describe('connections-worker', () => {
+  let fetch: jest.Mock;
+  let port: {
+    onmessage: (event: any) => Promise<void>;
+    postMessage: jest.Mock;
+  };
+
+  const request = (id: number, url: string) =>
+    port.onmessage({ data: { id, url, headers: {} } });
+
+  beforeEach(() => {
+    fetch = jest.fn(async () => ({
+      status: 200,
+      statusText: 'OK',
+      headers: new Map(),
+      text: async () => '[]',
+    }));
+    (globalThis as any).fetch = fetch;
+    jest.isolateModules(() => {
+      jest.requireActual('../../../app/connections-worker.js');
+    });
+    port = { postMessage: jest.fn() } as any;
+    (self as any).onconnect({ ports: [port] });
+  });
+
+  it('should fetch an endpoint once for all the tabs', async () => {
+    // Each request has its own cache buster.
+    await request(1, 'http://localhost/api/kernels?1712345678901');
+    await request(2, 'http://localhost/api/kernels/?1712345678902');
+    expect(fetch).toHaveBeenCalledTimes(1);
+    expect(port.postMessage).toHaveBeenCalledTimes(2);
+    expect(port.postMessage.mock.calls[1][0]).toMatchObject({
+      id: 2,
+      status: 200,
+      body: '[]',
+    });
+  });
+
+  it('should not share the responses of other queries', async () => {
+    await request(1, 'http://localhost/api/kernels?a=1&1712345678901');
+    await request(2, 'http://localhost/api/kernels?a=2&1712345678902');
+    expect(fetch).toHaveBeenCalledTimes(2);
+  });
+
+  it('should fetch an endpoint again once it is invalidated', async () => {
+    await request(1, 'http://localhost/api/kernels?1712345678901');
+    await request(2, 'http://localhost/api/kernelspecs?1712345678902');
+    await port.onmessage({
+      data: { invalidate: 'http://localhost/api/kernels' },
+    });
+    await request(3, 'http://localhost/api/kernels?1712345678903');
+    await request(4, 'http://localhost/api/kernelspecs?1712345678904');
+    expect(fetch).toHaveBeenCalledTimes(3);
+  });
+});
@@ -0,0 +1,190 @@
+// Copyright (c) Jupyter Development Team.
+// Distributed under the terms of the Modified BSD License.
+
+import { Cell, CodeCell, ICellModel } from '@jupyterlab/cells';
+
+import { IObservableList } from '@jupyterlab/observables';
+
+import { Notebook } from '@jupyterlab/notebook';
+
+import { IDisposable } from '@lumino/disposable';
+
+/**
+ * The class name added to the cells with scrolled outputs.
+ */
+const SCROLLED_OUTPUTS_CLASS = 'jp-mod-outputsScrolled';
+
+/**
+ * Scroll the outputs of the code cells of a notebook once they are taller
+ * than a number of lines.
+ *
+ * #### Notes
+ * The outputs are watched with a `ResizeObserver`, so their heights are
+ * read once per frame after the layout, for all the cells resized in that
+ * frame, instead of on each output message. The cells are tracked as they
+ * are added and removed, without going over the whole notebook.
+ */
+export class OutputAutoScroll implements IDisposable {
+  /**
+   * Construct a new auto scroll of the outputs of a notebook.
+   */
+  constructor(options: OutputAutoScroll.IOptions) {
+    this._notebook = options.notebook;
+    this._threshold = options.threshold;
+    this._enabled = options.enabled ?? true;
+    this._observer = new ResizeObserver((entries) => {
+      this._update(
+        entries
+          .map((entry) => this._nodes.get(entry.target))
+          .filter((cell): cell is CodeCell => !!cell)
+      );
+    });
+    this._notebook.model?.cells.changed.connect(this._onCellsChanged, this);
+    this._notebook.widgets.forEach((cell) => this._track(cell));
+  }
+
+  /**
+   * Whether the outputs are scrolled automatically.
+   */
+  get enabled(): boolean {
+    return this._enabled;
+  }
+  set enabled(value: boolean) {
+    if (value === this._enabled) {
+      return;
+    }
+    this._enabled = value;
+    requestAnimationFrame(() => this._update([...this._cells.values()]));
+  }
+
+  /**
+   * Whether the auto scroll is disposed.
+   */
+  get isDisposed(): boolean {
+    return this._isDisposed;
+  }
+
+  /**
+   * Dispose of the resources held by the auto scroll.
+   */
+  dispose(): void {
+    if (this._isDisposed) {
+      return;
+    }
+    this._isDisposed = true;
+    this._observer.disconnect();
+    this._notebook.model?.cells.changed.disconnect(this._onCellsChanged, this);
+    this._cells.clear();
+    this._nodes.clear();
+  }
+
+  /**
+   * Track the cells added, and forget the cells removed.
+   */
+  private _onCellsChanged(
+    sender: unknown,
+    args: IObservableList.IChangedArgs<ICellModel>
+  ): void {
+    args.oldValues.forEach((model) => this._untrack(model));
+    const widgets = this._notebook.widgets;
+    args.newValues.forEach((model, i) => {
+      // The notebook creates the widgets of the new cells first.
+      let cell: Cell | undefined = widgets[args.newIndex + i];
+      if (cell?.model !== model) {
+        cell = widgets.find((widget) => widget.model === model);
+      }
+      if (cell) {
+        this._track(cell);
+      }
+    });
+  }
+
+  private _track(cell: Cell): void {
+    if (cell.model.type !== 'code' || this._cells.has(cell.model.id)) {
+      return;
+    }
+    const codeCell = cell as CodeCell;
+    this._cells.set(cell.model.id, codeCell);
+    this._nodes.set(codeCell.outputArea.node, codeCell);
+    this._observer.observe(codeCell.outputArea.node);
+  }
+
+  private _untrack(model: ICellModel): void {
+    const cell = this._cells.get(model.id);
+    if (!cell || cell.model !== model) {
+      return;
+    }
+    this._cells.delete(model.id);
+    this._nodes.delete(cell.outputArea.node);
+    this._observer.unobserve(cell.outputArea.node);
+  }
+
+  /**
+   * Scroll the outputs of cells, reading all the heights before changing
+   * any class so the layout is computed once.
+   */
+  private _update(cells: CodeCell[]): void {
+    const changes = cells.map((cell) => this._shouldScroll(cell));
+    cells.forEach((cell, i) => {
+      const scroll = changes[i];
+      if (scroll !== null) {
+        // do not set via cell.outputScrolled = true, as this would
+        // otherwise synchronize the scrolled state to the notebook metadata
+        cell.toggleClass(SCROLLED_OUTPUTS_CLASS, scroll);
+      }
+    });
+  }
+
+  /**
+   * Decide whether to scroll the output of a cell, or leave it as is.
+   */
+  private _shouldScroll(cell: CodeCell): boolean | null {
+    if (cell.isDisposed) {
+      return null;
+    }
+    if (!this._enabled) {
+      return false;
+    }
+    // respect cells with an explicit scrolled state
+    if (cell.model.getMetadata('scrolled') !== undefined) {
+      return null;
+    }
+    const { node } = cell.outputArea;
+    const fontSize = parseFloat(node.style.fontSize.replace('px', ''));
+    const lineHeight = (fontSize || 14) * 1.3;
+    return node.scrollHeight > lineHeight * this._threshold;
+  }
+
+  private _notebook: Notebook;
+  private _threshold: number;
+  private _enabled: boolean;
+  private _isDisposed = false;
+  private _observer: ResizeObserver;
+  private _cells = new Map<string, CodeCell>();
+  private _nodes = new Map<Element, CodeCell>();
+}
+
+/**
+ * A namespace for OutputAutoScroll statics.
+ */
+export namespace OutputAutoScroll {
+  /**
+   * The instantiation options for an output auto scroll.
+   */
+  export interface IOptions {
+    /**
+     * The notebook of the outputs.
+     */
+    notebook: Notebook;
+
+    /**
+     * The number of lines over which the outputs are scrolled.
+     */
+    threshold: number;
+
+    /**
+     * Whether the outputs are scrolled automatically, true by default.
+     */
+    enabled?: boolean;
+  }
+}
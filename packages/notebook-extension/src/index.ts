@@ -15,8 +15,6 @@ import {
   showDialog,
 } from '@jupyterlab/apputils';
 
-import { Cell, CodeCell } from '@jupyterlab/cells';
-
 import { PageConfig, Text, Time, URLExt } from '@jupyterlab/coreutils';
 
 import { IDebugger, IDebuggerSidebar } from '@jupyterlab/debugger';
@@ -27,6 +25,8 @@ import { DocumentRegistry } from '@jupyterlab/docregistry';
 
 import { IMainMenu } from '@jupyterlab/mainmenu';
 
+import { IRenderMimeRegistry } from '@jupyterlab/rendermime';
+
 import {
   NotebookPanel,
   INotebookTracker,
@@ -39,7 +39,10 @@ import { ITableOfContentsTracker } from '@jupyterlab/toc';
 
 import { ITranslator, nullTranslator } from '@jupyterlab/translation';
 
-import { INotebookShell } from '@jupyter-notebook/application';
+import {
+  INotebookShell,
+  LazyOutputsFetcher,
+} from '@jupyter-notebook/application';
 
 import { find } from '@lumino/algorithm';
 
@@ -47,8 +50,20 @@ import { Poll } from '@lumino/polling';
 
 import { Widget } from '@lumino/widgets';
 
+import { OutputAutoScroll } from './autoscroll';
+
+import { LazyOutputRenderer } from './lazyoutputs';
+
+import { TruncatedOutputRenderer } from './truncatedoutputs';
+
 import { TrustedComponent } from './trusted';
 
+/**
+ * The id of the schema of the checkpoints events emitted by the server.
+ */
+const CHECKPOINTS_EVENT_SCHEMA_ID =
+  'https://events.jupyter.org/jupyter_notebook/checkpoints/v1';
+
 /**
  * The class for kernel status errors.
  */
@@ -69,11 +84,6 @@ const KERNEL_STATUS_INFO_CLASS = 'jp-NotebookKernelStatus-info';
  */
 const KERNEL_STATUS_FADE_OUT_CLASS = 'jp-NotebookKernelStatus-fade';
 
-/**
- * The class for scrolled outputs
- */
-const SCROLLED_OUTPUTS_CLASS = 'jp-mod-outputsScrolled';
-
 /**
  * The class for the full width notebook
  */
@@ -136,6 +146,13 @@ const checkpoints: JupyterFrontEndPlugin<void> = {
       return context;
     };
 
+    const showCheckpoint = (lastModified: string) => {
+      node.textContent = trans.__(
+        'Last Checkpoint: %1',
+        Time.formatHuman(new Date(lastModified))
+      );
+    };
+
     const updateCheckpointDisplay = async () => {
       const current = getCurrent();
       if (!current) {
@@ -147,17 +164,40 @@ const checkpoints: JupyterFrontEndPlugin<void> = {
         return;
       }
       const checkpoint = checkpoints[checkpoints.length - 1];
-      node.textContent = trans.__(
-        'Last Checkpoint: %1',
-        Time.formatHuman(new Date(checkpoint.last_modified))
-      );
+      showCheckpoint(checkpoint.last_modified);
     };
 
+    // When the server pushes the checkpoints events, the indicator is updated
+    // as they come instead of polling the checkpoints of the current file.
+    const { events } = app.serviceManager;
+    const checkpointEvents =
+      !!events && PageConfig.getOption('checkpointEvents') === 'true';
+
+    if (checkpointEvents) {
+      events.stream.connect((_, event) => {
+        if (event.schema_id !== CHECKPOINTS_EVENT_SCHEMA_ID) {
+          return;
+        }
+        const current = getCurrent();
+        if (!current || current.localPath !== event.path) {
+          return;
+        }
+        if (
+          event.action === 'create' &&
+          typeof event.last_modified === 'string'
+        ) {
+          showCheckpoint(event.last_modified);
+        } else {
+          void updateCheckpointDisplay();
+        }
+      });
+    }
+
     const onSaveState = async (
       sender: DocumentRegistry.IContext<DocumentRegistry.IModel>,
       state: DocumentRegistry.SaveState
     ) => {
-      if (state !== 'completed') {
+      if (state !== 'completed' || checkpointEvents) {
         return;
       }
       // Add a small artificial delay so that the UI can pick up the newly created checkpoint.
@@ -190,7 +230,7 @@ const checkpoints: JupyterFrontEndPlugin<void> = {
       if (poll) {
         poll.dispose();
       }
-      if (checkpointPollingInterval > 0) {
+      if (checkpointPollingInterval > 0 && !checkpointEvents) {
         poll = new Poll({
           auto: true,
           factory: () => updateCheckpointDisplay(),
@@ -488,6 +528,7 @@ const kernelLogo: JupyterFrontEndPlugin<void> = {
 
     app.started.then(() => {
       shell.currentChanged.connect(onChange);
+      serviceManager.kernelspecs.specsChanged.connect(onChange);
     });
   },
 };
@@ -555,6 +596,56 @@ const kernelStatus: JupyterFrontEndPlugin<void> = {
   },
 };
 
+/**
+ * A plugin rendering the stubs of the heavy outputs of large notebooks, and
+ * loading their outputs when they are shown.
+ */
+const lazyOutputs: JupyterFrontEndPlugin<void> = {
+  id: '@jupyter-notebook/notebook-extension:lazy-outputs',
+  description: 'A plugin to load the heavy outputs of notebooks lazily.',
+  autoStart: true,
+  requires: [IRenderMimeRegistry],
+  activate: (app: JupyterFrontEnd, rendermime: IRenderMimeRegistry) => {
+    const threshold = parseInt(
+      PageConfig.getOption('lazyOutputsThreshold') || '0',
+      10
+    );
+    if (threshold <= 0) {
+      return;
+    }
+    const fetcher = new LazyOutputsFetcher({
+      serverSettings: app.serviceManager.serverSettings,
+    });
+    // Added before the notebooks clone the registry.
+    rendermime.addFactory(
+      LazyOutputRenderer.createFactory(fetcher, rendermime),
+      0
+    );
+  },
+};
+
+/**
+ * A plugin rendering the stubs of the outputs truncated by the server, and
+ * loading the full outputs on demand.
+ */
+const truncatedOutputs: JupyterFrontEndPlugin<void> = {
+  id: '@jupyter-notebook/notebook-extension:truncated-outputs',
+  description: 'A plugin to show the outputs truncated by the server.',
+  autoStart: true,
+  requires: [IRenderMimeRegistry],
+  activate: (app: JupyterFrontEnd, rendermime: IRenderMimeRegistry) => {
+    // The notebooks saved with truncated outputs keep their stubs, even once
+    // the limits are lifted.
+    rendermime.addFactory(
+      TruncatedOutputRenderer.createFactory(
+        rendermime,
+        app.serviceManager.serverSettings
+      ),
+      0
+    );
+  },
+};
+
 /**
  * A plugin to enable scrolling for outputs by default.
  * Mimic the logic from the classic notebook, as found here:
@@ -573,53 +664,18 @@ const scrollOutput: JupyterFrontEndPlugin<void> = {
   ) => {
     const autoScrollThreshold = 100;
     let autoScrollOutputs = true;
-
-    // decide whether to scroll the output of the cell based on some heuristics
-    const autoScroll = (cell: CodeCell) => {
-      if (!autoScrollOutputs) {
-        // bail if disabled via the settings
-        cell.removeClass(SCROLLED_OUTPUTS_CLASS);
-        return;
-      }
-      const { outputArea } = cell;
-      // respect cells with an explicit scrolled state
-      const scrolled = cell.model.getMetadata('scrolled');
-      if (scrolled !== undefined) {
-        return;
-      }
-      const { node } = outputArea;
-      const height = node.scrollHeight;
-      const fontSize = parseFloat(node.style.fontSize.replace('px', ''));
-      const lineHeight = (fontSize || 14) * 1.3;
-      // do not set via cell.outputScrolled = true, as this would
-      // otherwise synchronize the scrolled state to the notebook metadata
-      const scroll = height > lineHeight * autoScrollThreshold;
-      cell.toggleClass(SCROLLED_OUTPUTS_CLASS, scroll);
-    };
-
-    const handlers: { [id: string]: () => void } = {};
-
-    const setAutoScroll = (cell: Cell) => {
-      if (cell.model.type === 'code') {
-        const codeCell = cell as CodeCell;
-        const id = codeCell.model.id;
-        autoScroll(codeCell);
-        if (handlers[id]) {
-          codeCell.outputArea.model.changed.disconnect(handlers[id]);
-        }
-        handlers[id] = () => autoScroll(codeCell);
-        codeCell.outputArea.model.changed.connect(handlers[id]);
-      }
-    };
+    const autoScrolls = new Set<OutputAutoScroll>();
 
     tracker.widgetAdded.connect((sender, notebook) => {
-      // when the notebook widget is created, process all the cells
-      notebook.sessionContext.ready.then(() => {
-        notebook.content.widgets.forEach(setAutoScroll);
+      const autoScroll = new OutputAutoScroll({
+        notebook: notebook.content,
+        threshold: autoScrollThreshold,
+        enabled: autoScrollOutputs,
       });
-
-      notebook.model?.cells.changed.connect((sender, args) => {
-        notebook.content.widgets.forEach(setAutoScroll);
+      autoScrolls.add(autoScroll);
+      notebook.disposed.connect(() => {
+        autoScrolls.delete(autoScroll);
+        autoScroll.dispose();
       });
     });
 
@@ -628,6 +684,9 @@ const scrollOutput: JupyterFrontEndPlugin<void> = {
       const updateSettings = (settings: ISettingRegistry.ISettings): void => {
         autoScrollOutputs = settings.get('autoScrollOutputs')
           .composite as boolean;
+        autoScrolls.forEach((autoScroll) => {
+          autoScroll.enabled = autoScrollOutputs;
+        });
       };
 
       Promise.all([loadSettings, app.restored])
@@ -949,10 +1008,12 @@ const plugins: JupyterFrontEndPlugin<any>[] = [
   fullWidthNotebook,
   kernelLogo,
   kernelStatus,
+  lazyOutputs,
   notebookToolsWidget,
   overrideMenuItems,
   scrollOutput,
   tabIcon,
+  truncatedOutputs,
   trusted,
 ];
 
@@ -0,0 +1,191 @@
+// Copyright (c) Jupyter Development Team.
+// Distributed under the terms of the Modified BSD License.
+
+import { IRenderMimeRegistry, MimeModel } from '@jupyterlab/rendermime';
+
+import { IRenderMime } from '@jupyterlab/rendermime-interfaces';
+
+import { TranslationBundle, nullTranslator } from '@jupyterlab/translation';
+
+import {
+  ILazyOutputStub,
+  LAZY_OUTPUT_MIMETYPE,
+  LazyOutputsFetcher,
+} from '@jupyter-notebook/application';
+
+import { PanelLayout, Widget } from '@lumino/widgets';
+
+/**
+ * The class name added to the lazy outputs.
+ */
+const LAZY_OUTPUT_CLASS = 'jp-LazyOutput';
+
+/**
+ * The class name added to the placeholder of a lazy output.
+ */
+const LAZY_OUTPUT_PLACEHOLDER_CLASS = 'jp-LazyOutput-placeholder';
+
+/**
+ * How far from the viewport the lazy outputs start loading.
+ */
+const ROOT_MARGIN = '500px';
+
+/**
+ * A renderer of the stubs of the lazy outputs, fetching and rendering the
+ * output of a stub once it gets close to the viewport.
+ */
+export class LazyOutputRenderer
+  extends Widget
+  implements IRenderMime.IRenderer
+{
+  /**
+   * Construct a new lazy output renderer.
+   */
+  constructor(options: LazyOutputRenderer.IOptions) {
+    super();
+    this.addClass(LAZY_OUTPUT_CLASS);
+    this.layout = new PanelLayout();
+    this._options = options;
+    this._trans = (options.translator ?? nullTranslator).load('notebook');
+    this._placeholder.addClass(LAZY_OUTPUT_PLACEHOLDER_CLASS);
+    (this.layout as PanelLayout).addWidget(this._placeholder);
+  }
+
+  /**
+   * Render the placeholder of a stub, and load its output when visible.
+   */
+  renderModel(model: IRenderMime.IMimeModel): Promise<void> {
+    const stub = model.data[LAZY_OUTPUT_MIMETYPE] as unknown as ILazyOutputStub;
+    this._placeholder.node.textContent = this._trans.__(
+      'Output of %1 (%2), loaded when shown',
+      formatBytes(stub.size),
+      stub.mimetypes.join(', ')
+    );
+    this._observer?.disconnect();
+    this._observer = new IntersectionObserver(
+      (entries) => {
+        if (entries.some((entry) => entry.isIntersecting)) {
+          this._observer?.disconnect();
+          this._observer = null;
+          void this._load(model, stub);
+        }
+      },
+      { rootMargin: ROOT_MARGIN }
+    );
+    this._observer.observe(this.node);
+    return Promise.resolve();
+  }
+
+  /**
+   * Dispose of the resources held by the renderer.
+   */
+  dispose(): void {
+    this._observer?.disconnect();
+    this._observer = null;
+    super.dispose();
+  }
+
+  /**
+   * Fetch the output of a stub, and replace the placeholder with it.
+   */
+  private async _load(
+    model: IRenderMime.IMimeModel,
+    stub: ILazyOutputStub
+  ): Promise<void> {
+    const { fetcher, rendermime, ...options } = this._options;
+    try {
+      const output = await fetcher.fetch(stub);
+      // Render with the resolver and the sanitizer of the notebook.
+      const registry = rendermime.clone({
+        resolver: options.resolver ?? undefined,
+        sanitizer: options.sanitizer,
+        linkHandler: options.linkHandler ?? undefined,
+        latexTypesetter: options.latexTypesetter ?? undefined,
+        markdownParser: options.markdownParser ?? undefined,
+        translator: options.translator,
+      });
+      const mimeType = registry.preferredMimeType(
+        output.data,
+        model.trusted ? 'any' : 'ensure'
+      );
+      if (this.isDisposed || !mimeType) {
+        return;
+      }
+      const renderer = registry.createRenderer(mimeType);
+      await renderer.renderModel(
+        new MimeModel({
+          data: output.data,
+          metadata: output.metadata,
+          trusted: model.trusted,
+        })
+      );
+      if (this.isDisposed) {
+        renderer.dispose();
+        return;
+      }
+      this._placeholder.dispose();
+      (this.layout as PanelLayout).addWidget(renderer);
+    } catch (reason) {
+      console.error(`Failed to load the output ${stub.key}`, reason);
+      this._placeholder.node.textContent = this._trans.__(
+        'The output could not be loaded'
+      );
+    }
+  }
+
+  private _options: LazyOutputRenderer.IOptions;
+  private _trans: TranslationBundle;
+  private _placeholder = new Widget();
+  private _observer: IntersectionObserver | null = null;
+}
+
+/**
+ * A namespace for LazyOutputRenderer statics.
+ */
+export namespace LazyOutputRenderer {
+  /**
+   * The instantiation options for a lazy output renderer.
+   */
+  export interface IOptions extends IRenderMime.IRendererOptions {
+    /**
+     * The fetcher of the lazy outputs.
+     */
+    fetcher: LazyOutputsFetcher;
+
+    /**
+     * The registry creating the renderers of the outputs.
+     */
+    rendermime: IRenderMimeRegistry;
+  }
+
+  /**
+   * Create a factory of lazy output renderers.
+   */
+  export function createFactory(
+    fetcher: LazyOutputsFetcher,
+    rendermime: IRenderMimeRegistry
+  ): IRenderMime.IRendererFactory {
+    return {
+      // The stubs are only text, their outputs are rendered as trusted or not.
+      safe: true,
+      mimeTypes: [LAZY_OUTPUT_MIMETYPE],
+      defaultRank: 0,
+      createRenderer: (options) =>
+        new LazyOutputRenderer({ ...options, fetcher, rendermime }),
+    };
+  }
+}
+
+/**
+ * Format a number of bytes for humans.
+ */
+export function formatBytes(bytes: number): string {
+  const units = ['B', 'KiB', 'MiB', 'GiB'];
+  let size = bytes;
+  let unit = 0;
+  while (size >= 1024 && unit < units.length - 1) {
+    size /= 1024;
+    unit++;
+  }
+  return `${size.toFixed(unit ? 1 : 0)} ${units[unit]}`;
+}
@@ -0,0 +1,173 @@
+// Copyright (c) Jupyter Development Team.
+// Distributed under the terms of the Modified BSD License.
+
+import { IRenderMimeRegistry, OutputModel } from '@jupyterlab/rendermime';
+
+import { IRenderMime } from '@jupyterlab/rendermime-interfaces';
+
+import { ServerConnection } from '@jupyterlab/services';
+
+import { TranslationBundle, nullTranslator } from '@jupyterlab/translation';
+
+import {
+  ITruncatedOutputStub,
+  TRUNCATED_OUTPUT_MIMETYPE,
+  fetchTruncatedOutputs,
+} from '@jupyter-notebook/application';
+
+import { PanelLayout, Widget } from '@lumino/widgets';
+
+import { formatBytes } from './lazyoutputs';
+
+/**
+ * The class name added to the truncated outputs.
+ */
+const TRUNCATED_OUTPUT_CLASS = 'jp-TruncatedOutput';
+
+/**
+ * The class name added to the notice of a truncated output.
+ */
+const TRUNCATED_OUTPUT_NOTICE_CLASS = 'jp-TruncatedOutput-notice';
+
+/**
+ * A renderer of the stubs of the truncated outputs, fetching and rendering
+ * the rest of the outputs of the cell on demand.
+ */
+export class TruncatedOutputRenderer
+  extends Widget
+  implements IRenderMime.IRenderer
+{
+  /**
+   * Construct a new truncated output renderer.
+   */
+  constructor(options: TruncatedOutputRenderer.IOptions) {
+    super();
+    this.addClass(TRUNCATED_OUTPUT_CLASS);
+    this.layout = new PanelLayout();
+    this._options = options;
+    this._trans = (options.translator ?? nullTranslator).load('notebook');
+    this._notice.addClass(TRUNCATED_OUTPUT_NOTICE_CLASS);
+    (this.layout as PanelLayout).addWidget(this._notice);
+  }
+
+  /**
+   * Render the notice of a stub, with a button to show the full outputs.
+   */
+  renderModel(model: IRenderMime.IMimeModel): Promise<void> {
+    const stub = model.data[
+      TRUNCATED_OUTPUT_MIMETYPE
+    ] as unknown as ITruncatedOutputStub;
+    const text = document.createElement('span');
+    text.textContent = this._trans.__(
+      'Output truncated, %1 are not shown.',
+      formatBytes(stub.size)
+    );
+    const button = document.createElement('button');
+    button.className = 'jp-mod-styled jp-mod-reject';
+    button.textContent = this._trans.__('Show the full output');
+    button.onclick = () => {
+      button.disabled = true;
+      void this._load(model, stub);
+    };
+    this._notice.node.textContent = '';
+    this._notice.node.append(text, button);
+    return Promise.resolve();
+  }
+
+  /**
+   * Fetch the rest of the outputs of a stub, and replace the notice with them.
+   */
+  private async _load(
+    model: IRenderMime.IMimeModel,
+    stub: ITruncatedOutputStub
+  ): Promise<void> {
+    const { rendermime, serverSettings, ...options } = this._options;
+    try {
+      const outputs = await fetchTruncatedOutputs(stub, serverSettings);
+      // Render with the resolver and the sanitizer of the notebook.
+      const registry = rendermime.clone({
+        resolver: options.resolver ?? undefined,
+        sanitizer: options.sanitizer,
+        linkHandler: options.linkHandler ?? undefined,
+        latexTypesetter: options.latexTypesetter ?? undefined,
+        markdownParser: options.markdownParser ?? undefined,
+        translator: options.translator,
+      });
+      const renderers: IRenderMime.IRenderer[] = [];
+      for (const value of outputs) {
+        const output = new OutputModel({
+          value: value as any,
+          trusted: model.trusted,
+        });
+        const mimeType = registry.preferredMimeType(
+          output.data,
+          model.trusted ? 'any' : 'ensure'
+        );
+        if (!mimeType) {
+          continue;
+        }
+        const renderer = registry.createRenderer(mimeType);
+        await renderer.renderModel(output);
+        renderers.push(renderer);
+      }
+      if (this.isDisposed) {
+        renderers.forEach((renderer) => renderer.dispose());
+        return;
+      }
+      this._notice.dispose();
+      renderers.forEach((renderer) => {
+        (this.layout as PanelLayout).addWidget(renderer);
+      });
+    } catch (reason) {
+      console.error(`Failed to load the outputs ${stub.key}`, reason);
+      this._notice.node.textContent = this._trans.__(
+        'The full output could not be loaded'
+      );
+    }
+  }
+
+  private _options: TruncatedOutputRenderer.IOptions;
+  private _trans: TranslationBundle;
+  private _notice = new Widget();
+}
+
+/**
+ * A namespace for TruncatedOutputRenderer statics.
+ */
+export namespace TruncatedOutputRenderer {
+  /**
+   * The instantiation options for a truncated output renderer.
+   */
+  export interface IOptions extends IRenderMime.IRendererOptions {
+    /**
+     * The registry creating the renderers of the outputs.
+     */
+    rendermime: IRenderMimeRegistry;
+
+    /**
+     * The server settings used to fetch the outputs.
+     */
+    serverSettings: ServerConnection.ISettings;
+  }
+
+  /**
+   * Create a factory of truncated output renderers.
+   */
+  export function createFactory(
+    rendermime: IRenderMimeRegistry,
+    serverSettings: ServerConnection.ISettings
+  ): IRenderMime.IRendererFactory {
+    return {
+      // The stubs are only text, their outputs are rendered as trusted or not.
+      safe: true,
+      mimeTypes: [TRUNCATED_OUTPUT_MIMETYPE],
+      defaultRank: 0,
+      createRenderer: (options) =>
+        new TruncatedOutputRenderer({
+          ...options,
+          rendermime,
+          serverSettings,
+        }),
+    };
+  }
+}
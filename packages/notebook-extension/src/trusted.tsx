@@ -1,37 +1,161 @@
 import { ReactWidget } from '@jupyterlab/apputils';
 
-import { Notebook, NotebookActions } from '@jupyterlab/notebook';
+import { ICellModel } from '@jupyterlab/cells';
+
+import { IChangedArgs } from '@jupyterlab/coreutils';
+
+import {
+  INotebookModel,
+  Notebook,
+  NotebookActions,
+} from '@jupyterlab/notebook';
+
+import { IObservableList } from '@jupyterlab/observables';
 
 import { ITranslator } from '@jupyterlab/translation';
 
+import { IDisposable } from '@lumino/disposable';
+
+import { ISignal, Signal } from '@lumino/signaling';
+
 import React, { useEffect, useState } from 'react';
 
 /**
- * Check if a notebook is trusted
- * @param notebook The notebook to check
- * @returns true if the notebook is trusted, false otherwise
+ * Track whether all the code cells of a notebook are trusted.
+ *
+ * #### Notes
+ * The tracker keeps the number of untrusted code cells, updated as cells are
+ * added, removed or trusted, so checking the trust of a notebook does not
+ * depend on its number of cells.
  */
-const isTrusted = (notebook: Notebook): boolean => {
-  const model = notebook.model;
-  if (!model) {
-    return false;
+export class TrustTracker implements IDisposable {
+  /**
+   * Construct a new trust tracker.
+   *
+   * @param notebook The notebook to track
+   */
+  constructor(notebook: Notebook) {
+    this._notebook = notebook;
+    notebook.modelChanged.connect(this._onModelChanged, this);
+    this._onModelChanged();
+  }
+
+  /**
+   * Whether the notebook has a model, and all its code cells are trusted.
+   */
+  get trusted(): boolean {
+    return !!this._model && this._untrusted === 0;
+  }
+
+  /**
+   * A signal emitted when the notebook becomes trusted or not.
+   */
+  get changed(): ISignal<this, boolean> {
+    return this._changed;
+  }
+
+  /**
+   * Whether the tracker is disposed.
+   */
+  get isDisposed(): boolean {
+    return this._isDisposed;
+  }
+
+  /**
+   * Dispose of the resources held by the tracker.
+   */
+  dispose(): void {
+    if (this._isDisposed) {
+      return;
+    }
+    this._isDisposed = true;
+    this._notebook.modelChanged.disconnect(this._onModelChanged, this);
+    this._unwatch();
+    Signal.clearData(this);
+  }
+
+  private _onModelChanged(): void {
+    const trusted = this.trusted;
+    this._unwatch();
+    this._model = this._notebook.model;
+    if (this._model) {
+      this._model.cells.changed.connect(this._onCellsChanged, this);
+      for (const cell of this._model.cells) {
+        this._add(cell);
+      }
+    }
+    this._emitIfChanged(trusted);
+  }
+
+  private _onCellsChanged(
+    sender: unknown,
+    args: IObservableList.IChangedArgs<ICellModel>
+  ): void {
+    const trusted = this.trusted;
+    args.oldValues.forEach((cell) => this._remove(cell));
+    args.newValues.forEach((cell) => this._add(cell));
+    this._emitIfChanged(trusted);
   }
-  const cells = Array.from(model.cells);
-  let total = 0;
-  let trusted = 0;
 
-  for (const currentCell of cells) {
-    if (currentCell.type !== 'code') {
-      continue;
+  private _onCellStateChanged(
+    cell: ICellModel,
+    args: IChangedArgs<any, any, string>
+  ): void {
+    if (args.name !== 'trusted' || !this._cells.has(cell)) {
+      return;
     }
-    total++;
-    if (currentCell.trusted) {
-      trusted++;
+    const trusted = this.trusted;
+    const untrusted = !cell.trusted;
+    if (untrusted !== this._cells.get(cell)) {
+      this._cells.set(cell, untrusted);
+      this._untrusted += untrusted ? 1 : -1;
     }
+    this._emitIfChanged(trusted);
   }
 
-  return trusted === total;
-};
+  private _add(cell: ICellModel): void {
+    if (cell.type !== 'code' || this._cells.has(cell)) {
+      return;
+    }
+    const untrusted = !cell.trusted;
+    this._cells.set(cell, untrusted);
+    this._untrusted += untrusted ? 1 : 0;
+    cell.stateChanged.connect(this._onCellStateChanged, this);
+  }
+
+  private _remove(cell: ICellModel): void {
+    const untrusted = this._cells.get(cell);
+    if (untrusted === undefined) {
+      return;
+    }
+    this._cells.delete(cell);
+    this._untrusted -= untrusted ? 1 : 0;
+    cell.stateChanged.disconnect(this._onCellStateChanged, this);
+  }
+
+  private _unwatch(): void {
+    this._model?.cells.changed.disconnect(this._onCellsChanged, this);
+    for (const cell of this._cells.keys()) {
+      cell.stateChanged.disconnect(this._onCellStateChanged, this);
+    }
+    this._cells.clear();
+    this._untrusted = 0;
+    this._model = null;
+  }
+
+  private _emitIfChanged(trusted: boolean): void {
+    if (this.trusted !== trusted) {
+      this._changed.emit(this.trusted);
+    }
+  }
+
+  private _notebook: Notebook;
+  private _model: INotebookModel | null = null;
+  private _cells = new Map<ICellModel, boolean>();
+  private _untrusted = 0;
+  private _isDisposed = false;
+  private _changed = new Signal<this, boolean>(this);
+}
 
 /**
  * A React component to display the Trusted badge in the menu bar.
@@ -40,33 +164,31 @@ const isTrusted = (notebook: Notebook): boolean => {
  */
 const TrustedButton = ({
   notebook,
+  tracker,
   translator,
 }: {
   notebook: Notebook;
+  tracker: TrustTracker;
   translator: ITranslator;
 }): JSX.Element => {
   const trans = translator.load('notebook');
-  const [trusted, setTrusted] = useState(isTrusted(notebook));
-
-  const checkTrust = () => {
-    const v = isTrusted(notebook);
-    setTrusted(v);
-  };
+  const [trusted, setTrusted] = useState(tracker.trusted);
 
   const trust = async () => {
+    // The tracker is notified as the cells get trusted.
     await NotebookActions.trust(notebook, translator);
-    checkTrust();
   };
 
   useEffect(() => {
-    notebook.modelContentChanged.connect(checkTrust);
-    notebook.activeCellChanged.connect(checkTrust);
-    checkTrust();
+    const onChanged = (sender: TrustTracker, value: boolean) => {
+      setTrusted(value);
+    };
+    tracker.changed.connect(onChanged);
+    setTrusted(tracker.trusted);
     return () => {
-      notebook.modelContentChanged.disconnect(checkTrust);
-      notebook.activeCellChanged.disconnect(checkTrust);
+      tracker.changed.disconnect(onChanged);
     };
-  });
+  }, [tracker]);
 
   return (
     <button
@@ -101,8 +223,15 @@ export namespace TrustedComponent {
     notebook: Notebook;
     translator: ITranslator;
   }): ReactWidget => {
-    return ReactWidget.create(
-      <TrustedButton notebook={notebook} translator={translator} />
+    const tracker = new TrustTracker(notebook);
+    const widget = ReactWidget.create(
+      <TrustedButton
+        notebook={notebook}
+        tracker={tracker}
+        translator={translator}
+      />
     );
+    widget.disposed.connect(() => tracker.dispose());
+    return widget;
   };
 }
@@ -22,6 +22,8 @@ import {
   IFileBrowserFactory,
 } from '@jupyterlab/filebrowser';
 
+import { Contents, IDefaultDrive } from '@jupyterlab/services';
+
 import { ISettingRegistry } from '@jupyterlab/settingregistry';
 
 import { IRunningSessionManagers, RunningSessions } from '@jupyterlab/running';
@@ -41,6 +43,8 @@ import {
 
 import { Menu, MenuBar } from '@lumino/widgets';
 
+import { PagedDrive } from '@jupyter-notebook/application';
+
 import { NotebookTreeWidget, INotebookTree } from '@jupyter-notebook/tree';
 
 import { FilesActionButtons } from './fileactions';
@@ -50,6 +54,11 @@ import { FilesActionButtons } from './fileactions';
  */
 const FILE_BROWSER_FACTORY = 'FileBrowser';
 
+/**
+ * The distance in pixels to the end of the listing at which more entries load.
+ */
+const LOAD_MORE_THRESHOLD = 200;
+
 /**
  * The namespace for command IDs.
  */
@@ -211,9 +220,11 @@ const loadPlugins: JupyterFrontEndPlugin<void> = {
     // in JupyterLab only
     const allPlugins = JSON.parse(allPluginsOption);
     const pluginsSet = new Set<string>();
+    const excludedSet = new Set<string>();
     Object.keys(allPlugins).forEach((key: string) => {
-      const extensionsAndPlugins: { [key: string]: boolean | [string] } =
-        allPlugins[key];
+      const extensionsAndPlugins: {
+        [key: string]: boolean | string[] | { exclude: string[] };
+      } = allPlugins[key];
       Object.keys(extensionsAndPlugins).forEach((plugin) => {
         const value = extensionsAndPlugins[plugin];
         if (typeof value === 'boolean' && value) {
@@ -222,6 +233,11 @@ const loadPlugins: JupyterFrontEndPlugin<void> = {
           value.forEach((v: string) => {
             pluginsSet.add(v);
           });
+        } else if (value && typeof value === 'object') {
+          pluginsSet.add(plugin);
+          value.exclude.forEach((v: string) => {
+            excludedSet.add(v);
+          });
         }
       });
     });
@@ -233,7 +249,9 @@ const loadPlugins: JupyterFrontEndPlugin<void> = {
           const [extension] = id.split(':');
           // load the plugin if it is built-in the notebook application explicitly
           // either included as an extension or as a plugin directly
-          const hasPlugin = pluginsSet.has(extension) || pluginsSet.has(id);
+          const hasPlugin =
+            (pluginsSet.has(extension) && !excludedSet.has(id)) ||
+            pluginsSet.has(id);
           if (!hasPlugin || isDisabled(id) || id in settingRegistry.plugins) {
             return;
           }
@@ -396,6 +414,52 @@ const notebookTreeWidget: JupyterFrontEndPlugin<INotebookTree> = {
   },
 };
 
+/**
+ * A plugin loading the next entries of large directories when scrolling to
+ * the end of the file browser.
+ */
+const pagedListing: JupyterFrontEndPlugin<void> = {
+  id: '@jupyter-notebook/tree-extension:paged-listing',
+  description:
+    'A plugin loading the next entries of large directories when scrolling to the end of the file browser.',
+  requires: [IDefaultFileBrowser, IDefaultDrive],
+  autoStart: true,
+  activate: (
+    app: JupyterFrontEnd,
+    browser: IDefaultFileBrowser,
+    drive: Contents.IDrive
+  ): void => {
+    if (!(drive instanceof PagedDrive)) {
+      return;
+    }
+
+    let loading = false;
+    const onScroll = async (event: Event): Promise<void> => {
+      const node = event.target as HTMLElement;
+      const { path } = browser.model;
+      if (
+        loading ||
+        node.scrollTop + node.clientHeight <
+          node.scrollHeight - LOAD_MORE_THRESHOLD ||
+        !drive.hasMore(path)
+      ) {
+        return;
+      }
+      loading = true;
+      try {
+        // Only the next page is fetched, the refresh shows it.
+        if (await drive.loadMore(path)) {
+          await browser.model.refresh();
+        }
+      } finally {
+        loading = false;
+      }
+    };
+    // The listing is the scrolled descendant, scroll events do not bubble.
+    browser.node.addEventListener('scroll', onScroll, true);
+  },
+};
+
 /**
  * Export the plugins as default.
  */
@@ -406,5 +470,6 @@ const plugins: JupyterFrontEndPlugin<any>[] = [
   loadPlugins,
   openFileBrowser,
   notebookTreeWidget,
+  pagedListing,
 ];
 export default plugins;
@@ -0,0 +1,88 @@
+"""Benchmarks of the notebook server handlers.
+
+Run them with ``hatch run bench:test``. The results are saved in
+``.benchmarks``, named after the commit, and ``hatch run bench:compare``
+compares the saved runs.
+
+The server runs in the test process, so the CPU time of a request includes
+the client, which is the same for all the handlers.
+"""
+
+import statistics
+import time
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.fixture
+def notebooks(jp_create_notebook, notebookapp):
+    nbpaths = (
+        "notebook1.ipynb",
+        "jlab_test_notebooks/notebook2.ipynb",
+    )
+    for nb in nbpaths:
+        jp_create_notebook(nb)
+    return nbpaths
+
+
+@pytest.fixture
+def fetch(jp_fetch, io_loop):
+    """Fetch a url, recording the time to first byte and the CPU time."""
+    timings = {"ttfb": [], "cpu": []}
+
+    def _fetch(*parts, **kwargs):
+        first_byte = None
+
+        def header_callback(line):
+            nonlocal first_byte
+            if first_byte is None:
+                first_byte = time.perf_counter()
+
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        response = io_loop.run_sync(
+            lambda: jp_fetch(*parts, header_callback=header_callback, **kwargs)
+        )
+        timings["cpu"].append(time.process_time() - cpu_start)
+        timings["ttfb"].append(first_byte - start)
+        return response
+
+    _fetch.timings = timings
+    return _fetch
+
+
+def record(benchmark, fetch, response):
+    """Record the median timings and the size of the response."""
+    assert response.code == 200
+    benchmark.extra_info["ttfb_seconds"] = statistics.median(fetch.timings["ttfb"])
+    benchmark.extra_info["cpu_seconds"] = statistics.median(fetch.timings["cpu"])
+    benchmark.extra_info["response_bytes"] = len(response.body)
+
+
+@pytest.mark.parametrize(
+    "parts",
+    [
+        ("tree",),
+        ("tree", "jlab_test_notebooks"),
+        ("notebooks", "notebook1.ipynb"),
+        ("edit", "notebook1.ipynb"),
+        ("consoles", "1"),
+        ("terminals", "1"),
+    ],
+    ids="/".join,
+)
+def test_page(benchmark, notebooks, fetch, parts):
+    response = benchmark(fetch, *parts)
+    record(benchmark, fetch, response)
+
+
+def test_settings_bundle(benchmark, notebookapp, fetch):
+    response = benchmark(fetch, "api", "notebook", "settings")
+    record(benchmark, fetch, response)
+
+
+def test_directory_listing(benchmark, notebookapp, fetch, large_directory):
+    response = benchmark(fetch, "api", "notebook", "listing", large_directory)
+    record(benchmark, fetch, response)
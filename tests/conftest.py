@@ -12,6 +12,8 @@ from notebook.app import JupyterNotebookApp
 
 pytest_plugins = ["jupyter_server.pytest_plugin"]
 
+APP_TEMPLATES_DIR = pathlib.Path(__file__).parent.parent / "app" / "templates"
+
 
 def mkdir(tmp_path, *parts):
     path = tmp_path.joinpath(*parts)
@@ -47,11 +49,13 @@ def make_notebook_app(  # PLR0913
             schemas_dir=str(schemas_dir),
             workspaces_dir=str(workspaces_dir),
             extra_labextensions_path=[str(labextensions_dir)],
+            **kwargs,
         )
 
-    # Copy the template files.
-    for html_path in glob.glob(str(files("notebook.templates").joinpath("*.html"))):
-        shutil.copy(html_path, jp_template_dir)
+    # Copy the sources of the template files, which are built with the app.
+    for html_path in glob.glob(str(APP_TEMPLATES_DIR / "*_template.html")):
+        name = osp.basename(html_path).replace("_template.html", ".html")
+        shutil.copy(html_path, jp_template_dir / name)
 
     # Create the index file.
     index = jp_template_dir.joinpath("index.html")
@@ -127,8 +131,38 @@ def make_notebook_app(  # PLR0913
 
 
 @pytest.fixture
-def notebookapp(jp_serverapp, make_notebook_app):
-    app = make_notebook_app()
+def notebookapp_kwargs():
+    """The traits of the notebook app, parametrize to configure it."""
+    return {}
+
+
+@pytest.fixture
+def notebookapp(jp_serverapp, make_notebook_app, notebookapp_kwargs):
+    app = make_notebook_app(**notebookapp_kwargs)
     app._link_jupyter_server_extension(jp_serverapp)
     app.initialize()
     return app
+
+
+# The number of entries of the large directory, as in the data directories
+# the paged listing is meant for.
+LARGE_DIRECTORY_SIZE = 100_000
+
+
+@pytest.fixture(scope="session")
+def large_directory_template(tmp_path_factory):
+    """A directory with many files and a few subdirectories, created once."""
+    path = tmp_path_factory.mktemp("large")
+    for i in range(LARGE_DIRECTORY_SIZE - 10):
+        path.joinpath(f"file{i:06d}.txt").touch()
+    for i in range(10):
+        path.joinpath(f"subdir{i}").mkdir()
+    path.joinpath(".hidden").touch()
+    return path
+
+
+@pytest.fixture
+def large_directory(jp_root_dir, large_directory_template):
+    """Link the large directory in the root directory, as ``large``."""
+    jp_root_dir.joinpath("large").symlink_to(large_directory_template, target_is_directory=True)
+    return "large"
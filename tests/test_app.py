@@ -1,9 +1,38 @@
+import asyncio
+import base64
+import gzip
+import json
+import logging
 import os
+import re
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
 
+import nbformat
 import pytest
+from jupyter_client.utils import ensure_async
+from jupyter_server.services.contents.filemanager import FileContentsManager
+from prometheus_client import REGISTRY, generate_latest
 from tornado.httpclient import HTTPClientError
 
+import notebook.app
+from notebook._kernel_events import KERNELS_EVENT_SCHEMA_ID, KernelEvents
+from notebook._lazy_outputs import LAZY_OUTPUT_MIMETYPE, LazyOutputs
+from notebook._output_limits import TRUNCATED_OUTPUT_MIMETYPE, OutputStore
+from notebook._startup_profile import StartupProfile
 from notebook.app import JupyterNotebookApp, NotebookHandler, TreeHandler
+from notebook.loadtest import TASKS, LagSampler, run
+
+
+def get_page_config(html):
+    """Get the page config of a rendered page."""
+    match = re.search(
+        r'<script id="jupyter-config-data" type="application/json">(.*?)</script>', html, re.DOTALL
+    )
+    assert match is not None
+    return json.loads(match.group(1))
 
 
 @pytest.fixture
@@ -101,3 +130,878 @@ async def test_app(notebookapp):
     assert app.schemas_dir
     assert app.user_settings_dir
     assert app.workspaces_dir
+
+
+async def test_page_config_cache(notebookapp, labextensions_dir, jp_fetch):
+    app: JupyterNotebookApp = notebookapp
+    await jp_fetch("tree")
+    cached = app._page_config_cache
+    assert cached is not None
+
+    await jp_fetch("tree")
+    assert app._page_config_cache is cached
+
+    # Installing an extension changes the labextensions directory.
+    ext_dir = labextensions_dir / "new-extension"
+    ext_dir.mkdir()
+    (ext_dir / "package.json").write_text(
+        json.dumps(
+            {
+                "name": "new-extension",
+                "version": "0.1.0",
+                "jupyterlab": {"_build": {"load": "static/remoteEntry.js"}},
+            }
+        )
+    )
+    os.utime(labextensions_dir, ns=(0, 0))
+    await jp_fetch("tree")
+    assert app._page_config_cache is not cached
+    names = [ext["name"] for ext in app._page_config_cache[1].labextensions["federated_extensions"]]
+    assert "new-extension" in names
+
+    cached = app._page_config_cache
+    app.invalidate_page_config()
+    assert app._page_config_cache is None
+    await jp_fetch("tree")
+    assert app._page_config_cache is not cached
+
+
+async def test_page_config_does_not_block_event_loop(notebookapp, jp_fetch, monkeypatch):
+    get_page_config = notebook.app.get_page_config
+
+    def slow_get_page_config(*args, **kwargs):
+        # Simulate labextensions living on a slow network file system.
+        time.sleep(0.5)
+        return get_page_config(*args, **kwargs)
+
+    monkeypatch.setattr(notebook.app, "get_page_config", slow_get_page_config)
+    lags = []
+
+    async def ticker():
+        loop = asyncio.get_running_loop()
+        for _ in range(40):
+            start = loop.time()
+            await asyncio.sleep(0.01)
+            lags.append(loop.time() - start - 0.01)
+
+    responses = await asyncio.gather(jp_fetch("tree"), jp_fetch("consoles", "foo"), ticker())
+    assert all(r.code == 200 for r in responses[:2])
+    assert max(lags) < 0.25
+
+
+async def test_rendered_page_cache(notebookapp, jp_fetch, jp_serverapp, jp_root_dir):
+    app: JupyterNotebookApp = notebookapp
+    r = await jp_fetch("tree")
+    etag = r.headers["Etag"]
+    assert len(app._rendered_pages) == 1
+
+    r = await jp_fetch("tree")
+    assert r.headers["Etag"] == etag
+    assert len(app._rendered_pages) == 1
+
+    with pytest.raises(HTTPClientError) as e:
+        await jp_fetch("tree", headers={"If-None-Match": etag})
+    assert e.value.code == 304
+
+    # The tree path is part of the page config, so it gets its own page.
+    (jp_root_dir / "subdir").mkdir()
+    r = await jp_fetch("tree", "subdir")
+    assert r.headers["Etag"] != etag
+    assert len(app._rendered_pages) == 2
+
+    page_config_data = jp_serverapp.web_app.settings["page_config_data"]
+    page_config_data["foo"] = "bar"
+    r = await jp_fetch("tree")
+    assert r.headers["Etag"] != etag
+    assert '"foo": "bar"' in r.body.decode()
+
+    # Changing the static page config renders the pages again.
+    etag = r.headers["Etag"]
+    app.copy_absolute_path = True
+    r = await jp_fetch("tree")
+    assert r.headers["Etag"] != etag
+    assert '"copyAbsolutePath": true' in r.body.decode()
+
+
+async def test_rendered_page_cache_disabled(notebookapp, jp_fetch):
+    app: JupyterNotebookApp = notebookapp
+    app.page_cache_size = 0
+    r = await jp_fetch("tree")
+    assert r.code == 200
+    assert not app._rendered_pages
+
+
+async def test_custom_css_handler(notebookapp, jp_fetch):
+    app: JupyterNotebookApp = notebookapp
+    custom_css_file = app.get_custom_css_files()[0]
+    os.makedirs(os.path.dirname(custom_css_file), exist_ok=True)
+    with open(custom_css_file, "w") as fid:
+        fid.write("body { color: red; }")
+    r = await jp_fetch("custom", "custom.css")
+    assert r.code == 200
+    assert r.headers["Content-Type"] == "text/css"
+    assert r.body.decode() == "body { color: red; }"
+    etag = r.headers["Etag"]
+    last_modified = r.headers["Last-Modified"]
+
+    with pytest.raises(HTTPClientError) as e:
+        await jp_fetch("custom", "custom.css", headers={"If-None-Match": etag})
+    assert e.value.code == 304
+
+    with pytest.raises(HTTPClientError) as e:
+        await jp_fetch("custom", "custom.css", headers={"If-Modified-Since": last_modified})
+    assert e.value.code == 304
+
+    since = last_modified.replace("GMT", "-0000")
+    with pytest.raises(HTTPClientError) as e:
+        await jp_fetch("custom", "custom.css", headers={"If-Modified-Since": since})
+    assert e.value.code == 304
+
+    with open(custom_css_file, "w") as fid:
+        fid.write("body { color: blue; }")
+    os.utime(custom_css_file, ns=(0, 0))
+    r = await jp_fetch("custom", "custom.css", headers={"If-None-Match": etag})
+    assert r.code == 200
+    assert r.body.decode() == "body { color: blue; }"
+    assert r.headers["Etag"] != etag
+
+
+async def test_precompressed_static_files(notebookapp, jp_fetch, jp_root_dir):
+    bundle = b"console.log('notebook');" * 100
+    name = "main.0123456789abcdef.js"
+    (jp_root_dir / name).write_bytes(bundle)
+    (jp_root_dir / f"{name}.gz").write_bytes(gzip.compress(bundle))
+    (jp_root_dir / "style.js").write_bytes(bundle)
+
+    r = await jp_fetch(
+        "static", "notebook", name, headers={"Accept-Encoding": "gzip"}, decompress_response=False
+    )
+    assert r.headers["Content-Encoding"] == "gzip"
+    assert r.headers["Content-Type"].endswith("/javascript")
+    assert r.headers["Vary"] == "Accept-Encoding"
+    assert r.headers["Cache-Control"] == "public, max-age=31536000, immutable"
+    assert gzip.decompress(r.body) == bundle
+
+    r = await jp_fetch(
+        "static",
+        "notebook",
+        name,
+        headers={"Accept-Encoding": "br, gzip;q=0"},
+        decompress_response=False,
+    )
+    assert "Content-Encoding" not in r.headers
+    assert r.headers["Vary"] == "Accept-Encoding"
+    assert r.body == bundle
+
+    r = await jp_fetch(
+        "static",
+        "notebook",
+        "style.js",
+        headers={"Accept-Encoding": "gzip"},
+        decompress_response=False,
+    )
+    assert "Content-Encoding" not in r.headers
+    assert "Vary" not in r.headers
+    assert r.body == bundle
+
+
+async def test_settings_bundle(notebookapp, jp_fetch, user_settings_dir, monkeypatch):
+    r = await jp_fetch("api", "notebook", "settings")
+    assert r.code == 200
+    settings = json.loads(r.body.decode())["settings"]
+    ids = [plugin["id"] for plugin in settings]
+    assert "@jupyterlab/apputils-extension:themes" in ids
+    assert "@jupyterlab/apputils-extension-federated:themes" in ids
+    assert all("schema" in plugin and "raw" in plugin for plugin in settings)
+    assert r.headers["Cache-Control"] == "no-cache"
+    etag = r.headers["Etag"]
+
+    with pytest.raises(HTTPClientError) as e:
+        await jp_fetch("api", "notebook", "settings", headers={"If-None-Match": etag})
+    assert e.value.code == 304
+
+    # Unchanged files are not read again.
+    def fail(*args, **kwargs):
+        raise AssertionError
+
+    monkeypatch.setattr(notebook.app, "get_settings", fail)
+    r = await jp_fetch("api", "notebook", "settings")
+    assert r.headers["Etag"] == etag
+    monkeypatch.undo()
+
+    settings_file = (
+        user_settings_dir / "@jupyterlab" / "apputils-extension" / "themes.jupyterlab-settings"
+    )
+    settings_file.parent.mkdir(parents=True)
+    settings_file.write_text(json.dumps({"theme": "JupyterLab Dark"}))
+    r = await jp_fetch("api", "notebook", "settings", headers={"If-None-Match": etag})
+    assert r.code == 200
+    assert r.headers["Etag"] != etag
+    themes = next(
+        plugin
+        for plugin in json.loads(r.body.decode())["settings"]
+        if plugin["id"] == "@jupyterlab/apputils-extension:themes"
+    )
+    assert themes["settings"]["theme"] == "JupyterLab Dark"
+
+
+async def test_checkpoint_events(notebooks, notebookapp, jp_serverapp):
+    events = []
+
+    async def listener(logger, schema_id, data):
+        events.append(data)
+
+    jp_serverapp.event_logger.add_listener(
+        schema_id=notebook.app.CHECKPOINTS_EVENT_SCHEMA_ID, listener=listener
+    )
+    # The checkpoints API is shadowed by the app_url of the test app.
+    cm = jp_serverapp.contents_manager
+    checkpoint = await ensure_async(cm.create_checkpoint("/notebook1.ipynb"))
+    await ensure_async(cm.delete_checkpoint(checkpoint["id"], "notebook1.ipynb"))
+    await asyncio.sleep(0)
+    assert events == [
+        {
+            "action": "create",
+            "path": "notebook1.ipynb",
+            "checkpoint_id": checkpoint["id"],
+            "last_modified": events[0]["last_modified"],
+        },
+        {"action": "delete", "path": "notebook1.ipynb", "checkpoint_id": checkpoint["id"]},
+    ]
+    assert jp_serverapp.web_app.settings["page_config_data"]["checkpointEvents"] is True
+
+
+async def test_kernel_events(notebookapp, jp_serverapp, jp_data_dir):
+    events = []
+
+    async def listener(logger, schema_id, data):
+        events.append(data)
+
+    jp_serverapp.event_logger.add_listener(schema_id=KERNELS_EVENT_SCHEMA_ID, listener=listener)
+    assert jp_serverapp.web_app.settings["page_config_data"]["kernelEvents"] is True
+    kernel_ids = []
+    kernel_manager = SimpleNamespace(list_kernel_ids=lambda: list(kernel_ids))
+    kernel_events = KernelEvents(
+        notebookapp.log,
+        jp_serverapp.event_logger,
+        kernel_manager,
+        jp_serverapp.kernel_spec_manager,
+        notebookapp.kernel_events_interval,
+        notebookapp.run_in_executor,
+    )
+
+    # Only the changes of the kernels are emitted.
+    kernel_ids.append("k1")
+    kernel_events.check_kernels()
+    kernel_events.check_kernels()
+    # The hidden kernels are not listed.
+    kernel_events.hidden_ids = lambda: {"pooled"}
+    kernel_ids.append("pooled")
+    kernel_events.check_kernels()
+    kernel_ids.remove("k1")
+    kernel_events.check_kernels()
+
+    await kernel_events.check_kernelspecs()
+    spec_dir = jp_data_dir / "kernels" / "other"
+    spec_dir.mkdir(parents=True)
+    (spec_dir / "kernel.json").write_text(json.dumps({"argv": ["other"], "display_name": "Other"}))
+    await kernel_events.check_kernelspecs()
+
+    async def create_session(**kwargs):
+        return {"id": "s1"}
+
+    session_manager = SimpleNamespace(
+        create_session=create_session, update_session=None, delete_session=None
+    )
+    kernel_events.watch_sessions(session_manager)
+    assert await session_manager.create_session(path="a.ipynb") == {"id": "s1"}
+
+    await asyncio.sleep(0)
+    assert events == [
+        {"action": "kernels"},
+        {"action": "kernels"},
+        {"action": "kernelspecs"},
+        {"action": "sessions"},
+    ]
+
+
+@pytest.mark.parametrize("notebookapp_kwargs", [{}, {"share_connections": True}])
+async def test_share_connections(notebookapp_kwargs, notebookapp, jp_fetch):
+    r = await jp_fetch("tree")
+    page_config = get_page_config(r.body.decode())
+    assert page_config["shareConnections"] is bool(notebookapp_kwargs)
+
+
+@pytest.mark.parametrize("sync", [False, True])
+async def test_directory_listing(sync, notebooks, jp_fetch, jp_serverapp, monkeypatch):
+    cm = jp_serverapp.contents_manager
+    if sync:
+        # The models of a page are got in the io thread pool.
+        monkeypatch.setattr(cm, "get", FileContentsManager(root_dir=cm.root_dir).get)
+    r = await jp_fetch("api", "notebook", "listing", "jlab_test_notebooks", params={"limit": 1})
+    model = json.loads(r.body.decode())
+    assert model["type"] == "directory"
+    assert model["path"] == "jlab_test_notebooks"
+    assert model["total"] == 2
+    assert [entry["name"] for entry in model["content"]] == ["level2"]
+
+    r = await jp_fetch("api", "notebook", "listing", "jlab_test_notebooks", params={"offset": 1})
+    model = json.loads(r.body.decode())
+    assert [entry["name"] for entry in model["content"]] == ["notebook2.ipynb"]
+
+    for path, params in [("notebook1.ipynb", {}), ("", {"limit": "-1"})]:
+        with pytest.raises(HTTPClientError) as e:
+            await jp_fetch("api", "notebook", "listing", path, params=params)
+        assert e.value.code == 400
+
+
+async def test_directory_listing_large(notebookapp, jp_fetch, jp_root_dir, large_directory):
+    start = time.perf_counter()
+    r = await jp_fetch("api", "notebook", "listing", large_directory)
+    first_page = time.perf_counter() - start
+    model = json.loads(r.body.decode())
+    # Hidden files are not listed.
+    assert model["total"] == len(os.listdir(jp_root_dir / large_directory)) - 1
+    assert len(model["content"]) == notebook.app.LISTING_PAGE_SIZE
+    names = [entry["name"] for entry in model["content"]]
+    assert names[:11] == [*(f"subdir{i}" for i in range(10)), "file000000.txt"]
+
+    # The next pages reuse the sorted names of the directory.
+    start = time.perf_counter()
+    r = await jp_fetch(
+        "api", "notebook", "listing", large_directory, params={"offset": 50_000, "limit": 100}
+    )
+    assert time.perf_counter() - start < first_page
+    model = json.loads(r.body.decode())
+    assert model["offset"] == 50_000
+    assert [entry["name"] for entry in model["content"]][:2] == [
+        "file049990.txt",
+        "file049991.txt",
+    ]
+
+
+async def test_lazy_outputs(notebookapp, jp_serverapp, jp_fetch, jp_root_dir):
+    app: JupyterNotebookApp = notebookapp
+    image = base64.b64encode(os.urandom(64 * 1024)).decode()
+    nb = nbformat.v4.new_notebook()
+    nb.cells.append(
+        nbformat.v4.new_code_cell(
+            outputs=[
+                nbformat.v4.new_output("stream", text="small"),
+                nbformat.v4.new_output("display_data", data={"image/png": image}),
+            ]
+        )
+    )
+    nbformat.write(nb, jp_root_dir / "large.ipynb")
+
+    # Small notebooks are returned whole.
+    r = await jp_fetch("api", "notebook", "contents", "large.ipynb")
+    assert json.loads(r.body.decode())["content"]["cells"][0]["outputs"][1]["data"] == {
+        "image/png": image
+    }
+
+    app.lazy_outputs_threshold = 1024
+    r = await jp_fetch("api", "notebook", "contents", "large.ipynb")
+    model = json.loads(r.body.decode())
+    small, stub = model["content"]["cells"][0]["outputs"]
+    assert small["text"] == "small"
+    stub = stub["data"][LAZY_OUTPUT_MIMETYPE]
+    assert stub["path"] == "large.ipynb"
+    assert stub["mimetypes"] == ["image/png"]
+
+    r = await jp_fetch("api", "notebook", "outputs", "large.ipynb", params={"key": stub["key"]})
+    outputs = json.loads(r.body.decode())["outputs"]
+    assert outputs[stub["key"]]["data"] == {"image/png": image}
+    with pytest.raises(HTTPClientError) as e:
+        await jp_fetch("api", "notebook", "outputs", "large.ipynb", params={"key": "missing"})
+    assert e.value.code == 404
+
+    # The outputs are put back on save, even once dropped from memory.
+    cm = jp_serverapp.contents_manager
+    for _ in range(2):
+        model["content"]["cells"][0]["source"] = "print('saved')"
+        await ensure_async(cm.save(model, "large.ipynb"))
+        saved = nbformat.read(jp_root_dir / "large.ipynb", as_version=4)
+        assert saved.cells[0].source == "print('saved')"
+        assert saved.cells[0].outputs[1].data == {"image/png": image}
+        app.lazy_outputs = LazyOutputs()
+
+    # The notebook page saves the stubs once the notebook was renamed, even
+    # with the outputs dropped from memory.
+    await ensure_async(cm.rename("large.ipynb", "moved.ipynb"))
+    model["content"]["cells"][0]["source"] = "print('moved')"
+    r = await jp_fetch(
+        "api", "notebook", "contents", "moved.ipynb", method="PUT", body=json.dumps(model)
+    )
+    assert r.code == 200
+    saved = nbformat.read(jp_root_dir / "moved.ipynb", as_version=4)
+    assert saved.cells[0].source == "print('moved')"
+    assert saved.cells[0].outputs[1].data == {"image/png": image}
+
+    # The revision keeps the stubs, with the size of the notebook as JSON.
+    revision = json.loads(r.body.decode())["revision"]
+    kept = app.notebook_revisions.get("moved.ipynb", revision)
+    assert kept is not None
+    assert LAZY_OUTPUT_MIMETYPE in kept.nb["cells"][0]["outputs"][1]["data"]
+    assert kept.size == len(json.dumps(kept.nb))
+    app.lazy_outputs = LazyOutputs()
+    cell_id = kept.nb["cells"][0]["id"]
+    r = await jp_fetch(
+        "api",
+        "notebook",
+        "contents",
+        "moved.ipynb",
+        method="PATCH",
+        body=json.dumps({"revision": revision, "cells": [{"id": cell_id}]}),
+    )
+    saved = nbformat.read(jp_root_dir / "moved.ipynb", as_version=4)
+    assert saved.cells[0].outputs[1].data == {"image/png": image}
+
+
+@pytest.mark.parametrize(
+    "notebookapp_kwargs", [{"max_lazy_outputs_size": 100, "max_notebook_revisions_size": 100}]
+)
+async def test_memory_limits(notebookapp_kwargs, notebookapp):
+    app: JupyterNotebookApp = notebookapp
+    # The least recently kept outputs and revisions are dropped past the limits.
+    keys = []
+    for i in range(2):
+        nb = nbformat.v4.new_notebook()
+        output = nbformat.v4.new_output("display_data", data={"text/plain": f"{i}" * 20000})
+        nb.cells.append(nbformat.v4.new_code_cell(outputs=[output]))
+        assert app.lazy_outputs.strip(f"{i}.ipynb", nb) == 1
+        keys.append(nb.cells[0].outputs[0].data[LAZY_OUTPUT_MIMETYPE]["key"])
+    assert app.lazy_outputs.get(keys[0]) is None
+    assert app.lazy_outputs.get(keys[1]) is not None
+
+    revisions = [app.notebook_revisions.add(path, {}, None, 60) for path in ["a", "b"]]
+    assert app.notebook_revisions.get("a", revisions[0]) is None
+    assert app.notebook_revisions.get("b", revisions[1]) is not None
+
+
+async def test_output_limits(notebookapp, jp_serverapp, jp_fetch, jp_root_dir, tmp_path):
+    app: JupyterNotebookApp = notebookapp
+    app.output_store_dir = str(tmp_path / "outputs")
+    app.max_cell_output_size = 1024
+    text = "".join(f"{i}\n" for i in range(10000))
+    nb = nbformat.v4.new_notebook()
+    nb.cells.append(
+        nbformat.v4.new_code_cell(outputs=[nbformat.v4.new_output("stream", text=text)])
+    )
+    nb.cells.append(
+        nbformat.v4.new_code_cell(outputs=[nbformat.v4.new_output("stream", text="ok")])
+    )
+    cm = jp_serverapp.contents_manager
+    await ensure_async(cm.save({"type": "notebook", "content": nb}, "runaway.ipynb"))
+
+    # The outputs past the limit are truncated on save, and kept in the store.
+    saved = nbformat.read(jp_root_dir / "runaway.ipynb", as_version=4)
+    head, stub = saved.cells[0].outputs
+    assert text.startswith(head.text)
+    assert head.text.endswith("\n")
+    assert len(head.text) < 1024
+    stub = stub.data[TRUNCATED_OUTPUT_MIMETYPE]
+    assert stub["outputs"] == 1
+    assert saved.cells[1].outputs[0].text == "ok"
+
+    # Only the rest of the outputs is kept, to be shown after the head.
+    r = await jp_fetch("api", "notebook", "truncated-outputs", stub["key"])
+    outputs = json.loads(r.body.decode())["outputs"]
+    assert head.text + outputs[0]["text"] == text
+    with pytest.raises(HTTPClientError) as e:
+        await jp_fetch("api", "notebook", "truncated-outputs", "0" * 64)
+    assert e.value.code == 404
+
+    # The notebooks written by other tools are truncated when opened.
+    nb.cells.reverse()
+    nbformat.write(nb, jp_root_dir / "runaway.ipynb")
+    app.max_cell_output_size = 0
+    app.max_notebook_output_size = 16
+    r = await jp_fetch("api", "notebook", "contents", "runaway.ipynb")
+    cells = json.loads(r.body.decode())["content"]["cells"]
+    assert cells[0]["outputs"][0]["text"] == "ok"
+    assert TRUNCATED_OUTPUT_MIMETYPE in cells[1]["outputs"][-1]["data"]
+
+    # Opening the notebook again does not write the outputs again.
+    store_dir = tmp_path / "outputs"
+    written = {path.name: path.stat().st_mtime_ns for path in store_dir.iterdir()}
+    r = await jp_fetch("api", "notebook", "contents", "runaway.ipynb")
+    assert json.loads(r.body.decode())["content"]["cells"] == cells
+    assert {path.name: path.stat().st_mtime_ns for path in store_dir.iterdir()} == written
+
+
+def test_output_store_prune(tmp_path):
+    outputs = [[nbformat.v4.new_output("stream", text=f"{i}" * 100)] for i in range(3)]
+    # The outputs are never deleted by default.
+    store = OutputStore(tmp_path / "all")
+    keys = [store.put(output) for output in outputs]
+    assert all(store.get(key) for key in keys)
+    # The least recently written outputs are deleted past the limit.
+    store = OutputStore(tmp_path / "pruned", max_size=400)
+    keys = [store.put(output) for output in outputs]
+    assert store.get(keys[0]) is None
+    assert store.get(keys[1]) == outputs[1]
+    assert store.get(keys[2]) == outputs[2]
+    # Writing outputs kept again makes them the most recently written.
+    store.put(outputs[1])
+    store.put(outputs[0])
+    assert store.get(keys[2]) is None
+    assert store.get(keys[1]) == outputs[1]
+
+
+async def test_differential_saves(notebookapp, jp_fetch, jp_root_dir):
+    nb = nbformat.v4.new_notebook()
+    nb.cells = [nbformat.v4.new_code_cell(f"print({i})") for i in range(3)]
+    model = {"type": "notebook", "format": "json", "content": nb}
+    r = await jp_fetch(
+        "api", "notebook", "contents", "diff.ipynb", method="PUT", body=json.dumps(model)
+    )
+    revision = json.loads(r.body.decode())["revision"]
+
+    # The unchanged cells are only sent by id.
+    first, second, third = nb.cells
+    edited = {**second, "source": "print('edited')"}
+    patch = {
+        "revision": revision,
+        "metadata": nb.metadata,
+        "cells": [{"id": third.id}, edited, {"id": first.id}],
+    }
+    r = await jp_fetch(
+        "api", "notebook", "contents", "diff.ipynb", method="PATCH", body=json.dumps(patch)
+    )
+    saved = nbformat.read(jp_root_dir / "diff.ipynb", as_version=4)
+    assert [cell.source for cell in saved.cells] == ["print(2)", "print('edited')", "print(0)"]
+    revision = json.loads(r.body.decode())["revision"]
+
+    # The saves based on another revision, or a notebook changed since, are rejected.
+    for base in ["other", revision]:
+        with pytest.raises(HTTPClientError) as e:
+            await jp_fetch(
+                "api",
+                "notebook",
+                "contents",
+                "diff.ipynb",
+                method="PATCH",
+                body=json.dumps({**patch, "revision": base}),
+            )
+        assert e.value.code == 409
+        os.utime(jp_root_dir / "diff.ipynb", (0, 0))
+
+
+@pytest.fixture
+def slow_contents_manager(jp_serverapp, monkeypatch):
+    """Simulate a remote contents manager where every call is a round trip."""
+    cm = jp_serverapp.contents_manager
+    calls = []
+
+    def slow(name):
+        method = getattr(cm, name)
+
+        async def wrapper(*args, **kwargs):
+            calls.append(name)
+            await asyncio.sleep(0.05)
+            return await ensure_async(method(*args, **kwargs))
+
+        monkeypatch.setattr(cm, name, wrapper)
+
+    for name in ["dir_exists", "file_exists", "is_hidden", "get"]:
+        slow(name)
+    return calls
+
+
+async def test_tree_handler_round_trips(notebooks, jp_fetch, slow_contents_manager, monkeypatch):
+    calls = slow_contents_manager
+    start = time.monotonic()
+    await jp_fetch("tree", "jlab_test_notebooks")
+    elapsed = time.monotonic() - start
+    assert calls == ["get", "is_hidden"]
+    assert elapsed < 4 * 0.05
+
+    # Navigating back to the same directory is served from the cache.
+    calls.clear()
+    await jp_fetch("tree", "jlab_test_notebooks")
+    assert calls == []
+
+    redirected_url = None
+
+    def redirect(self, url):
+        nonlocal redirected_url
+        redirected_url = url
+
+    monkeypatch.setattr(TreeHandler, "redirect", redirect)
+    await jp_fetch("tree", "jlab_test_notebooks", "level2", "notebook3.ipynb")
+    assert redirected_url == "/a%40b/notebooks/jlab_test_notebooks/level2/notebook3.ipynb"
+    # The notebook model is not loaded to find out it is a notebook.
+    assert calls == ["file_exists", "is_hidden"]
+
+
+async def test_tree_handler_hidden_notebook(
+    notebookapp, jp_fetch, jp_root_dir, jp_serverapp, monkeypatch
+):
+    redirected_url = None
+
+    def redirect(self, url):
+        nonlocal redirected_url
+        redirected_url = url
+
+    monkeypatch.setattr(TreeHandler, "redirect", redirect)
+    (jp_root_dir / ".secret").mkdir()
+    nbformat.write(nbformat.v4.new_notebook(), jp_root_dir / ".secret" / "x.ipynb")
+    with pytest.raises(HTTPClientError) as e:
+        await jp_fetch("tree", ".secret", "x.ipynb")
+    assert e.value.code == 404
+    assert redirected_url is None
+
+    jp_serverapp.contents_manager.allow_hidden = True
+    await jp_fetch("tree", ".secret", "x.ipynb")
+    assert redirected_url == "/a%40b/notebooks/.secret/x.ipynb"
+
+
+async def test_tree_handler_sniff_notebook_type(
+    notebooks, notebookapp, jp_fetch, slow_contents_manager, monkeypatch
+):
+    app: JupyterNotebookApp = notebookapp
+    app.sniff_notebook_type = True
+    calls = slow_contents_manager
+    redirected_url = None
+
+    def redirect(self, url):
+        nonlocal redirected_url
+        redirected_url = url
+
+    monkeypatch.setattr(TreeHandler, "redirect", redirect)
+    await jp_fetch("tree", "notebook1.ipynb")
+    assert redirected_url == "/a%40b/notebooks/notebook1.ipynb"
+    assert calls == ["get"]
+
+
+async def test_tree_handler_path_info_ttl(notebooks, notebookapp, jp_fetch, slow_contents_manager):
+    app: JupyterNotebookApp = notebookapp
+    app.path_info_ttl = 0
+    calls = slow_contents_manager
+    await jp_fetch("tree", "jlab_test_notebooks")
+    await jp_fetch("tree", "jlab_test_notebooks")
+    assert calls == ["get", "is_hidden"] * 2
+
+
+async def test_tree_handler_get_path_info(notebooks, jp_fetch, jp_serverapp, monkeypatch):
+    cm = jp_serverapp.contents_manager
+    calls = []
+
+    def get_path_info(path):
+        calls.append(path)
+        if path == "jlab_test_notebooks":
+            return {"type": "directory", "hidden": False}
+        return None
+
+    monkeypatch.setattr(cm, "get_path_info", get_path_info, raising=False)
+    r = await jp_fetch("tree", "jlab_test_notebooks")
+    assert r.code == 200
+    with pytest.raises(HTTPClientError) as e:
+        await jp_fetch("tree", "notebook1.ipynb")
+    assert e.value.code == 404
+    assert calls == ["jlab_test_notebooks", "notebook1.ipynb"]
+
+
+def test_startup_profile(notebookapp, tmp_path):
+    app: JupyterNotebookApp = notebookapp
+    app.startup_profile_file = str(tmp_path / "profile.json")
+    assert app.write_startup_profile() == app.startup_profile_file
+
+    with open(app.startup_profile_file) as fid:
+        report = json.load(fid)
+    names = [phase["name"] for phase in report["phases"]]
+    assert "import notebook.app" in names
+    assert "prepare templates" in names
+    assert "prepare handlers" in names
+    event = report["traceEvents"][0]
+    assert event["ph"] == "X"
+    assert event["dur"] >= 0
+
+
+def test_startup_profile_instrument():
+    profile = StartupProfile()
+
+    class Target:
+        def run(self, name):
+            return name
+
+    with profile.instrument(Target, "run", lambda _, name: f"run {name}"):
+        assert Target().run("foo") == "foo"
+    assert Target.__dict__["run"].__name__ == "run"
+    assert [event[0] for event in profile.events] == ["run foo"]
+
+    profile.disable()
+    assert profile.events == []
+    with profile.phase("disabled"):
+        pass
+    assert profile.events == []
+
+
+@pytest.mark.parametrize(
+    ("argv", "requested"),
+    [
+        ([], False),
+        (["--profile-startup"], True),
+        (["--JupyterNotebookApp.profile_startup=True"], True),
+        (["--JupyterNotebookApp.profile_startup=False"], False),
+        (["--no-browser"], False),
+    ],
+)
+def test_profile_startup_requested(argv, requested):
+    assert notebook.app._profile_startup_requested(argv) is requested
+
+
+@pytest.mark.parametrize(
+    ("module", "deferred"),
+    [
+        ("notebook", ["notebook.app", "jupyter_server", "jupyterlab", "tornado"]),
+        ("notebook.app", ["jupyterlab.commands"]),
+    ],
+)
+def test_import_defers_heavy_modules(module, deferred):
+    # Run in a fresh interpreter, the test process already imported everything.
+    code = f"import sys, {module}; print([m for m in {deferred!r} if m in sys.modules])"
+    output = subprocess.check_output([sys.executable, "-c", code], text=True)  # noqa: S603
+    assert output.strip() == "[]"
+
+
+def test_app_dir(notebookapp):
+    app: JupyterNotebookApp = notebookapp
+    assert notebook.app.app_dir == app.app_dir
+    assert app.app_dir.name == "lab"
+
+
+async def test_metrics(notebooks, jp_fetch):
+    await jp_fetch("tree")
+    await jp_fetch("notebooks", "notebook1.ipynb")
+    # The test app is served at "/" so /metrics is shadowed, read the
+    # registry the jupyter_server metrics endpoint serves instead.
+    metrics = generate_latest(REGISTRY).decode()
+    assert 'notebook_page_render_duration_seconds_count{handler="TreeHandler"}' in metrics
+    assert 'notebook_page_config_duration_seconds_count{handler="NotebookHandler"}' in metrics
+    assert (
+        'notebook_contents_manager_duration_seconds_count{handler="NotebookHandler",method="dir_exists"}'
+        in metrics
+    )
+    assert 'notebook_response_size_bytes_count{handler="TreeHandler"}' in metrics
+
+
+async def test_kernel_pool(notebooks, notebookapp, jp_serverapp):
+    app: JupyterNotebookApp = notebookapp
+    km = jp_serverapp.kernel_manager
+    app.kernel_pool_size = 1
+    app.kernel_pool_ignored_env = ["JPY_SESSION_NAME"]
+    await app._start_jupyter_server_extension(jp_serverapp)
+    assert app.kernel_pool is not None
+    kernel_name = km.default_kernel_name
+    while not app.kernel_pool.pooled_kernels()[kernel_name]:
+        await asyncio.sleep(0.05)
+    [pooled_id] = app.kernel_pool.pooled_kernels()[kernel_name]
+    assert km.list_kernels() == []
+
+    hits = REGISTRY.get_sample_value(
+        "notebook_kernel_pool_claims_total", {"kernel_name": kernel_name, "result": "hit"}
+    )
+    session = await jp_serverapp.session_manager.create_session(
+        path="notebook1.ipynb", name="notebook1.ipynb", type="notebook", kernel_name=kernel_name
+    )
+    assert session["kernel"]["id"] == pooled_id
+    assert [kernel["id"] for kernel in km.list_kernels()] == [pooled_id]
+    assert (
+        REGISTRY.get_sample_value(
+            "notebook_kernel_pool_claims_total", {"kernel_name": kernel_name, "result": "hit"}
+        )
+        == (hits or 0) + 1
+    )
+
+    # Kernels started in other directories do not come from the pool.
+    session = await jp_serverapp.session_manager.create_session(
+        path="jlab_test_notebooks/notebook2.ipynb",
+        name="notebook2.ipynb",
+        type="notebook",
+        kernel_name=kernel_name,
+    )
+    assert session["kernel"]["id"] not in app.kernel_pool.pooled_kernels()[kernel_name]
+    assert session["kernel"]["id"] != pooled_id
+
+    # Nor do the kernels asked for with other environment variables.
+    kernel_id = await km.start_kernel(kernel_name=kernel_name, env={"OTHER": "1"})
+    assert kernel_id not in app.kernel_pool.pooled_kernels()[kernel_name]
+
+    # The pool is filled again in the background.
+    while not app.kernel_pool.pooled_kernels()[kernel_name]:
+        await asyncio.sleep(0.05)
+
+    # The pooled kernels that are gone are replaced.
+    [pooled_id] = app.kernel_pool.pooled_kernels()[kernel_name]
+    await km.shutdown_kernel(pooled_id)
+    app.kernel_pool.fill()
+    while not app.kernel_pool.pooled_kernels()[kernel_name]:
+        await asyncio.sleep(0.05)
+    [pooled_id] = app.kernel_pool.pooled_kernels()[kernel_name]
+
+    # The pooled kernels are shut down with the extension.
+    await app.stop_extension()
+    assert pooled_id not in km
+    assert km.list_kernels.__func__ is type(km).list_kernels
+
+
+async def test_load_test(
+    notebooks, notebookapp, jp_serverapp, http_server, jp_http_port, jp_base_url
+):
+    sampler = LagSampler()
+    sampling = asyncio.create_task(sampler.run())
+    report = await run(
+        f"http://localhost:{jp_http_port}{jp_base_url}",
+        jp_serverapp.identity_provider.token,
+        users=3,
+        duration=1,
+        wait=0,
+        notebooks=notebooks,
+    )
+    sampling.cancel()
+    assert report["requests"] > 0
+    assert report["throughput_per_second"] > 0
+    assert set(report["urls"]) <= {url for _, urls in TASKS.values() for url in urls}
+    for url in ("/tree/{dir}", "/api/contents/{notebook}/checkpoints"):
+        if url in report["urls"]:
+            assert report["urls"][url]["failures"] == 0
+    assert report["latency"]["p50_ms"] <= report["latency"]["p99_ms"]
+    assert sampler.lags()
+
+
+async def test_loop_watchdog(notebookapp, jp_serverapp, jp_fetch, monkeypatch, caplog):
+    app: JupyterNotebookApp = notebookapp
+    app.event_loop_lag_threshold = 0.1
+    app.event_loop_lag_interval = 0.01
+    await app._start_jupyter_server_extension(jp_serverapp)
+    assert app.loop_watchdog is not None
+    # The app logger does not propagate to caplog.
+    monkeypatch.setattr(app.loop_watchdog, "log", logging.getLogger(__name__))
+
+    async def blocking_get(self, path=""):
+        time.sleep(0.5)  # noqa: ASYNC251
+        self.finish()
+
+    monkeypatch.setattr(TreeHandler, "get", blocking_get)
+    stalls = REGISTRY.get_sample_value(
+        "notebook_event_loop_stalls_total", {"handler": "TreeHandler"}
+    )
+    r = await jp_fetch("tree", "blocked")
+    assert r.code == 200
+    # The stall is logged on the next beat of the loop.
+    for _ in range(100):
+        value = REGISTRY.get_sample_value(
+            "notebook_event_loop_stalls_total", {"handler": "TreeHandler"}
+        )
+        if value == (stalls or 0) + 1:
+            break
+        await asyncio.sleep(0.01)
+    await app.stop_extension()
+
+    assert value == (stalls or 0) + 1
+    [record] = [r for r in caplog.records if "by TreeHandler" in r.getMessage()]
+    message = record.getMessage()
+    assert "by TreeHandler handling /a%40b/tree/blocked" in message
+    assert "time.sleep(0.5)" in message
@@ -0,0 +1,119 @@
+// Copyright (c) Jupyter Development Team.
+// Distributed under the terms of the Modified BSD License.
+
+import { test } from '../test/fixtures';
+
+import { runAndAdvance, waitForKernelReady } from '../test/utils';
+
+import { SAMPLES, medians, writeResults } from './utils';
+
+const NOTEBOOK = 'autoscroll-benchmark.ipynb';
+
+/**
+ * The number of cells of the notebook.
+ */
+const CELLS = 500;
+
+/**
+ * The number of lines streamed by the first cell.
+ */
+const LINES = 100000;
+
+/**
+ * The timings of the streaming of the output, in ms.
+ */
+interface IStreaming {
+  duration: number;
+  longTasks: number;
+  longTasksDuration: number;
+  frames: number;
+}
+
+/**
+ * A notebook streaming lines in its first cell, followed by cells with
+ * small outputs.
+ */
+function makeNotebook(): string {
+  const cells: object[] = [
+    {
+      cell_type: 'code',
+      execution_count: null,
+      metadata: {},
+      outputs: [],
+      source: `for i in range(${LINES}):\n    print(i)\nprint("done")`,
+    },
+  ];
+  for (let i = 1; i < CELLS; i++) {
+    cells.push({
+      cell_type: 'code',
+      execution_count: null,
+      metadata: {},
+      outputs: [{ name: 'stdout', output_type: 'stream', text: `${i}\n` }],
+      source: `print(${i})`,
+    });
+  }
+  return JSON.stringify({
+    cells,
+    metadata: {},
+    nbformat: 4,
+    nbformat_minor: 4,
+  });
+}
+
+test.use({ autoGoto: false });
+
+test.describe('Auto scroll', () => {
+  test.beforeEach(async ({ page, tmpPath }) => {
+    await page.contents.uploadContent(
+      makeNotebook(),
+      'text',
+      `${tmpPath}/${NOTEBOOK}`
+    );
+  });
+
+  test(`stream ${LINES} lines in a ${CELLS} cells notebook`, async ({
+    page,
+    tmpPath,
+  }) => {
+    test.setTimeout(SAMPLES * 120 * 1000);
+    const samples: IStreaming[] = [];
+    for (let i = 0; i < SAMPLES; i++) {
+      await page.goto(`notebooks/${tmpPath}/${NOTEBOOK}`);
+      await waitForKernelReady(page);
+      await page.evaluate(() => {
+        const stats = { longTasks: 0, longTasksDuration: 0, frames: 0 };
+        (window as any).benchmarkStats = stats;
+        new PerformanceObserver((list) => {
+          list.getEntries().forEach((entry) => {
+            stats.longTasks++;
+            stats.longTasksDuration += entry.duration;
+          });
+        }).observe({ type: 'longtask' });
+        const frame = () => {
+          stats.frames++;
+          requestAnimationFrame(frame);
+        };
+        requestAnimationFrame(frame);
+      });
+
+      await page.click('.jp-Cell >> nth=0');
+      const start = Date.now();
+      await runAndAdvance(page);
+      await page.waitForFunction(
+        () =>
+          document
+            .querySelector('.jp-Cell .jp-OutputArea')
+            ?.textContent?.includes('done'),
+        undefined,
+        { polling: 250, timeout: 120 * 1000 }
+      );
+      const duration = Date.now() - start;
+      const stats = await page.evaluate(() => (window as any).benchmarkStats);
+      samples.push({ duration, ...stats });
+    }
+
+    const summary = medians(samples);
+    writeResults('autoscroll', { cells: CELLS, lines: LINES, ...summary });
+    console.table(summary);
+  });
+});
@@ -0,0 +1,99 @@
+// Copyright (c) Jupyter Development Team.
+// Distributed under the terms of the Modified BSD License.
+
+import path from 'path';
+
+import { Page } from '@playwright/test';
+
+import { test } from '../test/fixtures';
+
+import { waitForKernelReady } from '../test/utils';
+
+import { SAMPLES, medians, writeResults } from './utils';
+
+const NOTEBOOK = 'example.ipynb';
+
+/**
+ * The timings of a page load, in ms, and the size of its scripts and styles.
+ */
+interface IPageLoad {
+  timeToFirstByte: number;
+  timeToInteractive: number;
+  bundleBytes: number;
+  transferredBytes: number;
+}
+
+/**
+ * The results of all the pages, by page name.
+ */
+const results: { [page: string]: IPageLoad[] } = {};
+
+/**
+ * Load a page, and measure it once it is ready to use.
+ */
+async function measure(
+  page: Page,
+  url: string,
+  ready: (page: Page) => Promise<void>
+): Promise<IPageLoad> {
+  await page.goto(url);
+  await ready(page);
+  return page.evaluate(() => {
+    const [navigation] = performance.getEntriesByType(
+      'navigation'
+    ) as PerformanceNavigationTiming[];
+    const resources = (
+      performance.getEntriesByType('resource') as PerformanceResourceTiming[]
+    ).filter(({ name }) => /\.(js|css)(\?|$)/.test(name));
+    return {
+      timeToFirstByte: navigation.responseStart - navigation.startTime,
+      timeToInteractive: performance.now(),
+      bundleBytes: resources.reduce((sum, r) => sum + r.decodedBodySize, 0),
+      transferredBytes: resources.reduce((sum, r) => sum + r.transferSize, 0),
+    };
+  });
+}
+
+test.use({ autoGoto: false });
+
+test.describe('Page load', () => {
+  test.beforeEach(async ({ page, tmpPath }) => {
+    await page.contents.uploadFile(
+      path.resolve(__dirname, `../../binder/${NOTEBOOK}`),
+      `${tmpPath}/${NOTEBOOK}`
+    );
+  });
+
+  test.afterAll(() => {
+    const summary: { [page: string]: IPageLoad } = {};
+    for (const [name, samples] of Object.entries(results)) {
+      summary[name] = medians(samples);
+    }
+    writeResults('', { pages: summary });
+    console.table(summary);
+  });
+
+  test('tree', async ({ page, tmpPath }) => {
+    results.tree = [];
+    for (let i = 0; i < SAMPLES; i++) {
+      results.tree.push(
+        await measure(page, `tree/${tmpPath}`, async (page) => {
+          await page.waitForSelector(`.jp-DirListing-item >> text=${NOTEBOOK}`);
+        })
+      );
+    }
+  });
+
+  test('notebooks', async ({ page, tmpPath }) => {
+    results.notebooks = [];
+    for (let i = 0; i < SAMPLES; i++) {
+      results.notebooks.push(
+        await measure(
+          page,
+          `notebooks/${tmpPath}/${NOTEBOOK}`,
+          waitForKernelReady
+        )
+      );
+    }
+  });
+});
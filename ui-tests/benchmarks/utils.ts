@@ -0,0 +1,71 @@
+// Copyright (c) Jupyter Development Team.
+// Distributed under the terms of the Modified BSD License.
+
+import { execSync } from 'child_process';
+
+import fs from 'fs';
+
+import path from 'path';
+
+/**
+ * The number of times each benchmark is run.
+ */
+export const SAMPLES = parseInt(
+  process.env.BENCHMARK_NUMBER_SAMPLES ?? '5',
+  10
+);
+
+/**
+ * The directory the results are written to, one file per commit.
+ */
+const RESULTS_DIR = path.resolve(__dirname, '..', 'benchmark-results');
+
+/**
+ * The median of some samples.
+ */
+export function median(values: number[]): number {
+  const sorted = [...values].sort((a, b) => a - b);
+  const middle = Math.floor(sorted.length / 2);
+  return sorted.length % 2
+    ? sorted[middle]
+    : (sorted[middle - 1] + sorted[middle]) / 2;
+}
+
+/**
+ * The medians of the samples of each measure.
+ */
+export function medians<T extends Record<keyof T, number>>(samples: T[]): T {
+  const summary = {} as T;
+  (Object.keys(samples[0] ?? {}) as (keyof T)[]).forEach((measure) => {
+    summary[measure] = median(
+      samples.map((sample) => sample[measure])
+    ) as T[keyof T];
+  });
+  return summary;
+}
+
+/**
+ * The commit the results are for.
+ */
+function getCommit(): string {
+  return (
+    process.env.BENCHMARK_REFERENCE ??
+    execSync('git rev-parse --short HEAD').toString().trim()
+  );
+}
+
+/**
+ * Write the results of a benchmark, for the current commit.
+ *
+ * @param name The name of the benchmark, suffixed to the file name, if any.
+ * @param results The results of the benchmark.
+ */
+export function writeResults(name: string, results: object): void {
+  const commit = getCommit();
+  const file = name ? `${commit}-${name}.json` : `${commit}.json`;
+  fs.mkdirSync(RESULTS_DIR, { recursive: true });
+  fs.writeFileSync(
+    path.join(RESULTS_DIR, file),
+    JSON.stringify({ commit, samples: SAMPLES, ...results }, null, 2)
+  );
+}
@@ -0,0 +1,23 @@
+import baseConfig from '@jupyterlab/galata/lib/playwright-config';
+
+module.exports = {
+  ...baseConfig,
+  testDir: './benchmarks',
+  reporter: [['list']],
+  use: {
+    appPath: '',
+    video: 'off',
+  },
+  // Run the samples one after the other, so they do not compete for the CPU
+  retries: 0,
+  workers: 1,
+  webServer: [
+    {
+      command: 'jlpm start',
+      port: 8888,
+      timeout: 120 * 1000,
+      reuseExistingServer: true,
+      stdout: 'pipe',
+    },
+  ],
+};